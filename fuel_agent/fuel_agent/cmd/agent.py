@@ -52,6 +52,12 @@ def partition():
     main(['do_partitioning'])
 
 
+def partition_plan():
+    for command in main(['do_partitioning_plan']):
+        sys.stdout.write(' '.join(command))
+        sys.stdout.write('\n')
+
+
 def copyimage():
     main(['do_copyimage'])
 
@@ -90,9 +96,11 @@ def main(actions=None):
         LOG.debug('Input data: %s', data)
 
         mgr = manager.Manager(data)
+        result = None
         if actions:
             for action in actions:
-                getattr(mgr, action)()
+                result = getattr(mgr, action)()
+        return result
     except Exception as exc:
         handle_exception(exc)
 
@@ -144,6 +144,10 @@ class HttpUrlInvalidContentLength(BaseError):
     pass
 
 
+class HttpUrlInvalidContentRange(BaseError):
+    pass
+
+
 class ImageChecksumMismatchError(BaseError):
     pass
 
@@ -12,6 +12,9 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import hashlib
+import json
+from multiprocessing.pool import ThreadPool
 import os
 import shutil
 import signal
@@ -26,6 +29,7 @@ from fuel_agent.utils import artifact as au
 from fuel_agent.utils import build as bu
 from fuel_agent.utils import fs as fu
 from fuel_agent.utils import grub as gu
+from fuel_agent.utils import hardware as hu
 from fuel_agent.utils import lvm as lu
 from fuel_agent.utils import md as mu
 from fuel_agent.utils import partition as pu
@@ -77,6 +81,11 @@ opts = [
         default='.fuel-agent-image',
         help='Suffix which is used while creating temporary files',
     ),
+    cfg.IntOpt(
+        'partitioning_threads',
+        default=8,
+        help='Maximum number of disks to be partitioned concurrently',
+    ),
 ]
 
 cli_opts = [
@@ -138,37 +147,20 @@ class Manager(object):
         utils.execute('udevadm', 'control', '--reload-rules',
                       check_exit_code=[0])
 
-        for parted in self.driver.partition_scheme.parteds:
-            for prt in parted.partitions:
-                # We wipe out the beginning of every new partition
-                # right after creating it. It allows us to avoid possible
-                # interactive dialog if some data (metadata or file system)
-                # present on this new partition and it also allows udev not
-                # hanging trying to parse this data.
-                utils.execute('dd', 'if=/dev/zero', 'bs=1M',
-                              'seek=%s' % max(prt.begin - 3, 0), 'count=5',
-                              'of=%s' % prt.device, check_exit_code=[0])
-                # Also wipe out the ending of every new partition.
-                # Different versions of md stores metadata in different places.
-                # Adding exit code 1 to be accepted as for handling situation
-                # when 'no space left on device' occurs.
-                utils.execute('dd', 'if=/dev/zero', 'bs=1M',
-                              'seek=%s' % max(prt.end - 3, 0), 'count=5',
-                              'of=%s' % prt.device, check_exit_code=[0, 1])
-
-        for parted in self.driver.partition_scheme.parteds:
-            pu.make_label(parted.name, parted.label)
-            for prt in parted.partitions:
-                pu.make_partition(prt.device, prt.begin, prt.end, prt.type)
-                for flag in prt.flags:
-                    pu.set_partition_flag(prt.device, prt.count, flag)
-                if prt.guid:
-                    pu.set_gpt_type(prt.device, prt.count, prt.guid)
-                # If any partition to be created doesn't exist it's an error.
-                # Probably it's again 'device or resource busy' issue.
-                if not os.path.exists(prt.name):
-                    raise errors.PartitionNotFoundError(
-                        'Partition %s not found after creation' % prt.name)
+        # NOTE: disks are independent from each other, so they
+        # are partitioned concurrently. udev events are handled once for
+        # all of them before and after that, md and lvm devices are created
+        # only when all the disks are partitioned.
+        parteds = self.driver.partition_scheme.parteds
+        if parteds:
+            utils.execute('udevadm', 'settle', '--quiet',
+                          check_exit_code=[0])
+            pool = ThreadPool(min(CONF.partitioning_threads, len(parteds)))
+            try:
+                pool.map(self._do_partitioning_disk, parteds)
+            finally:
+                pool.close()
+                pool.join()
 
         # disable udev's rules blacklisting
         LOG.debug("Disabling udev's rules blacklisting")
@@ -198,6 +190,9 @@ class Manager(object):
         utils.execute('udevadm', 'trigger', '--subsystem-match=block',
                       check_exit_code=[0])
         utils.execute('udevadm', 'settle', '--quiet', check_exit_code=[0])
+        # NOTE: block devices were changed, so they have to be
+        # discovered once again, e.g. mdcreate checks new partitions exist
+        hu.invalidate_block_devices_cache()
 
         # If one creates partitions with the same boundaries as last time,
         # there might be md and lvm metadata on those partitions. To prevent
@@ -212,10 +207,12 @@ class Manager(object):
         for md in self.driver.partition_scheme.mds:
             mu.mdcreate(md.name, md.level, *md.devices)
 
-        # creating physical volumes
-        for pv in self.driver.partition_scheme.pvs:
-            lu.pvcreate(pv.name, metadatasize=pv.metadatasize,
-                        metadatacopies=pv.metadatacopies)
+        # creating physical volumes, those sharing the same metadata
+        # options are created at once
+        for metadatasize, metadatacopies, pvnames in \
+                lu.group_pvs(self.driver.partition_scheme.pvs):
+            lu.pvcreate_many(pvnames, metadatasize=metadatasize,
+                             metadatacopies=metadatacopies)
 
         # creating volume groups
         for vg in self.driver.partition_scheme.vgs:
@@ -232,6 +229,57 @@ class Manager(object):
             if not found_images:
                 fu.make_fs(fs.type, fs.options, fs.label, fs.device)
 
+    def _do_partitioning_disk(self, parted):
+        LOG.debug('Partitioning disk: %s' % parted.name)
+        for prt in parted.partitions:
+            # We wipe out the beginning of every new partition
+            # right after creating it. It allows us to avoid possible
+            # interactive dialog if some data (metadata or file system)
+            # present on this new partition and it also allows udev not
+            # hanging trying to parse this data.
+            utils.zero_out(prt.device, max(prt.begin - 3, 0), 5)
+            # Also wipe out the ending of every new partition.
+            # Different versions of md stores metadata in different places.
+            # Reaching the end of device is not an error here.
+            utils.zero_out(prt.device, max(prt.end - 3, 0), 5,
+                           ignore_end=True)
+
+        pu.make_label(parted.name, parted.label, settle=False)
+        for prt in parted.partitions:
+            pu.make_partition(prt.device, prt.begin, prt.end, prt.type,
+                              settle=False)
+            for flag in prt.flags:
+                pu.set_partition_flag(prt.device, prt.count, flag,
+                                      settle=False)
+            if prt.guid:
+                pu.set_gpt_type(prt.device, prt.count, prt.guid,
+                                settle=False)
+            # If any partition to be created doesn't exist it's an error.
+            # Probably it's again 'device or resource busy' issue.
+            if not os.path.exists(prt.name):
+                raise errors.PartitionNotFoundError(
+                    'Partition %s not found after creation' % prt.name)
+
+    def do_partitioning_plan(self):
+        """Dry run of md and lvm part of do_partitioning
+
+        Nothing is executed. Returned commands wipe out md and lvm devices
+        which are found now and create the ones from partition scheme.
+        Disks partitioning, udev handling and wiping out of devices which
+        are found on new partitions are not planned, so do_partitioning
+        may run more commands.
+
+        :returns: list of commands, every command is a list of arguments
+        """
+        LOG.debug('--- Planning devices (do_partitioning_plan) ---')
+        partition_scheme = self.driver.partition_scheme
+        commands = (mu.plan_clean_all() + lu.plan_remove_all() +
+                    mu.plan_create(partition_scheme) +
+                    lu.plan_create(partition_scheme))
+        for command in commands:
+            LOG.debug('Planned command: %s', ' '.join(command))
+        return commands
+
     def do_configdrive(self):
         LOG.debug('--- Creating configdrive (do_configdrive) ---')
         cc_output_path = os.path.join(CONF.tmp_path, 'cloud_config.txt')
@@ -286,6 +334,7 @@ class Manager(object):
 
     def do_copyimage(self):
         LOG.debug('--- Copying images (do_copyimage) ---')
+        jobs = []
         for image in self.driver.image_scheme.images:
             LOG.debug('Processing image: %s' % image.uri)
             processing = au.Chain()
@@ -304,33 +353,52 @@ class Manager(object):
                 LOG.debug('Appending GZIP processor')
                 processing.append(au.GunzipStream)
 
+            checksum = None
+            if image.size and image.md5:
+                LOG.debug('Appending MD5 processor')
+                checksum = au.Md5Stream(image.size)
+                processing.append(checksum)
+            else:
+                LOG.debug('Skipping image checksum comparing. '
+                          'Ether size or hash have been missed')
+
             LOG.debug('Appending TARGET processor: %s' % image.target_device)
             processing.append(image.target_device)
+            jobs.append((image, processing, checksum))
 
-            LOG.debug('Launching image processing chain')
-            processing.process()
+        if not jobs:
+            return
 
-            if image.size and image.md5:
-                LOG.debug('Trying to compare image checksum')
-                actual_md5 = utils.calculate_md5(image.target_device,
-                                                 image.size)
-                if actual_md5 == image.md5:
-                    LOG.debug('Checksum matches successfully: md5=%s' %
-                              actual_md5)
-                else:
-                    raise errors.ImageChecksumMismatchError(
-                        'Actual checksum %s mismatches with expected %s for '
-                        'file %s' % (actual_md5, image.md5,
-                                     image.target_device))
+        # NOTE: every image has its own target device, so
+        # images are copied concurrently
+        pool = ThreadPool(len(jobs))
+        try:
+            pool.map(lambda job: self._copy_image(*job), jobs)
+        finally:
+            pool.close()
+            pool.join()
+
+    def _copy_image(self, image, processing, checksum):
+        LOG.debug('Launching image processing chain: %s' % image.uri)
+        processing.process()
+
+        if checksum is not None:
+            LOG.debug('Trying to compare image checksum')
+            actual_md5 = checksum.hexdigest()
+            if actual_md5 == image.md5:
+                LOG.debug('Checksum matches successfully: md5=%s' %
+                          actual_md5)
             else:
-                LOG.debug('Skipping image checksum comparing. '
-                          'Ether size or hash have been missed')
+                raise errors.ImageChecksumMismatchError(
+                    'Actual checksum %s mismatches with expected %s for '
+                    'file %s' % (actual_md5, image.md5,
+                                 image.target_device))
 
-            LOG.debug('Extending image file systems')
-            if image.format in ('ext2', 'ext3', 'ext4', 'xfs'):
-                LOG.debug('Extending %s %s' %
-                          (image.format, image.target_device))
-                fu.extend_fs(image.format, image.target_device)
+        LOG.debug('Extending image file systems')
+        if image.format in ('ext2', 'ext3', 'ext4', 'xfs'):
+            LOG.debug('Extending %s %s' %
+                      (image.format, image.target_device))
+            fu.extend_fs(image.format, image.target_device)
 
     # TODO(kozhukalov): write tests
     def mount_target(self, chroot, treat_mtab=True, pseudo=True):
@@ -474,6 +542,59 @@ class Manager(object):
     # TODO(kozhukalov): Split this huge method
     # into a set of smaller ones
     # https://bugs.launchpad.net/fuel/+bug/1444090
+    def _get_image_build_hash(self):
+        """Returns a hash of everything image content depends on
+
+        Those are repos, packages, images and their file systems.
+        """
+        data = {
+            'repos': [
+                {'name': repo.name, 'uri': repo.uri,
+                 'suite': getattr(repo, 'suite', None),
+                 'section': getattr(repo, 'section', None),
+                 'priority': repo.priority}
+                for repo in self.driver.operating_system.repos],
+            'packages': self.driver.operating_system.packages,
+            'images': [],
+        }
+        for image in self.driver.image_scheme.images:
+            fs = self.driver.partition_scheme.fs_by_device(
+                image.target_device)
+            data['images'].append({
+                'uri': image.uri, 'format': image.format,
+                'container': image.container, 'mount': fs.mount,
+                'fs_type': fs.type, 'fs_options': fs.options,
+                'fs_label': fs.label})
+        return hashlib.md5(json.dumps(data, sort_keys=True)).hexdigest()
+
+    def _images_are_up_to_date(self, build_hash):
+        """Checks if images can be reused instead of building them again
+
+        All the images have to exist and to be described by the metadata
+        of the previous build with the same build hash.
+        """
+        images = [img.uri.split('file://', 1)[1]
+                  for img in self.driver.image_scheme.images]
+        if not all([os.path.exists(img) for img in images]):
+            return False
+        try:
+            with open(self.driver.metadata_uri.split('file://', 1)[1]) as f:
+                metadata = yaml.safe_load(f)
+        except (IOError, yaml.YAMLError) as exc:
+            LOG.debug('Failed to load metadata of existing images: %s', exc)
+            return False
+        if not isinstance(metadata, dict) or \
+                metadata.get('build_hash') != build_hash:
+            LOG.debug('Existing images were built from different data')
+            return False
+        sizes = dict((img.get('container_name'), img.get('container_size'))
+                     for img in metadata.get('images', []))
+        for img in images:
+            if os.path.getsize(img) != sizes.get(os.path.basename(img)):
+                LOG.debug('Image %s does not match its metadata', img)
+                return False
+        return True
+
     def do_build_image(self):
         """Building OS images
 
@@ -496,12 +617,11 @@ class Manager(object):
         # as a pluggable data driver to avoid any fixed format.
         metadata = {}
 
-        # TODO(kozhukalov): implement this using image metadata
-        # we need to compare list of packages and repos
         LOG.info('*** Checking if image exists ***')
-        if all([os.path.exists(img.uri.split('file://', 1)[1])
-                for img in self.driver.image_scheme.images]):
-            LOG.debug('All necessary images are available. '
+        build_hash = self._get_image_build_hash()
+        if self._images_are_up_to_date(build_hash):
+            LOG.debug('All necessary images are available and were built '
+                      'from the same repos and packages. '
                       'Nothing needs to be done.')
             return
         LOG.debug('At least one of the necessary images is unavailable. '
@@ -564,7 +684,7 @@ class Manager(object):
             LOG.debug('Preventing services from being get started')
             bu.suppress_services_start(chroot)
             LOG.debug('Installing base operating system using debootstrap')
-            bu.run_debootstrap(uri=uri, suite=suite, chroot=chroot)
+            bu.run_debootstrap_cached(uri=uri, suite=suite, chroot=chroot)
 
             # APT-GET
             LOG.debug('Configuring apt inside chroot')
@@ -682,6 +802,8 @@ class Manager(object):
                     'container': image.container,
                     'format': image.format})
 
+            metadata['build_hash'] = build_hash
+
             # NOTE(kozhukalov): implement abstract publisher
             LOG.debug('Image metadata: %s', metadata)
             with open(self.driver.metadata_uri.split('file://', 1)[1],
@@ -12,11 +12,13 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import hashlib
 import mock
 from oslotest import base as test_base
 import zlib
 
 from oslo.config import cfg
+from oslo.config import fixture as config_fixture
 
 from fuel_agent import errors
 from fuel_agent.utils import artifact as au
@@ -64,6 +66,10 @@ class TestLocalFile(test_base.BaseTestCase):
 
 
 class TestHttpUrl(test_base.BaseTestCase):
+    def setUp(self):
+        super(TestHttpUrl, self).setUp()
+        self.conf = self.useFixture(config_fixture.Config())
+
     @mock.patch.object(utils, 'init_http_request')
     def test_httpurl_init_ok(self, mock_req):
         mock_req.return_value = mock.Mock(headers={'content-length': 123})
@@ -88,6 +94,105 @@ class TestHttpUrl(test_base.BaseTestCase):
         for data in enumerate(httpurl):
             self.assertEqual(content[data[0]], data[1])
 
+    @mock.patch.object(utils, 'init_http_request')
+    def test_httpurl_next_ranges(self, mock_req):
+        self.conf.config(http_download_threads=2, http_range_size=4,
+                         data_chunk_size=3)
+        content = 'fake content #1'
+
+        def init_http_request(url, byte_range=0, byte_range_end=None):
+            if byte_range_end is None:
+                byte_range_end = len(content) - 1
+            resp = mock.Mock(status_code=206, headers={
+                'content-length': len(content),
+                'content-range': 'bytes %s-%s/%s' % (
+                    byte_range, byte_range_end, len(content))})
+            resp.raw.read.side_effect = [
+                content[i:min(i + 3, byte_range_end + 1)]
+                for i in range(byte_range, byte_range_end + 1, 3)]
+            return resp
+
+        mock_req.side_effect = init_http_request
+        httpurl = au.HttpUrl('fake_url')
+        self.assertTrue(httpurl.ranged)
+        self.assertEqual(['fake', ' con', 'tent', ' #1'], list(httpurl))
+        self.assertEqual(
+            [mock.call('fake_url', 0, 3), mock.call('fake_url', 4, 7),
+             mock.call('fake_url', 8, 11), mock.call('fake_url', 12, 14)],
+            sorted(mock_req.call_args_list[1:]))
+
+    def _make_range_response(self, start, end, status_code=206):
+        return mock.Mock(status_code=status_code, headers={
+            'content-length': end - start + 1,
+            'content-range': 'bytes %s-%s/15' % (start, end)})
+
+    @mock.patch.object(utils, 'init_http_request')
+    def test_httpurl_fetch_range_resumed(self, mock_req):
+        self.conf.config(http_download_threads=2, http_range_size=4)
+        req_mock = self._make_range_response(0, 14)
+        range_mock = self._make_range_response(0, 11)
+        range_mock.raw.read.side_effect = ['fake ', IOError()]
+        resumed_mock = self._make_range_response(5, 11)
+        resumed_mock.raw.read.side_effect = ['content']
+        mock_req.side_effect = [req_mock, range_mock, resumed_mock]
+        httpurl = au.HttpUrl('fake_url')
+        self.assertEqual('fake content', httpurl._fetch_range(0, 11))
+        self.assertEqual(
+            [mock.call('fake_url'), mock.call('fake_url', 0, 11),
+             mock.call('fake_url', 5, 11)],
+            mock_req.call_args_list)
+
+    @mock.patch.object(utils, 'init_http_request')
+    def test_httpurl_fetch_range_not_partial_content(self, mock_req):
+        self.conf.config(http_download_threads=2, http_range_size=4)
+        mock_req.side_effect = [self._make_range_response(0, 14),
+                                self._make_range_response(0, 11, 200)]
+        httpurl = au.HttpUrl('fake_url')
+        self.assertRaises(errors.HttpUrlInvalidContentRange,
+                          httpurl._fetch_range, 0, 11)
+
+    @mock.patch.object(utils, 'init_http_request')
+    def test_httpurl_fetch_range_resumed_wrong_range(self, mock_req):
+        self.conf.config(http_download_threads=2, http_range_size=4)
+        range_mock = self._make_range_response(0, 11)
+        range_mock.raw.read.side_effect = ['fake ', IOError()]
+        mock_req.side_effect = [self._make_range_response(0, 14),
+                                range_mock,
+                                self._make_range_response(0, 11)]
+        httpurl = au.HttpUrl('fake_url')
+        self.assertRaises(errors.HttpUrlInvalidContentRange,
+                          httpurl._fetch_range, 0, 11)
+
+    @mock.patch.object(au, 'ThreadPool')
+    @mock.patch.object(utils, 'init_http_request')
+    def test_httpurl_close(self, mock_req, mock_pool):
+        self.conf.config(http_download_threads=2, http_range_size=4)
+        mock_req.return_value = self._make_range_response(0, 14)
+        httpurl = au.HttpUrl('fake_url')
+        httpurl.next()
+        httpurl.close()
+        mock_pool.return_value.terminate.assert_called_once_with()
+        mock_pool.return_value.join.assert_called_once_with()
+        self.assertIsNone(httpurl.pool)
+        self.assertEqual(0, len(httpurl.pending))
+
+    @mock.patch.object(utils, 'init_http_request')
+    def test_httpurl_not_ranged_if_not_supported(self, mock_req):
+        self.conf.config(http_download_threads=2, http_range_size=4)
+        mock_req.return_value = mock.Mock(status_code=200,
+                                          headers={'content-length': 15})
+        self.assertFalse(au.HttpUrl('fake_url').ranged)
+
+
+class TestMd5Stream(test_base.BaseTestCase):
+    def test_md5_stream(self):
+        content = ['fake content #1', 'fake content #2']
+        md5_stream = au.Md5Stream(20)
+        self.assertEqual(content, list(md5_stream(content)))
+        self.assertEqual(
+            hashlib.md5(''.join(content)[:20]).hexdigest(),
+            md5_stream.hexdigest())
+
 
 class TestGunzipStream(test_base.BaseTestCase):
     def test_gunzip_stream_next(self):
@@ -117,3 +222,14 @@ class TestChain(test_base.BaseTestCase):
         self.chain.process()
         expected_calls = [mock.call('fake_uri')]
         self.assertEqual(expected_calls, fake_processor.call_args_list)
+
+    def test_process_fail(self):
+        # processors are closed if the chain fails, e.g. a download
+        # is stopped if an image can't be written
+        self.chain.processors.append('fake_uri')
+        fake_processor = mock.Mock(spec=au.Target)
+        fake_processor.return_value.target.side_effect = IOError
+        self.chain.processors.append(fake_processor)
+        self.chain.processors.append('fake_target')
+        self.assertRaises(IOError, self.chain.process)
+        fake_processor.return_value.close.assert_called_once_with()
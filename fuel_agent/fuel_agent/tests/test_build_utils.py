@@ -12,13 +12,16 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import gzip
 import os
 import shutil
 import signal
+import tempfile
 import testtools
 
 import mock
 from oslo.config import cfg
+from oslo.config import fixture as config_fixture
 
 from fuel_agent import errors
 from fuel_agent.utils import build as bu
@@ -57,6 +60,102 @@ class BuildUtilsTestCase(testtools.TestCase):
                                           '--include=eatmydata', 'suite',
                                           'chroot', 'uri', attempts=2)
 
+    def test_get_debootstrap_cache_key(self):
+        key = bu.get_debootstrap_cache_key('uri', 'suite', 'arch',
+                                           packages=['b', 'a'],
+                                           release='release')
+        self.assertEqual(key, bu.get_debootstrap_cache_key(
+            'uri', 'suite', 'arch', packages=['a', 'b'], release='release'))
+        self.assertNotEqual(key, bu.get_debootstrap_cache_key(
+            'uri', 'suite2', 'arch', packages=['a', 'b'], release='release'))
+        self.assertNotEqual(key, bu.get_debootstrap_cache_key(
+            'uri', 'suite', 'arch', release='release'))
+        # mirror is updated
+        self.assertNotEqual(key, bu.get_debootstrap_cache_key(
+            'uri', 'suite', 'arch', packages=['a', 'b'],
+            release='release2'))
+
+    @mock.patch.object(bu, 'get_release_file', return_value='release')
+    @mock.patch.object(bu, 'run_debootstrap')
+    @mock.patch.object(os.path, 'exists', return_value=True)
+    @mock.patch.object(utils, 'execute')
+    def test_run_debootstrap_cached_hit(self, mock_exec, mock_exists,
+                                        mock_debootstrap, mock_release):
+        bu.run_debootstrap_cached('uri', 'suite', 'chroot', 'arch',
+                                  cache_dir='/cache')
+        mock_release.assert_called_once_with('uri', 'suite', section=True)
+        key = bu.get_debootstrap_cache_key('uri', 'suite', 'arch',
+                                           release='release')
+        mock_exists.assert_called_once_with('/cache/%s.tar' % key)
+        mock_exec.assert_called_once_with(
+            'tar', '-xpf', '/cache/%s.tar' % key, '--numeric-owner',
+            '-C', 'chroot', check_exit_code=[0])
+        self.assertFalse(mock_debootstrap.called)
+
+    @mock.patch.object(bu, 'get_release_file', return_value='release')
+    @mock.patch.object(bu, 'run_debootstrap')
+    @mock.patch.object(utils, 'execute')
+    def test_run_debootstrap_cached_miss(self, mock_exec, mock_debootstrap,
+                                         mock_release):
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir)
+        bu.run_debootstrap_cached('uri', 'suite', 'chroot', 'arch',
+                                  eatmydata=True, attempts=2,
+                                  cache_dir=cache_dir)
+        mock_debootstrap.assert_called_once_with(
+            uri='uri', suite='suite', chroot='chroot', arch='arch',
+            eatmydata=True, attempts=2)
+        key = bu.get_debootstrap_cache_key('uri', 'suite', 'arch',
+                                           packages=['eatmydata'],
+                                           release='release')
+        args = mock_exec.call_args[0]
+        self.assertEqual(('tar', '-cpf'), args[:2])
+        self.assertEqual(('--numeric-owner', '-C', 'chroot', '.'), args[3:])
+        # tarball is published under its key only when it is complete
+        self.assertEqual(['%s.tar' % key], os.listdir(cache_dir))
+
+    @mock.patch.object(bu, 'get_release_file', return_value='release')
+    @mock.patch.object(bu, 'run_debootstrap')
+    @mock.patch.object(utils, 'execute')
+    def test_run_debootstrap_cached_fail(self, mock_exec, mock_debootstrap,
+                                         mock_release):
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir)
+        mock_exec.side_effect = errors.ProcessExecutionError
+        self.assertRaises(errors.ProcessExecutionError,
+                          bu.run_debootstrap_cached, 'uri', 'suite',
+                          'chroot', cache_dir=cache_dir)
+        self.assertEqual([], os.listdir(cache_dir))
+
+    @mock.patch.object(bu, 'get_release_file')
+    @mock.patch.object(bu, 'run_debootstrap')
+    @mock.patch.object(utils, 'execute')
+    def test_run_debootstrap_cached_no_release(self, mock_exec,
+                                               mock_debootstrap, mock_release):
+        # should not use the cache if the state of mirror is unknown
+        mock_release.side_effect = errors.HttpUrlConnectionError
+        bu.run_debootstrap_cached('uri', 'suite', 'chroot', 'arch',
+                                  attempts=2, cache_dir='/cache')
+        mock_debootstrap.assert_called_once_with(
+            uri='uri', suite='suite', chroot='chroot', arch='arch',
+            eatmydata=False, attempts=2)
+        self.assertFalse(mock_exec.called)
+
+    @mock.patch.object(bu, 'get_release_file')
+    @mock.patch.object(bu, 'run_debootstrap')
+    @mock.patch.object(utils, 'execute')
+    def test_run_debootstrap_cached_disabled(self, mock_exec,
+                                             mock_debootstrap, mock_release):
+        # options are read when the function is called, not imported
+        self.useFixture(config_fixture.Config()).config(
+            debootstrap_cache_dir='', fetch_packages_attempts=3)
+        bu.run_debootstrap_cached('uri', 'suite', 'chroot', 'arch')
+        mock_debootstrap.assert_called_once_with(
+            uri='uri', suite='suite', chroot='chroot', arch='arch',
+            eatmydata=False, attempts=3)
+        self.assertFalse(mock_exec.called)
+        self.assertFalse(mock_release.called)
+
     @mock.patch.object(utils, 'execute', return_value=(None, None))
     def test_run_apt_get(self, mock_exec):
         bu.run_apt_get('chroot', ['package1', 'package2'], attempts=2)
@@ -469,21 +568,48 @@ class BuildUtilsTestCase(testtools.TestCase):
                       CONF.force_ipv4_file)]
         self.assertEqual(expected_join_calls, mock_path.join.call_args_list)
 
-    @mock.patch('gzip.open')
+    def test_gzip_compress(self):
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        data = os.urandom(1000) + 'a' * 10000
+        src = os.path.join(tmp_dir, 'file')
+        with open(src, 'wb') as f:
+            f.write(data)
+        for threads in (1, 3):
+            dst = os.path.join(tmp_dir, 'file.%s.gz' % threads)
+            bu.gzip_compress(src, dst, chunk_size=1024, threads=threads)
+            g = gzip.open(dst, 'rb')
+            self.assertEqual(data, g.read())
+            g.close()
+
+    def test_gzip_compress_empty(self):
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        src = os.path.join(tmp_dir, 'file')
+        open(src, 'wb').close()
+        bu.gzip_compress(src, src + '.gz', chunk_size=1)
+        g = gzip.open(src + '.gz', 'rb')
+        self.assertEqual('', g.read())
+        g.close()
+
+    @mock.patch.object(bu, 'gzip_compress')
     @mock.patch.object(os, 'remove')
     def test_containerize_gzip(self, mock_remove, mock_gzip):
-        with mock.patch('six.moves.builtins.open', create=True) as mock_open:
-            file_handle_mock = mock_open.return_value.__enter__.return_value
-            file_handle_mock.read.side_effect = ['test data', '']
-            g = mock.Mock()
-            mock_gzip.return_value = g
-            self.assertEqual('file.gz', bu.containerize('file', 'gzip', 1))
-            g.write.assert_called_once_with('test data')
-            expected_calls = [mock.call(1), mock.call(1)]
-            self.assertEqual(expected_calls,
-                             file_handle_mock.read.call_args_list)
+        self.assertEqual('file.gz', bu.containerize('file', 'gzip', 1))
+        mock_gzip.assert_called_once_with('file', 'file.gz', chunk_size=1)
         mock_remove.assert_called_once_with('file')
 
+    @mock.patch.object(bu, 'ThreadPool')
+    def test_gzip_compress_options(self, mock_pool):
+        # options are read when the function is called, not imported
+        self.useFixture(config_fixture.Config()).config(compress_threads=3)
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        src = os.path.join(tmp_dir, 'file')
+        open(src, 'wb').close()
+        bu.gzip_compress(src, src + '.gz', chunk_size=1)
+        mock_pool.assert_called_once_with(3)
+
     def test_containerize_bad_container(self):
         self.assertRaises(errors.WrongImageDataError, bu.containerize, 'file',
                           'fake')
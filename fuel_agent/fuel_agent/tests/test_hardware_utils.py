@@ -21,6 +21,11 @@ from fuel_agent.utils import utils
 
 class TestHardwareUtils(test_base.BaseTestCase):
 
+    def setUp(self):
+        super(TestHardwareUtils, self).setUp()
+        hu.invalidate_block_devices_cache()
+        self.addCleanup(hu.invalidate_block_devices_cache)
+
     @mock.patch.object(utils, 'execute')
     def test_parse_dmidecode(self, exec_mock):
         exec_mock.return_value = ["""
@@ -341,19 +346,21 @@ E: UDEV_LOG=3""", '')
         self.assertEqual(['/dev/sda', '/dev/nvme0n1', '/dev/sda1'],
                          hu.get_block_devices_from_udev_db())
 
-    @mock.patch.object(hu, 'get_block_devices_from_udev_db')
+    @mock.patch.object(hu, 'udevdbreport')
     @mock.patch.object(hu, 'is_disk')
     @mock.patch.object(hu, 'extrareport')
+    @mock.patch.object(hu, 'sysfsreport')
     @mock.patch.object(hu, 'blockdevreport')
-    @mock.patch.object(hu, 'udevreport')
-    def test_list_block_devices(self, mock_ureport, mock_breport, mock_ereport,
-                                mock_isdisk, mock_get_devs):
-        # should run blockdev --report command
-        # in order to get a list of block devices
-        # should call report methods to get device info
+    def test_list_block_devices(self, mock_breport, mock_sreport,
+                                mock_ereport, mock_isdisk, mock_udevdb):
+        # should read udev database and sysfs once
+        # in order to get a list of block devices with their info
         # should call is_disk method to filter out
         # those block devices which are not disks
-        mock_get_devs.return_value = ['/dev/fake', '/dev/fake1', '/dev/sr0']
+        mock_udevdb.return_value = [
+            ('/dev/fake', {'DEVPATH': '/block/fake'}),
+            ('/dev/fake1', {'DEVPATH': '/block/fake/fake1'}),
+            ('/dev/sr0', {'DEVPATH': '/block/sr0'})]
 
         def isdisk_side_effect(arg, uspec=None, bspec=None):
             if arg == '/dev/fake':
@@ -361,62 +368,157 @@ E: UDEV_LOG=3""", '')
             elif arg in ('/dev/fake1', '/dev/sr0'):
                 return False
         mock_isdisk.side_effect = isdisk_side_effect
-        mock_ureport.return_value = {'key0': 'value0'}
-        mock_breport.return_value = {'key1': 'value1'}
+        mock_sreport.return_value = {'key1': 'value1'}
         mock_ereport.return_value = {'key2': 'value2'}
 
         expected = [{
             'device': '/dev/fake',
-            'uspec': {'key0': 'value0'},
+            'uspec': {'DEVPATH': '/block/fake'},
             'bspec': {'key1': 'value1'},
             'espec': {'key2': 'value2'}
         }]
         self.assertEqual(hu.list_block_devices(), expected)
-        self.assertEqual(mock_ureport.call_args_list, [mock.call('/dev/fake'),
-                         mock.call('/dev/fake1'), mock.call('/dev/sr0')])
-        self.assertEqual(mock_breport.call_args_list, [mock.call('/dev/fake'),
-                         mock.call('/dev/fake1'), mock.call('/dev/sr0')])
+        self.assertEqual(mock_sreport.call_args_list,
+                         [mock.call('/block/fake'),
+                          mock.call('/block/fake/fake1'),
+                          mock.call('/block/sr0')])
         self.assertEqual(mock_ereport.call_args_list, [mock.call('/dev/fake'),
                          mock.call('/dev/fake1'), mock.call('/dev/sr0')])
+        self.assertFalse(mock_breport.called)
+
+        # should use discovered devices until they are invalidated
+        self.assertEqual(3, len(hu.list_block_devices(disks=False)))
+        self.assertEqual(1, mock_udevdb.call_count)
+        hu.invalidate_block_devices_cache()
+        hu.list_block_devices()
+        self.assertEqual(2, mock_udevdb.call_count)
 
-    @mock.patch.object(hu, 'get_block_devices_from_udev_db')
+    @mock.patch.object(hu, 'udevdbreport')
     @mock.patch.object(hu, 'is_disk')
     @mock.patch.object(hu, 'extrareport')
+    @mock.patch.object(hu, 'sysfsreport')
     @mock.patch.object(hu, 'blockdevreport')
-    @mock.patch.object(hu, 'udevreport')
-    def test_list_block_devices_removable_vendors(self, mock_ureport,
-                                                  mock_breport, mock_ereport,
-                                                  mock_isdisk, mock_get_devs):
-        mock_get_devs.return_value = ['/dev/no_vendor_id',
-                                      '/dev/wrong_vendor_id',
-                                      '/dev/right_vendor_id']
+    def test_list_block_devices_sysfs_fallback(self, mock_breport,
+                                               mock_sreport, mock_ereport,
+                                               mock_isdisk, mock_udevdb):
+        mock_udevdb.return_value = [('/dev/fake', {'DEVPATH': '/block/fake'}),
+                                    ('/dev/fake1', {})]
         mock_isdisk.return_value = True
-        mock_ureport.side_effect = [
-            {},
-            {'ID_VENDOR': 'Cisco'},
-            {'ID_VENDOR': 'IBM'},
+        mock_sreport.side_effect = IOError()
+        mock_breport.return_value = {'key1': 'value1'}
+        mock_ereport.return_value = {}
+        self.assertEqual(
+            [{'key1': 'value1'}] * 2,
+            [bdev['bspec'] for bdev in hu.list_block_devices()])
+        self.assertEqual(mock_breport.call_args_list,
+                         [mock.call('/dev/fake'), mock.call('/dev/fake1')])
+
+    @mock.patch.object(hu, 'udevdbreport')
+    @mock.patch.object(hu, 'is_disk')
+    @mock.patch.object(hu, 'extrareport')
+    @mock.patch.object(hu, 'sysfsreport')
+    def test_list_block_devices_removable_vendors(self, mock_sreport,
+                                                  mock_ereport, mock_isdisk,
+                                                  mock_udevdb):
+        mock_udevdb.return_value = [
+            ('/dev/no_vendor_id', {'DEVPATH': '/block/no_vendor_id'}),
+            ('/dev/wrong_vendor_id', {'ID_VENDOR': 'Cisco',
+                                      'DEVPATH': '/block/wrong_vendor_id'}),
+            ('/dev/right_vendor_id', {'ID_VENDOR': 'IBM',
+                                      'DEVPATH': '/block/right_vendor_id'}),
         ]
+        mock_isdisk.return_value = True
         mock_ereport.return_value = {'removable': '1'}
-        mock_breport.return_value = {'key1': 'value1'}
+        mock_sreport.return_value = {'key1': 'value1'}
         expected = [{
             'device': '/dev/right_vendor_id',
-            'uspec': {'ID_VENDOR': 'IBM'},
+            'uspec': {'ID_VENDOR': 'IBM', 'DEVPATH': '/block/right_vendor_id'},
             'bspec': {'key1': 'value1'},
             'espec': {'removable': '1'}
         }]
         self.assertEqual(hu.list_block_devices(), expected)
-        self.assertEqual(
-            mock_ureport.call_args_list,
-            [mock.call('/dev/no_vendor_id'),
-             mock.call('/dev/wrong_vendor_id'),
-             mock.call('/dev/right_vendor_id')])
-        mock_breport.assert_called_once_with('/dev/right_vendor_id')
+        mock_sreport.assert_called_once_with('/block/right_vendor_id')
         self.assertEqual(
             mock_ereport.call_args_list,
             [mock.call('/dev/no_vendor_id'),
              mock.call('/dev/wrong_vendor_id'),
              mock.call('/dev/right_vendor_id')])
 
+    @mock.patch('os.path.isdir')
+    @mock.patch('six.moves.builtins.open')
+    def test_sysfsreport(self, mock_open, mock_isdir):
+        sysfs = {
+            '/sys/block/sda/sda1/size': '2048',
+            '/sys/block/sda/sda1/ro': '0',
+            '/sys/block/sda/sda1/alignment_offset': '0',
+            '/sys/block/sda/queue/logical_block_size': '512',
+            '/sys/block/sda/queue/physical_block_size': '4096',
+            '/sys/block/sda/queue/minimum_io_size': '4096',
+            '/sys/block/sda/queue/optimal_io_size': '0',
+            '/sys/block/sda/queue/read_ahead_kb': '128',
+            '/sys/block/sda/queue/max_sectors_kb': '512',
+        }
+        mock_isdir.return_value = False
+
+        def open_side_effect(path):
+            f = mock.MagicMock()
+            f.__enter__.return_value.read.return_value = sysfs[path] + '\n'
+            return f
+        mock_open.side_effect = open_side_effect
+        expected = {
+            'sz': '2048',
+            'ro': '0',
+            'ss': '512',
+            'pbsz': '4096',
+            'size64': '1048576',
+            'iomin': '4096',
+            'ioopt': '0',
+            'ra': '256',
+            'alignoff': '0',
+            'maxsect': '1024',
+        }
+        self.assertEqual(expected, hu.sysfsreport('/block/sda/sda1'))
+        mock_isdir.assert_called_once_with('/sys/block/sda/sda1/queue')
+
+    @mock.patch('fuel_agent.utils.hardware.utils.execute')
+    def test_udevdbreport(self, mock_exec):
+        mock_exec.return_value = ("""P: /devices/virtual/block/loop0
+N: loop0
+E: DEVNAME=/dev/loop0
+E: DEVTYPE=disk
+E: MAJOR=7
+E: SUBSYSTEM=block
+
+P: /devices/pci0000:00/0000:00:1f.2/ata1/host0/target0:0:0/0:0:0:0/block/sda
+N: sda
+S: disk/by-id/wwn-0x5000c5004008ac0f
+E: DEVLINKS=/dev/disk/by-id/wwn-0x5000c5004008ac0f /dev/disk/by-path/pci-0
+E: DEVNAME=/dev/sda
+E: DEVPATH=/devices/pci0000:00/0000:00:1f.2/block/sda
+E: DEVTYPE=disk
+E: ID_ATA=1
+E: ID_MODEL=TOSHIBA_MK1002TS
+E: MAJOR=8
+E: MINOR=0
+E: SUBSYSTEM=block
+
+P: /devices/pci0000:00/0000:00:1c.1/target16:0:0/16:0:0:0/block/sr0
+E: DEVTYPE=disk
+E: DEVNAME=/dev/sr0
+E: MAJOR=11
+E: SUBSYSTEM=block""", '')
+        self.assertEqual(
+            [('/dev/sda', {
+                'DEVLINKS': ['/dev/disk/by-id/wwn-0x5000c5004008ac0f',
+                             '/dev/disk/by-path/pci-0'],
+                'DEVNAME': '/dev/sda',
+                'DEVPATH': '/devices/pci0000:00/0000:00:1f.2/block/sda',
+                'DEVTYPE': 'disk',
+                'ID_MODEL': 'TOSHIBA_MK1002TS',
+                'MAJOR': '8',
+                'MINOR': '0'})],
+            hu.udevdbreport())
+
     def test_match_device_devlinks(self):
         # should return true if at least one by-id link from first uspec
         # matches by-id link from another uspec
@@ -16,6 +16,7 @@ import mock
 from oslotest import base as test_base
 
 from fuel_agent import errors
+from fuel_agent import objects
 from fuel_agent.utils import lvm as lu
 from fuel_agent.utils import utils
 
@@ -398,3 +399,167 @@ class TestLvmUtils(test_base.BaseTestCase):
                                        {'vg': None, 'name': '/dev/fake2'}]
         self.assertRaises(errors.PVNotFoundError, lu.vgreduce, 'vgname',
                           '/dev/fake1', '/dev/fake2')
+
+    @mock.patch.object(lu, 'pvdisplay')
+    @mock.patch.object(utils, 'execute')
+    def test_pvcreate_many_ok(self, mock_exec, mock_pvdisplay):
+        mock_pvdisplay.return_value = [{'name': '/dev/another'}]
+        lu.pvcreate_many(['/dev/fake1', '/dev/fake2'], metadatasize=32)
+        mock_exec.assert_called_once_with(
+            'pvcreate', '--metadatacopies', '2', '--metadatasize', '32m',
+            '/dev/fake1', '/dev/fake2', check_exit_code=[0])
+
+    @mock.patch.object(lu, 'pvdisplay')
+    @mock.patch.object(utils, 'execute')
+    def test_pvcreate_many_duplicate(self, mock_exec, mock_pvdisplay):
+        mock_pvdisplay.return_value = [{'name': '/dev/fake2'}]
+        self.assertRaises(errors.PVAlreadyExistsError, lu.pvcreate_many,
+                          ['/dev/fake1', '/dev/fake2'])
+        self.assertFalse(mock_exec.called)
+
+    @mock.patch.object(lu, 'pvdisplay')
+    @mock.patch.object(utils, 'execute')
+    def test_pvremove_many_ok(self, mock_exec, mock_pvdisplay):
+        mock_pvdisplay.return_value = [{'vg': None, 'name': '/dev/fake1'},
+                                       {'vg': None, 'name': '/dev/fake2'}]
+        lu.pvremove_many(['/dev/fake1', '/dev/fake2'])
+        mock_exec.assert_called_once_with(
+            'pvremove', '-ff', '-y', '/dev/fake1', '/dev/fake2',
+            check_exit_code=[0])
+
+    @mock.patch.object(lu, 'pvdisplay')
+    def test_pvremove_many_attached_to_vg(self, mock_pvdisplay):
+        mock_pvdisplay.return_value = [{'vg': None, 'name': '/dev/fake1'},
+                                       {'vg': 'some', 'name': '/dev/fake2'}]
+        self.assertRaises(errors.PVBelongsToVGError, lu.pvremove_many,
+                          ['/dev/fake1', '/dev/fake2'])
+
+    @mock.patch.object(lu, 'vgdisplay')
+    @mock.patch.object(utils, 'execute')
+    def test_vgremove_many_ok(self, mock_exec, mock_vgdisplay):
+        mock_vgdisplay.return_value = [{'name': 'vg1'}, {'name': 'vg2'}]
+        lu.vgremove_many(['vg1', 'vg2'])
+        mock_exec.assert_called_once_with('vgremove', '-f', 'vg1', 'vg2',
+                                          check_exit_code=[0])
+
+    @mock.patch.object(lu, 'vgdisplay')
+    def test_vgremove_many_not_found(self, mock_vgdisplay):
+        mock_vgdisplay.return_value = [{'name': 'vg1'}]
+        self.assertRaises(errors.VGNotFoundError, lu.vgremove_many,
+                          ['vg1', 'vg2'])
+
+    @mock.patch.object(lu, 'lvdisplay')
+    @mock.patch.object(utils, 'execute')
+    def test_lvremove_many_ok(self, mock_exec, mock_lvdisplay):
+        mock_lvdisplay.return_value = [{'path': '/dev/vg/lv'},
+                                       {'path': '/dev/vg2/lv2'}]
+        lu.lvremove_many(['/dev/vg/lv', '/dev/vg2/lv2'])
+        mock_exec.assert_called_once_with(
+            'lvremove', '-f', '/dev/vg/lv', '/dev/vg2/lv2',
+            check_exit_code=[0])
+
+    @mock.patch.object(lu, 'lvdisplay')
+    def test_lvremove_many_not_found(self, mock_lvdisplay):
+        mock_lvdisplay.return_value = [{'path': '/dev/vg/lv'}]
+        self.assertRaises(errors.LVNotFoundError, lu.lvremove_many,
+                          ['/dev/vg/lv', '/dev/vg/lv2'])
+
+    @mock.patch.object(lu, 'lvdisplay')
+    @mock.patch.object(lu, 'vgdisplay')
+    @mock.patch.object(lu, 'pvdisplay')
+    @mock.patch.object(utils, 'execute')
+    def test_remove_all(self, mock_exec, mock_pvdisplay, mock_vgdisplay,
+                        mock_lvdisplay):
+        # should run a single command for every kind of volumes
+        mock_lvdisplay.return_value = [{'path': '/dev/vg/lv'},
+                                       {'path': '/dev/vg/lv2'}]
+        mock_vgdisplay.return_value = [{'name': 'vg'}, {'name': 'vg2'}]
+        mock_pvdisplay.return_value = [{'vg': None, 'name': '/dev/fake1'},
+                                       {'vg': None, 'name': '/dev/fake2'}]
+        lu.lvremove_all()
+        lu.vgremove_all()
+        lu.pvremove_all()
+        expected_calls = [
+            mock.call('lvremove', '-f', '/dev/vg/lv', '/dev/vg/lv2',
+                      check_exit_code=[0]),
+            mock.call('vgremove', '-f', 'vg', 'vg2', check_exit_code=[0]),
+            mock.call('pvremove', '-ff', '-y', '/dev/fake1', '/dev/fake2',
+                      check_exit_code=[0]),
+        ]
+        self.assertEqual(mock_exec.call_args_list, expected_calls)
+        for mock_display in (mock_lvdisplay, mock_vgdisplay, mock_pvdisplay):
+            mock_display.assert_called_once_with()
+
+    @mock.patch.object(lu, 'lvdisplay')
+    @mock.patch.object(lu, 'vgdisplay')
+    @mock.patch.object(lu, 'pvdisplay')
+    @mock.patch.object(utils, 'execute')
+    def test_remove_all_nothing_found(self, mock_exec, mock_pvdisplay,
+                                      mock_vgdisplay, mock_lvdisplay):
+        mock_lvdisplay.return_value = []
+        mock_vgdisplay.return_value = []
+        mock_pvdisplay.return_value = []
+        lu.lvremove_all()
+        lu.vgremove_all()
+        lu.pvremove_all()
+        self.assertFalse(mock_exec.called)
+
+    @mock.patch.object(lu, 'pvdisplay')
+    @mock.patch.object(utils, 'execute')
+    def test_pvremove_all_attached_to_vg(self, mock_exec, mock_pvdisplay):
+        mock_pvdisplay.return_value = [{'vg': 'some', 'name': '/dev/fake1'}]
+        self.assertRaises(errors.PVBelongsToVGError, lu.pvremove_all)
+        self.assertFalse(mock_exec.called)
+
+    def test_group_pvs(self):
+        pvs = [objects.Pv('/dev/fake1'),
+               objects.Pv('/dev/fake2', metadatasize=28),
+               objects.Pv('/dev/fake3')]
+        self.assertEqual([(16, 2, ['/dev/fake1', '/dev/fake3']),
+                          (28, 2, ['/dev/fake2'])],
+                         lu.group_pvs(pvs))
+
+    @mock.patch.object(utils, 'execute')
+    def test_plan_remove_all(self, mock_exec):
+        # should not run anything, just return commands
+        current_pvs = [{'vg': 'old', 'name': '/dev/fake1'},
+                       {'vg': None, 'name': '/dev/fake4'}]
+        current_vgs = [{'name': 'old'}]
+        current_lvs = [{'path': '/dev/old/lv'}]
+        expected = [
+            ['lvremove', '-f', '/dev/old/lv'],
+            ['vgremove', '-f', 'old'],
+            ['pvremove', '-ff', '-y', '/dev/fake1', '/dev/fake4'],
+        ]
+        self.assertEqual(expected, lu.plan_remove_all(
+            pvs=current_pvs, vgs=current_vgs, lvs=current_lvs))
+        self.assertFalse(mock_exec.called)
+
+    @mock.patch.object(lu, 'lvdisplay', return_value=[])
+    @mock.patch.object(lu, 'vgdisplay', return_value=[])
+    @mock.patch.object(lu, 'pvdisplay', return_value=[])
+    def test_plan_remove_all_clean_node(self, mock_pvdisplay, mock_vgdisplay,
+                                        mock_lvdisplay):
+        # should not plan removal if there is nothing to remove
+        self.assertEqual([], lu.plan_remove_all())
+
+    @mock.patch.object(utils, 'execute')
+    def test_plan_create(self, mock_exec):
+        scheme = objects.PartitionScheme()
+        scheme.vg_attach_by_name('/dev/fake1', 'os', metadatasize=28)
+        scheme.vg_attach_by_name('/dev/fake2', 'image')
+        scheme.vg_attach_by_name('/dev/fake3', 'image')
+        scheme.add_lv(name='root', vgname='os', size=1000)
+        scheme.add_lv(name='glance', vgname='image', size=2000)
+        expected = [
+            ['pvcreate', '--metadatacopies', '2', '--metadatasize', '28m',
+             '/dev/fake1'],
+            ['pvcreate', '--metadatacopies', '2', '--metadatasize', '16m',
+             '/dev/fake2', '/dev/fake3'],
+            ['vgcreate', 'os', '/dev/fake1'],
+            ['vgcreate', 'image', '/dev/fake2', '/dev/fake3'],
+            ['lvcreate', '--yes', '-L', '1000m', '-n', 'root', 'os'],
+            ['lvcreate', '--yes', '-L', '2000m', '-n', 'glance', 'image'],
+        ]
+        self.assertEqual(expected, lu.plan_create(scheme))
+        self.assertFalse(mock_exec.called)
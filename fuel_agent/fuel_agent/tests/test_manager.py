@@ -12,11 +12,13 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import hashlib
 import mock
 import os
 import signal
 
 from oslo.config import cfg
+from oslo.config import fixture as config_fixture
 from oslotest import base as test_base
 
 from fuel_agent import errors
@@ -45,6 +47,7 @@ class TestManager(test_base.BaseTestCase):
         mock_lbd.return_value = test_nailgun.LIST_BLOCK_DEVICES_SAMPLE
         self.mgr = manager.Manager(test_nailgun.PROVISION_SAMPLE_DATA)
 
+    @mock.patch.object(utils, 'zero_out')
     @mock.patch('six.moves.builtins.open')
     @mock.patch.object(os, 'symlink')
     @mock.patch.object(os, 'remove')
@@ -58,7 +61,7 @@ class TestManager(test_base.BaseTestCase):
     @mock.patch.object(fu, 'make_fs')
     @mock.patch.object(lu, 'lvcreate')
     @mock.patch.object(lu, 'vgcreate')
-    @mock.patch.object(lu, 'pvcreate')
+    @mock.patch.object(lu, 'pvcreate_many')
     @mock.patch.object(mu, 'mdcreate')
     @mock.patch.object(pu, 'set_gpt_type')
     @mock.patch.object(pu, 'set_partition_flag')
@@ -70,48 +73,58 @@ class TestManager(test_base.BaseTestCase):
                              mock_lu_v, mock_lu_l, mock_fu_mf, mock_pvr,
                              mock_vgr, mock_lvr, mock_mdr, mock_exec,
                              mock_os_ld, mock_os_p, mock_os_r, mock_os_s,
-                             mock_open):
+                             mock_open, mock_zero_out):
+        # NOTE: disks are partitioned one by one here in order
+        # to check the order of calls
+        self.useFixture(config_fixture.Config()).config(
+            partitioning_threads=1)
         mock_os_ld.return_value = ['not_a_rule', 'fake.rules']
         mock_os_p.exists.return_value = True
         mock_hu_lbd.return_value = test_nailgun.LIST_BLOCK_DEVICES_SAMPLE
         self.mgr.do_partitioning()
-        mock_pu_ml_expected_calls = [mock.call('/dev/sda', 'gpt'),
-                                     mock.call('/dev/sdb', 'gpt'),
-                                     mock.call('/dev/sdc', 'gpt')]
+        self.assertEqual(mock_zero_out.call_args_list[:2],
+                         [mock.call('/dev/sda', 0, 5),
+                          mock.call('/dev/sda', 22, 5, ignore_end=True)])
+        self.assertEqual(26, mock_zero_out.call_count)
+
+        mock_pu_ml_expected_calls = [
+            mock.call('/dev/sda', 'gpt', settle=False),
+            mock.call('/dev/sdb', 'gpt', settle=False),
+            mock.call('/dev/sdc', 'gpt', settle=False)]
         self.assertEqual(mock_pu_ml_expected_calls, mock_pu_ml.call_args_list)
 
         mock_pu_mp_expected_calls = [
-            mock.call('/dev/sda', 1, 25, 'primary'),
-            mock.call('/dev/sda', 25, 225, 'primary'),
-            mock.call('/dev/sda', 225, 425, 'primary'),
-            mock.call('/dev/sda', 425, 625, 'primary'),
-            mock.call('/dev/sda', 625, 20063, 'primary'),
-            mock.call('/dev/sda', 20063, 65660, 'primary'),
-            mock.call('/dev/sda', 65660, 65680, 'primary'),
-            mock.call('/dev/sdb', 1, 25, 'primary'),
-            mock.call('/dev/sdb', 25, 225, 'primary'),
-            mock.call('/dev/sdb', 225, 65196, 'primary'),
-            mock.call('/dev/sdc', 1, 25, 'primary'),
-            mock.call('/dev/sdc', 25, 225, 'primary'),
-            mock.call('/dev/sdc', 225, 65196, 'primary')]
+            mock.call('/dev/sda', 1, 25, 'primary', settle=False),
+            mock.call('/dev/sda', 25, 225, 'primary', settle=False),
+            mock.call('/dev/sda', 225, 425, 'primary', settle=False),
+            mock.call('/dev/sda', 425, 625, 'primary', settle=False),
+            mock.call('/dev/sda', 625, 20063, 'primary', settle=False),
+            mock.call('/dev/sda', 20063, 65660, 'primary', settle=False),
+            mock.call('/dev/sda', 65660, 65680, 'primary', settle=False),
+            mock.call('/dev/sdb', 1, 25, 'primary', settle=False),
+            mock.call('/dev/sdb', 25, 225, 'primary', settle=False),
+            mock.call('/dev/sdb', 225, 65196, 'primary', settle=False),
+            mock.call('/dev/sdc', 1, 25, 'primary', settle=False),
+            mock.call('/dev/sdc', 25, 225, 'primary', settle=False),
+            mock.call('/dev/sdc', 225, 65196, 'primary', settle=False)]
         self.assertEqual(mock_pu_mp_expected_calls, mock_pu_mp.call_args_list)
 
-        mock_pu_spf_expected_calls = [mock.call('/dev/sda', 1, 'bios_grub'),
-                                      mock.call('/dev/sdb', 1, 'bios_grub'),
-                                      mock.call('/dev/sdc', 1, 'bios_grub')]
+        mock_pu_spf_expected_calls = [
+            mock.call('/dev/sda', 1, 'bios_grub', settle=False),
+            mock.call('/dev/sdb', 1, 'bios_grub', settle=False),
+            mock.call('/dev/sdc', 1, 'bios_grub', settle=False)]
         self.assertEqual(mock_pu_spf_expected_calls,
                          mock_pu_spf.call_args_list)
 
-        mock_pu_sgt_expected_calls = [mock.call('/dev/sda', 4, 'fake_guid')]
+        mock_pu_sgt_expected_calls = [
+            mock.call('/dev/sda', 4, 'fake_guid', settle=False)]
         self.assertEqual(mock_pu_sgt_expected_calls,
                          mock_pu_sgt.call_args_list)
 
-        mock_lu_p_expected_calls = [
-            mock.call('/dev/sda5', metadatasize=28, metadatacopies=2),
-            mock.call('/dev/sda6', metadatasize=28, metadatacopies=2),
-            mock.call('/dev/sdb3', metadatasize=28, metadatacopies=2),
-            mock.call('/dev/sdc3', metadatasize=28, metadatacopies=2)]
-        self.assertEqual(mock_lu_p_expected_calls, mock_lu_p.call_args_list)
+        # all pvs have the same metadata options, so they are created at once
+        mock_lu_p.assert_called_once_with(
+            ['/dev/sda5', '/dev/sda6', '/dev/sdb3', '/dev/sdc3'],
+            metadatasize=28, metadatacopies=2)
 
         mock_lu_v_expected_calls = [mock.call('os', '/dev/sda5'),
                                     mock.call('image', '/dev/sda6',
@@ -130,6 +143,28 @@ class TestManager(test_base.BaseTestCase):
             mock.call('xfs', '', '', '/dev/mapper/image-glance')]
         self.assertEqual(mock_fu_mf_expected_calls, mock_fu_mf.call_args_list)
 
+    @mock.patch.object(lu, 'lvdisplay', return_value=[])
+    @mock.patch.object(lu, 'vgdisplay', return_value=[])
+    @mock.patch.object(lu, 'pvdisplay')
+    @mock.patch.object(mu, 'mddisplay', return_value=[])
+    @mock.patch.object(utils, 'execute')
+    def test_do_partitioning_plan(self, mock_exec, mock_mddisplay,
+                                  mock_pvdisplay, mock_vgdisplay,
+                                  mock_lvdisplay):
+        mock_pvdisplay.return_value = [{'name': '/dev/sda5', 'vg': None}]
+        expected = [
+            ['pvremove', '-ff', '-y', '/dev/sda5'],
+            ['pvcreate', '--metadatacopies', '2', '--metadatasize', '28m',
+             '/dev/sda5', '/dev/sda6', '/dev/sdb3', '/dev/sdc3'],
+            ['vgcreate', 'os', '/dev/sda5'],
+            ['vgcreate', 'image', '/dev/sda6', '/dev/sdb3', '/dev/sdc3'],
+            ['lvcreate', '--yes', '-L', '15360m', '-n', 'root', 'os'],
+            ['lvcreate', '--yes', '-L', '4014m', '-n', 'swap', 'os'],
+            ['lvcreate', '--yes', '-L', '175347m', '-n', 'glance', 'image'],
+        ]
+        self.assertEqual(expected, self.mgr.do_partitioning_plan())
+        self.assertFalse(mock_exec.called)
+
     @mock.patch.object(utils, 'calculate_md5')
     @mock.patch('os.path.getsize')
     @mock.patch('yaml.load')
@@ -202,6 +237,7 @@ class TestManager(test_base.BaseTestCase):
         self.assertRaises(errors.WrongPartitionSchemeError,
                           self.mgr.do_configdrive)
 
+    @mock.patch.object(au, 'Md5Stream')
     @mock.patch.object(utils, 'calculate_md5')
     @mock.patch('os.path.getsize')
     @mock.patch('yaml.load')
@@ -216,7 +252,8 @@ class TestManager(test_base.BaseTestCase):
     @mock.patch.object(hu, 'list_block_devices')
     def test_do_copyimage(self, mock_lbd, mock_u_ras, mock_u_e, mock_au_c,
                           mock_au_h, mock_au_l, mock_au_g, mock_fu_ef,
-                          mock_http_req, mock_yaml, mock_get_size, mock_md5):
+                          mock_http_req, mock_yaml, mock_get_size, mock_md5,
+                          mock_au_md5):
 
         class FakeChain(object):
             processors = []
@@ -227,6 +264,9 @@ class TestManager(test_base.BaseTestCase):
             def process(self):
                 pass
 
+        mock_get_size.return_value = 123
+        mock_md5.return_value = 'fakemd5'
+        mock_au_md5.return_value.hexdigest.return_value = 'fakemd5'
         mock_lbd.return_value = test_nailgun.LIST_BLOCK_DEVICES_SAMPLE
         mock_au_c.return_value = FakeChain()
         self.mgr.do_configdrive()
@@ -244,10 +284,12 @@ class TestManager(test_base.BaseTestCase):
         expected_processors_list += [
             imgs[-1].uri,
             au.LocalFile,
+            mock_au_md5.return_value,
             imgs[-1].target_device
         ]
         self.assertEqual(expected_processors_list,
                          mock_au_c.return_value.processors)
+        self.assertEqual([mock.call(123)], mock_au_md5.call_args_list)
         mock_fu_ef_expected_calls = [
             mock.call('ext4', '/dev/mapper/os-root')]
         self.assertEqual(mock_fu_ef_expected_calls, mock_fu_ef.call_args_list)
@@ -270,26 +312,29 @@ class TestManager(test_base.BaseTestCase):
                                       mock_yaml, mock_get_size, mock_md5):
 
         class FakeChain(object):
-            processors = []
+            def __init__(self):
+                self.processors = []
 
             def append(self, thing):
                 self.processors.append(thing)
 
             def process(self):
-                pass
+                for processor in self.processors:
+                    if isinstance(processor, au.Md5Stream):
+                        list(processor(['fake_data']))
 
         mock_get_size.return_value = 123
-        mock_md5.side_effect = ['fakemd5', 'really_fakemd5', 'fakemd5']
+        mock_md5.return_value = hashlib.md5('fake_data').hexdigest()
         mock_lbd.return_value = test_nailgun.LIST_BLOCK_DEVICES_SAMPLE
-        mock_au_c.return_value = FakeChain()
+        mock_au_c.side_effect = FakeChain
         self.mgr.driver.image_scheme.images[0].size = 1234
-        self.mgr.driver.image_scheme.images[0].md5 = 'really_fakemd5'
+        self.mgr.driver.image_scheme.images[0].md5 = \
+            hashlib.md5('fake_data').hexdigest()
         self.mgr.do_configdrive()
         self.assertEqual(2, len(self.mgr.driver.image_scheme.images))
         self.mgr.do_copyimage()
-        expected_md5_calls = [mock.call('/tmp/config-drive.img', 123),
-                              mock.call('/dev/mapper/os-root', 1234),
-                              mock.call('/dev/sda7', 123)]
+        # NOTE: written images are not read back to verify them
+        expected_md5_calls = [mock.call('/tmp/config-drive.img', 123)]
         self.assertEqual(expected_md5_calls, mock_md5.call_args_list)
 
     @mock.patch.object(utils, 'calculate_md5')
@@ -310,18 +355,21 @@ class TestManager(test_base.BaseTestCase):
                                        mock_yaml, mock_get_size, mock_md5):
 
         class FakeChain(object):
-            processors = []
+            def __init__(self):
+                self.processors = []
 
             def append(self, thing):
                 self.processors.append(thing)
 
             def process(self):
-                pass
+                for processor in self.processors:
+                    if isinstance(processor, au.Md5Stream):
+                        list(processor(['fake_data']))
 
         mock_get_size.return_value = 123
-        mock_md5.side_effect = ['fakemd5', 'really_fakemd5', 'fakemd5']
+        mock_md5.return_value = hashlib.md5('fake_data').hexdigest()
         mock_lbd.return_value = test_nailgun.LIST_BLOCK_DEVICES_SAMPLE
-        mock_au_c.return_value = FakeChain()
+        mock_au_c.side_effect = FakeChain
         self.mgr.driver.image_scheme.images[0].size = 1234
         self.mgr.driver.image_scheme.images[0].md5 = 'fakemd5'
         self.mgr.do_configdrive()
@@ -407,7 +455,7 @@ class TestManager(test_base.BaseTestCase):
             '/tmp/imgdir', treat_mtab=False, pseudo=False)
         self.assertEqual([mock.call('/tmp/imgdir')] * 2,
                          mock_bu.suppress_services_start.call_args_list)
-        mock_bu.run_debootstrap.assert_called_once_with(
+        mock_bu.run_debootstrap_cached.assert_called_once_with(
             uri='http://fakeubuntu', suite='trusty', chroot='/tmp/imgdir')
         mock_bu.set_apt_get_env.assert_called_once_with()
         mock_bu.pre_apt_get.assert_called_once_with('/tmp/imgdir')
@@ -529,4 +577,84 @@ class TestManager(test_base.BaseTestCase):
                 'format': self.mgr.driver.image_scheme.images[1].format
             }
         ]
+        metadata['build_hash'] = self.mgr._get_image_build_hash()
         mock_yaml_dump.assert_called_once_with(metadata, stream=mock_open())
+
+    def _prepare_build_image(self):
+        loop = objects.Loop()
+        self.mgr.driver.image_scheme = objects.ImageScheme([
+            objects.Image('file:///fake/img.img.gz', loop, 'ext4', 'gzip')])
+        self.mgr.driver.partition_scheme = objects.PartitionScheme()
+        self.mgr.driver.partition_scheme.add_fs(
+            device=loop, mount='/', fs_type='ext4')
+        self.mgr.driver.metadata_uri = 'file:///fake/img.yaml'
+        self.mgr.driver.operating_system = objects.Ubuntu(
+            repos=[objects.DEBRepo('ubuntu', 'http://fakeubuntu',
+                                   'trusty', 'fakesection', priority=900)],
+            packages=['fakepackage1'])
+
+    def test_get_image_build_hash(self):
+        self._prepare_build_image()
+        build_hash = self.mgr._get_image_build_hash()
+        self.assertEqual(build_hash, self.mgr._get_image_build_hash())
+        self.mgr.driver.operating_system.packages.append('fakepackage2')
+        self.assertNotEqual(build_hash, self.mgr._get_image_build_hash())
+
+    @mock.patch('fuel_agent.manager.bu', create=True)
+    @mock.patch('fuel_agent.manager.tempfile.mkdtemp')
+    @mock.patch('fuel_agent.manager.os.path.getsize')
+    @mock.patch('fuel_agent.manager.os.path.exists')
+    @mock.patch('fuel_agent.manager.yaml.safe_load')
+    @mock.patch('fuel_agent.manager.open',
+                create=True, new_callable=mock.mock_open)
+    def test_do_build_image_up_to_date(self, mock_open, mock_yaml_load,
+                                       mock_exists, mock_getsize,
+                                       mock_mkdtemp, mock_bu):
+        # should skip the build if images are described by metadata
+        # of the build with the same data
+        self._prepare_build_image()
+        mock_exists.return_value = True
+        mock_getsize.return_value = 100
+        mock_yaml_load.return_value = {
+            'build_hash': self.mgr._get_image_build_hash(),
+            'images': [{'container_name': 'img.img.gz',
+                        'container_size': 100}]}
+        self.mgr.do_build_image()
+        mock_open.assert_called_once_with('/fake/img.yaml')
+        self.assertFalse(mock_mkdtemp.called)
+        self.assertFalse(mock_bu.run_debootstrap_cached.called)
+
+    @mock.patch('fuel_agent.manager.os.path.getsize')
+    @mock.patch('fuel_agent.manager.os.path.exists')
+    @mock.patch('fuel_agent.manager.yaml.safe_load')
+    @mock.patch('fuel_agent.manager.open',
+                create=True, new_callable=mock.mock_open)
+    def test_images_are_up_to_date_changed(self, mock_open, mock_yaml_load,
+                                           mock_exists, mock_getsize):
+        self._prepare_build_image()
+        build_hash = self.mgr._get_image_build_hash()
+        mock_exists.return_value = True
+        mock_getsize.return_value = 100
+        images = [{'container_name': 'img.img.gz', 'container_size': 100}]
+        # metadata of a build from different repos or packages
+        mock_yaml_load.return_value = {'build_hash': 'other', 'images': images}
+        self.assertFalse(self.mgr._images_are_up_to_date(build_hash))
+        # metadata without build hash
+        mock_yaml_load.return_value = {'images': images}
+        self.assertFalse(self.mgr._images_are_up_to_date(build_hash))
+        # image was changed after the build
+        mock_yaml_load.return_value = {'build_hash': build_hash,
+                                       'images': images}
+        mock_getsize.return_value = 99
+        self.assertFalse(self.mgr._images_are_up_to_date(build_hash))
+        # there is no metadata at all
+        mock_open.side_effect = IOError
+        self.assertFalse(self.mgr._images_are_up_to_date(build_hash))
+
+    @mock.patch('fuel_agent.manager.open', create=True)
+    @mock.patch('fuel_agent.manager.os.path.exists')
+    def test_images_are_up_to_date_no_image(self, mock_exists, mock_open):
+        self._prepare_build_image()
+        mock_exists.return_value = False
+        self.assertFalse(self.mgr._images_are_up_to_date('fakehash'))
+        self.assertFalse(mock_open.called)
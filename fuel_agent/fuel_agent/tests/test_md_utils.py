@@ -17,6 +17,7 @@ from oslotest import base as test_base
 import six
 
 from fuel_agent import errors
+from fuel_agent import objects
 from fuel_agent.utils import hardware as hu
 from fuel_agent.utils import md as mu
 from fuel_agent.utils import utils
@@ -133,7 +134,7 @@ localhost.localdomain)
         self.assertEqual(sorted(expected, key=key), sorted(mds, key=key))
         patcher.stop()
 
-    @mock.patch.object(mu, 'mdclean')
+    @mock.patch.object(mu, 'mdclean_many')
     @mock.patch.object(hu, 'list_block_devices')
     @mock.patch.object(mu, 'mddisplay')
     @mock.patch.object(utils, 'execute')
@@ -154,10 +155,7 @@ localhost.localdomain)
                                    {'device': '/dev/fake2'}]
 
         mu.mdcreate('/dev/md0', 'mirror', '/dev/fake1', '/dev/fake2')
-        mock_mdclean_expected_calls = [mock.call('/dev/fake1'),
-                                       mock.call('/dev/fake2')]
-        self.assertEqual(mock_mdclean_expected_calls,
-                         mock_mdclean.call_args_list)
+        mock_mdclean.assert_called_once_with(['/dev/fake1', '/dev/fake2'])
         mock_exec.assert_called_once_with(
             'mdadm', '--create', '--force', '/dev/md0', '-e0.90',
             '--level=mirror',
@@ -208,7 +206,7 @@ localhost.localdomain)
             '/dev/md0', 'mirror', '/dev/fake1', '/dev/fake2')
 
     @mock.patch.object(utils, 'execute')
-    @mock.patch.object(mu, 'mdclean')
+    @mock.patch.object(mu, 'mdclean_many')
     @mock.patch.object(hu, 'list_block_devices')
     @mock.patch.object(mu, 'mddisplay')
     def test_mdcreate_device_clean(self, mock_mddisplay,
@@ -218,32 +216,46 @@ localhost.localdomain)
         mock_bdevs.return_value = [{'device': '/dev/fake1'},
                                    {'device': '/dev/fake2'}]
         mu.mdcreate('/dev/md0', 'mirror', '/dev/fake1', '/dev/fake2')
-        expected_calls = [mock.call('/dev/fake1'), mock.call('/dev/fake2')]
-        self.assertEqual(mock_mdclean.call_args_list, expected_calls)
+        mock_mdclean.assert_called_once_with(['/dev/fake1', '/dev/fake2'])
 
-    @mock.patch.object(mu, 'mdclean')
-    @mock.patch.object(mu, 'mdremove')
+    @mock.patch.object(utils, 'execute')
     @mock.patch.object(mu, 'mddisplay')
-    def test_mdclean_all(self, mock_mddisplay, mock_mdremove, mock_mdclean):
+    def test_mdclean_all(self, mock_mddisplay, mock_exec):
+        # should stop all md devices and clean their devices at once
         mock_mddisplay.side_effect = [
-            [{'name': '/dev/md10', 'devices': ['/dev/fake10']},
+            [{'name': '/dev/md10', 'devices': ['/dev/fake10', '/dev/fake11']},
              {'name': '/dev/md11'}],
             [{'name': '/dev/md11'}],
             []
         ]
         mu.mdclean_all()
-        mock_mdremove_expected_calls = [
-            mock.call('/dev/md10'), mock.call('/dev/md11'),
-            mock.call('/dev/md11')]
-        mock_mdclean.assert_called_once_with('/dev/fake10')
-        self.assertEqual(mock_mdremove.call_args_list,
-                         mock_mdremove_expected_calls)
-
-    @mock.patch.object(mu, 'mdclean')
-    @mock.patch.object(mu, 'mdremove')
+        expected_calls = [
+            mock.call('udevadm', 'settle', '--quiet', check_exit_code=[0]),
+            mock.call('mdadm', '--stop', '/dev/md10', '/dev/md11',
+                      check_exit_code=[0]),
+            mock.call('mdadm', '--remove', '/dev/md10',
+                      check_exit_code=[0, 1]),
+            mock.call('mdadm', '--remove', '/dev/md11',
+                      check_exit_code=[0, 1]),
+            mock.call('mdadm', '--zero-superblock', '--force',
+                      '/dev/fake10', '/dev/fake11', check_exit_code=[0]),
+            mock.call('udevadm', 'settle', '--quiet', check_exit_code=[0]),
+            mock.call('mdadm', '--stop', '/dev/md11', check_exit_code=[0]),
+            mock.call('mdadm', '--remove', '/dev/md11',
+                      check_exit_code=[0, 1]),
+        ]
+        self.assertEqual(mock_exec.call_args_list, expected_calls)
+
+    @mock.patch.object(utils, 'execute')
     @mock.patch.object(mu, 'mddisplay')
-    def test_mdclean_all_fail(self, mock_mddisplay, mock_mdremove,
-                              mock_mdclean):
+    def test_mdclean_all_nothing_to_clean(self, mock_mddisplay, mock_exec):
+        mock_mddisplay.return_value = []
+        mu.mdclean_all()
+        self.assertFalse(mock_exec.called)
+
+    @mock.patch.object(utils, 'execute')
+    @mock.patch.object(mu, 'mddisplay')
+    def test_mdclean_all_fail(self, mock_mddisplay, mock_exec):
         mock_mddisplay.return_value = [{'name': '/dev/md11'}]
         self.assertRaises(errors.MDRemovingError, mu.mdclean_all)
 
@@ -275,3 +287,46 @@ localhost.localdomain)
         mock_exec.assert_called_once_with('mdadm', '--zero-superblock',
                                           '--force', '/dev/md0',
                                           check_exit_code=[0])
+
+    @mock.patch.object(utils, 'execute')
+    def test_mdclean_many(self, mock_exec):
+        mu.mdclean_many(['/dev/fake1', '/dev/fake2'])
+        mock_exec.assert_called_once_with('mdadm', '--zero-superblock',
+                                          '--force', '/dev/fake1',
+                                          '/dev/fake2', check_exit_code=[0])
+
+    @mock.patch.object(utils, 'execute')
+    @mock.patch.object(mu, 'mddisplay')
+    def test_plan_clean_all(self, mock_mddisplay, mock_exec):
+        # should not run anything, just return commands
+        mock_mddisplay.return_value = [
+            {'name': '/dev/md10', 'devices': ['/dev/fake10']},
+            {'name': '/dev/md11'}]
+        expected = [
+            ['udevadm', 'settle', '--quiet'],
+            ['mdadm', '--stop', '/dev/md10', '/dev/md11'],
+            ['mdadm', '--remove', '/dev/md10'],
+            ['mdadm', '--remove', '/dev/md11'],
+            ['mdadm', '--zero-superblock', '--force', '/dev/fake10'],
+        ]
+        self.assertEqual(expected, mu.plan_clean_all())
+        self.assertFalse(mock_exec.called)
+
+    def test_plan_clean_all_empty(self):
+        self.assertEqual([], mu.plan_clean_all(mds=[]))
+
+    @mock.patch.object(utils, 'execute')
+    def test_plan_create(self, mock_exec):
+        scheme = objects.PartitionScheme()
+        md = scheme.add_md(name='/dev/md0', level='mirror')
+        md.add_device('/dev/fake1')
+        md.add_device('/dev/fake2')
+        expected = [
+            ['mdadm', '--zero-superblock', '--force',
+             '/dev/fake1', '/dev/fake2'],
+            ['mdadm', '--create', '--force', '/dev/md0', '-e0.90',
+             '--level=mirror', '--raid-devices=2',
+             '/dev/fake1', '/dev/fake2'],
+        ]
+        self.assertEqual(expected, mu.plan_create(scheme))
+        self.assertFalse(mock_exec.called)
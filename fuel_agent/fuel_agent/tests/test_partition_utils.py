@@ -57,6 +57,15 @@ class TestPartitionUtils(test_base.BaseTestCase):
         self.assertEqual(mock_exec_expected_calls, mock_exec.call_args_list)
         mock_rerd.assert_called_once_with('/dev/fake', out='out')
 
+    @mock.patch.object(pu, 'reread_partitions')
+    @mock.patch.object(utils, 'execute')
+    def test_make_label_without_settle(self, mock_exec, mock_rerd):
+        mock_exec.return_value = ('out', '')
+        pu.make_label('/dev/fake', settle=False)
+        mock_exec.assert_called_once_with(
+            'parted', '-s', '/dev/fake', 'mklabel', 'gpt',
+            check_exit_code=[0, 1])
+
     def test_make_label_wrong_label(self):
         # should check if label is valid
         # should raise exception if it is not
@@ -162,7 +171,7 @@ class TestPartitionUtils(test_base.BaseTestCase):
         self.assertRaises(errors.WrongPartitionSchemeError, pu.make_partition,
                           '/dev/fake', 200, 301, 'primary')
         self.assertEqual(mock_info.call_args_list,
-                         [mock.call('/dev/fake')] * 3)
+                         [mock.call('/dev/fake', settle=True)] * 3)
 
     @mock.patch.object(pu, 'reread_partitions')
     @mock.patch.object(pu, 'info')
@@ -13,6 +13,9 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import errno
+import os
+import tempfile
 import testtools
 
 import mock
@@ -132,6 +135,13 @@ class ExecuteTestCase(testtools.TestCase):
             'fake_url', stream=True, timeout=CONF.http_request_timeout,
             headers={'Range': 'bytes=0-'})
 
+    @mock.patch.object(requests, 'get')
+    def test_init_http_request_byte_range(self, mock_req):
+        utils.init_http_request('fake_url', 10, 20)
+        mock_req.assert_called_once_with(
+            'fake_url', stream=True, timeout=CONF.http_request_timeout,
+            headers={'Range': 'bytes=10-20'})
+
     @mock.patch('time.sleep')
     @mock.patch.object(requests, 'get')
     def test_init_http_request_non_critical_errors(self, mock_req, mock_s):
@@ -160,6 +170,33 @@ class ExecuteTestCase(testtools.TestCase):
         self.assertRaises(errors.HttpUrlConnectionError,
                           utils.init_http_request, 'fake_url')
 
+    def test_zero_out(self):
+        fd, path = tempfile.mkstemp()
+        self.addCleanup(os.remove, path)
+        os.write(fd, 'x' * 4096 * 4)
+        os.close(fd)
+        utils.zero_out(path, 1, 2, bs=4096)
+        with open(path) as f:
+            self.assertEqual('x' * 4096 + '\0' * 8192 + 'x' * 4096, f.read())
+
+    @mock.patch('fuel_agent.utils.utils.os.close')
+    @mock.patch('fuel_agent.utils.utils.os.lseek')
+    @mock.patch('fuel_agent.utils.utils.os.write')
+    @mock.patch('fuel_agent.utils.utils.os.open')
+    def test_zero_out_end_of_device(self, mock_open, mock_write, mock_lseek,
+                                    mock_close):
+        mock_open.return_value = 3
+        mock_write.side_effect = [8, 4, 8]
+        utils.zero_out('/dev/fake', 1, 3, bs=8, ignore_end=True)
+        self.assertEqual(2, mock_write.call_count)
+        mock_lseek.assert_called_once_with(3, 8, os.SEEK_SET)
+        mock_close.assert_called_once_with(3)
+
+        mock_write.reset_mock()
+        mock_write.side_effect = OSError(errno.ENOSPC, 'No space left')
+        self.assertRaises(OSError, utils.zero_out, '/dev/fake', 1, 3, bs=8)
+        utils.zero_out('/dev/fake', 1, 3, bs=8, ignore_end=True)
+
     @mock.patch('fuel_agent.utils.utils.os.makedirs')
     @mock.patch('fuel_agent.utils.utils.os.path.isdir', return_value=False)
     def test_makedirs_if_not_exists(self, mock_isdir, mock_makedirs):
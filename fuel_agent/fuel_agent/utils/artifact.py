@@ -13,6 +13,9 @@
 # limitations under the License.
 
 import abc
+import collections
+import hashlib
+from multiprocessing.pool import ThreadPool
 import os
 import tarfile
 import tempfile
@@ -33,6 +36,17 @@ au_opts = [
         default=1048576,
         help='Size of data chunk to operate with images'
     ),
+    cfg.IntOpt(
+        'http_download_threads',
+        default=4,
+        help='Number of byte ranges of an image to be downloaded over http '
+             'concurrently. 1 means to download an image in one stream'
+    ),
+    cfg.IntOpt(
+        'http_range_size',
+        default=4194304,
+        help='Size of byte range of an image to be downloaded at once'
+    ),
 ]
 
 CONF = cfg.CONF
@@ -48,6 +62,9 @@ class Target(object):
     def next(self):
         raise StopIteration()
 
+    def close(self):
+        pass
+
     def target(self, filename='/dev/null'):
         LOG.debug('Opening file: %s for write' % filename)
         with open(filename, 'wb') as f:
@@ -95,8 +112,22 @@ class HttpUrl(Target):
         else:
             LOG.debug('Expected content length %s for %s' % (self.length,
                                                              self.url))
+        # NOTE: a server which supports byte ranges answers
+        # with 206 Partial Content on the initial 'bytes=0-' request
+        self.ranged = (CONF.http_download_threads > 1 and
+                       self.length > CONF.http_range_size and
+                       self.response_obj.status_code == 206)
+        self.pool = None
+        self.pending = collections.deque()
+        self.requested_bytes = 0
+        if self.ranged:
+            LOG.debug('Downloading %s by %s byte ranges concurrently' %
+                      (self.url, CONF.http_download_threads))
+            self.response_obj.close()
 
     def next(self):
+        if self.ranged:
+            return self._next_range()
         while self.processed_bytes < self.length:
             try:
                 data = self.response_obj.raw.read(CONF.data_chunk_size)
@@ -114,6 +145,80 @@ class HttpUrl(Target):
                 return data
         raise StopIteration()
 
+    def _next_range(self):
+        if self.pool is None:
+            self.pool = ThreadPool(CONF.http_download_threads)
+        # NOTE: ranges are returned in the order they were
+        # requested, the number of them downloaded in advance is limited
+        # in order not to keep the whole image in memory if the target
+        # is slower than the network.
+        while (len(self.pending) < 2 * CONF.http_download_threads and
+                self.requested_bytes < self.length):
+            end = min(self.requested_bytes + CONF.http_range_size,
+                      self.length) - 1
+            self.pending.append(self.pool.apply_async(
+                self._fetch_range, (self.requested_bytes, end)))
+            self.requested_bytes = end + 1
+
+        if not self.pending:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
+            raise StopIteration()
+
+        try:
+            data = self.pending.popleft().get()
+        except Exception:
+            self.close()
+            raise
+        self.processed_bytes += len(data)
+        return data
+
+    def close(self):
+        """Stops downloading of byte ranges which are not consumed yet"""
+        if self.pool is not None:
+            self.pool.terminate()
+            self.pool.join()
+            self.pool = None
+        self.pending.clear()
+
+    def _check_range(self, response_obj, start, end):
+        content_range = response_obj.headers.get('content-range', '')
+        if response_obj.status_code != 206 or \
+                not content_range.startswith('bytes %s-%s/' % (start, end)):
+            raise errors.HttpUrlInvalidContentRange(
+                'Unexpected response for range %s-%s of %s: status=%s, '
+                'content-range=%s' % (start, end, self.url,
+                                      response_obj.status_code,
+                                      content_range))
+
+    def _fetch_range(self, start, end):
+        """Downloads bytes from start to end inclusively
+
+        Connection is re-initialized from the first missing byte on errors.
+        """
+        data = []
+        processed = start
+        response_obj = utils.init_http_request(self.url, start, end)
+        self._check_range(response_obj, start, end)
+        while processed <= end:
+            try:
+                chunk = response_obj.raw.read(
+                    min(CONF.data_chunk_size, end - processed + 1))
+                if not chunk:
+                    raise errors.HttpUrlConnectionError(
+                        'Could not receive data: URL=%s, range=%s-%s' %
+                        (self.url, processed, end))
+            except Exception as exc:
+                LOG.exception(exc)
+                response_obj = utils.init_http_request(
+                    self.url, processed, end)
+                self._check_range(response_obj, processed, end)
+                continue
+            data.append(chunk)
+            processed += len(chunk)
+        return ''.join(data)
+
 
 class GunzipStream(Target):
     def __init__(self, stream):
@@ -128,6 +233,34 @@ class GunzipStream(Target):
             raise
 
 
+class Md5Stream(Target):
+    """Calculates MD5 of the first size bytes of data passing through it
+
+    An instance itself is appended into a chain and gets the stream when
+    the chain is processed, so the checksum is available after that
+    without reading the written data once again.
+    """
+    def __init__(self, size):
+        self.size = size
+        self.processed = 0
+        self.md5 = hashlib.md5()
+        self.stream = iter([])
+
+    def __call__(self, stream):
+        self.stream = iter(stream)
+        return self
+
+    def next(self):
+        data = self.stream.next()
+        if self.processed < self.size:
+            self.md5.update(data[:self.size - self.processed])
+        self.processed += len(data)
+        return data
+
+    def hexdigest(self):
+        return self.md5.hexdigest()
+
+
 class ForwardFileStream(Target):
     def __init__(self, stream):
         self.stream = iter(stream)
@@ -212,15 +345,25 @@ class Chain(object):
         self.processors.append(processor)
 
     def process(self):
+        created = []
+
         def jump(proc, next_proc):
             # if next_proc is just a string we assume it is a filename
             # and we save stream into a file
             if isinstance(next_proc, (str, unicode)):
                 LOG.debug('Processor target: %s' % next_proc)
                 proc.target(next_proc)
-                return LocalFile(next_proc)
+                created.append(LocalFile(next_proc))
             # if next_proc is not a string we return new instance
             # initialized with the previous one
             else:
-                return next_proc(proc)
-        return reduce(jump, self.processors)
+                created.append(next_proc(proc))
+            return created[-1]
+
+        try:
+            return reduce(jump, self.processors)
+        except Exception:
+            # e.g. stop downloading if writing of an image failed
+            for proc in created:
+                proc.close()
+            raise
@@ -12,14 +12,19 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
-import gzip
+import collections
+import hashlib
+import json
+from multiprocessing.pool import ThreadPool
 import os
 import re
 import shutil
 import signal as sig
 import stat
+import struct
 import tempfile
 import time
+import zlib
 
 import six
 import yaml
@@ -74,6 +79,18 @@ bu_opts = [
         default='force_ipv4',
         help='File where to store apt setting for forcing IPv4 usage'
     ),
+    cfg.StrOpt(
+        'debootstrap_cache_dir',
+        default='/var/cache/fuel-agent/debootstrap',
+        help='Directory where to keep debootstrap base systems in order '
+             'to reuse them by subsequent builds. Empty value disables '
+             'the cache'
+    ),
+    cfg.IntOpt(
+        'compress_threads',
+        default=4,
+        help='Number of threads to compress images with'
+    ),
 ]
 
 CONF = cfg.CONF
@@ -107,6 +124,72 @@ def run_debootstrap(uri, suite, chroot, arch='amd64', eatmydata=False,
               stderr)
 
 
+def get_debootstrap_cache_key(uri, suite, arch='amd64', packages=None,
+                              release=None):
+    """Returns a key of debootstrap base system in the cache
+
+    The base system depends on mirror, suite, architecture, the list of
+    additionally included packages and the state of the mirror, which is
+    described by content of its Release file.
+    """
+    data = [uri, suite, arch, sorted(packages or []),
+            hashlib.sha1((release or '').encode('utf-8')).hexdigest()]
+    return hashlib.sha1(json.dumps(data)).hexdigest()
+
+
+def run_debootstrap_cached(uri, suite, chroot, arch='amd64', eatmydata=False,
+                           attempts=None, cache_dir=None):
+    """Builds initial base system or unpacks it from the cache.
+
+    Base system built by debootstrap is saved as a tarball into cache_dir
+    and the next builds with the same mirror, suite and arch just unpack
+    it instead of downloading and installing base packages once again.
+    The mirror's Release file is a part of the cache key, so the cache
+    is refreshed as soon as packages of the mirror are updated.
+    """
+    if attempts is None:
+        attempts = CONF.fetch_packages_attempts
+    if cache_dir is None:
+        cache_dir = CONF.debootstrap_cache_dir
+    debootstrap_kwargs = dict(uri=uri, suite=suite, chroot=chroot, arch=arch,
+                              eatmydata=eatmydata, attempts=attempts)
+    if not cache_dir:
+        return run_debootstrap(**debootstrap_kwargs)
+
+    try:
+        release = get_release_file(uri, suite, section=True)
+    except Exception as exc:
+        LOG.warning('Failed to get Release file of %s %s, debootstrap cache '
+                    'is not used: %s', uri, suite, exc)
+        return run_debootstrap(**debootstrap_kwargs)
+
+    key = get_debootstrap_cache_key(
+        uri, suite, arch, packages=['eatmydata'] if eatmydata else None,
+        release=release)
+    tarball = os.path.join(cache_dir, '%s.tar' % key)
+    if os.path.exists(tarball):
+        LOG.debug('Unpacking cached debootstrap base system %s into %s',
+                  tarball, chroot)
+        utils.execute('tar', '-xpf', tarball, '--numeric-owner',
+                      '-C', chroot, check_exit_code=[0])
+        return
+
+    run_debootstrap(**debootstrap_kwargs)
+    LOG.debug('Saving debootstrap base system into cache %s', tarball)
+    utils.makedirs_if_not_exists(cache_dir)
+    # NOTE: tarball is renamed only when it is complete,
+    # so an interrupted build never leaves a broken cache entry
+    tmp_tarball = tempfile.NamedTemporaryFile(
+        dir=cache_dir, suffix='.tar.tmp', delete=False).name
+    try:
+        utils.execute('tar', '-cpf', tmp_tarball, '--numeric-owner',
+                      '-C', chroot, '.', check_exit_code=[0])
+        os.rename(tmp_tarball, tarball)
+    except Exception:
+        os.remove(tmp_tarball)
+        raise
+
+
 def set_apt_get_env():
     # NOTE(agordeev): disable any confirmations/questions from apt-get side
     os.environ['DEBIAN_FRONTEND'] = 'noninteractive'
@@ -485,16 +568,69 @@ def pre_apt_get(chroot, allow_unsigned_file=CONF.allow_unsigned_file,
         f.write('Acquire::ForceIPv4 "true";\n')
 
 
-def containerize(filename, container, chunk_size=CONF.data_chunk_size):
+def _deflate_block(data, compresslevel):
+    # NOTE: raw deflate blocks ending with sync flush are byte
+    # aligned, so blocks compressed independently can be concatenated into
+    # a single deflate stream, the same way pigz does.
+    compressor = zlib.compressobj(compresslevel, zlib.DEFLATED,
+                                  -zlib.MAX_WBITS)
+    return compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH)
+
+
+def gzip_compress(filename, output_file, chunk_size=None, threads=None,
+                  compresslevel=9):
+    """Compresses file into gzip format using several threads
+
+    The file is split into chunks which are deflated concurrently (zlib
+    releases GIL while compressing) and written in order as a single gzip
+    member, so the result can be decompressed by any gzip implementation.
+    """
+    chunk_size = chunk_size or CONF.data_chunk_size
+    threads = max(threads or CONF.compress_threads, 1)
+    pool = ThreadPool(threads)
+    pending = collections.deque()
+    crc = zlib.crc32('')
+    size = 0
+    try:
+        with open(filename, 'rb') as f:
+            with open(output_file, 'wb') as g:
+                # magic, method, flags, mtime, extra flags, os (unknown)
+                g.write(struct.pack('<BBBBIBB', 0x1f, 0x8b, zlib.DEFLATED, 0,
+                                    int(time.time()), 0, 255))
+                eof = False
+                while True:
+                    # NOTE: the number of chunks read in advance
+                    # is limited in order not to keep the whole image in
+                    # memory if the disk is slower than compression
+                    while not eof and len(pending) < 2 * threads:
+                        chunk = f.read(chunk_size)
+                        if not chunk:
+                            eof = True
+                            break
+                        crc = zlib.crc32(chunk, crc)
+                        size += len(chunk)
+                        pending.append(pool.apply_async(
+                            _deflate_block, (chunk, compresslevel)))
+                    if not pending:
+                        break
+                    g.write(pending.popleft().get())
+                # empty final block terminates the deflate stream
+                g.write(zlib.compressobj(compresslevel, zlib.DEFLATED,
+                                         -zlib.MAX_WBITS).flush())
+                g.write(struct.pack('<II', crc & 0xffffffff,
+                                    size & 0xffffffff))
+        pool.close()
+    except Exception:
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
+
+
+def containerize(filename, container, chunk_size=None):
     if container == 'gzip':
         output_file = filename + '.gz'
-        with open(filename, 'rb') as f:
-            # NOTE(agordeev): gzip in python2.6 doesn't have context manager
-            # support
-            g = gzip.open(output_file, 'wb')
-            for chunk in iter(lambda: f.read(chunk_size), ''):
-                g.write(chunk)
-            g.close()
+        gzip_compress(filename, output_file, chunk_size=chunk_size)
         os.remove(filename)
         return output_file
     raise errors.WrongImageDataError(
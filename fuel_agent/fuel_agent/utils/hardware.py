@@ -12,10 +12,14 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import copy
 import os
 
+from fuel_agent.openstack.common import log as logging
 from fuel_agent.utils import utils
 
+LOG = logging.getLogger(__name__)
+
 
 # Please take a look at the linux kernel documentation
 # https://github.com/torvalds/linux/blob/master/Documentation/devices.txt.
@@ -215,6 +219,42 @@ def blockdevreport(blockdev):
     return dict(zip(opts, report.splitlines()))
 
 
+def sysfsreport(devpath):
+    """Builds the same report as blockdevreport does, but reads
+    all the properties from sysfs instead of running blockdev.
+
+    :param devpath: A device path relative to /sys (udev DEVPATH property).
+
+    :returns: A dict of blockdev properties.
+    :raises: IOError or ValueError if some of properties can't be read.
+    """
+    path = '/sys' + devpath
+    queue = os.path.join(path, 'queue')
+    if not os.path.isdir(queue):
+        # NOTE: partitions share the request queue of their disk
+        queue = os.path.join(os.path.dirname(path), 'queue')
+
+    def read(*args):
+        with open(os.path.join(*args)) as f:
+            return f.read().strip()
+
+    # NOTE: size is always in 512-byte sectors in sysfs,
+    # as well as readahead and max sectors are reported by blockdev
+    size = read(path, 'size')
+    return {
+        'sz': size,
+        'ro': read(path, 'ro'),
+        'ss': read(queue, 'logical_block_size'),
+        'pbsz': read(queue, 'physical_block_size'),
+        'size64': str(int(size) * 512),
+        'iomin': read(queue, 'minimum_io_size'),
+        'ioopt': read(queue, 'optimal_io_size'),
+        'ra': str(int(read(queue, 'read_ahead_kb')) * 2),
+        'alignoff': read(path, 'alignment_offset'),
+        'maxsect': str(int(read(queue, 'max_sectors_kb')) * 2),
+    }
+
+
 def extrareport(dev):
     """Builds device report using some additional sources.
 
@@ -245,37 +285,64 @@ def extrareport(dev):
 
 
 def get_block_devices_from_udev_db():
+    return [device for device, uspec in udevdbreport()]
+
+
+def udevdbreport():
+    """Builds udevadm reports of all block devices at once.
+
+    Parses udev database dump instead of running udevadm for every device.
+
+    :returns: A list of (device file, dict of udev device properties)
+    tuples for disks and their partitions.
+    """
     devs = []
     output = utils.execute('udevadm', 'info', '--export-db')[0]
     for device in output.split('\n\n'):
         # NOTE(agordeev): add only disks or their partitions
-        if 'SUBSYSTEM=block' in device and ('DEVTYPE=disk' in device or
-                                            'DEVTYPE=partition' in device):
-            # NOTE(agordeev): it has to be sorted in order
-            # to find MAJOR property prior DEVNAME property.
-            for line in sorted(device.split('\n'), reverse=True):
-                if line.startswith('E: MAJOR='):
-                    major = int(line.split()[1].split('=')[1])
-                    if major not in VALID_MAJORS:
-                        # NOTE(agordeev): filter out cd/dvd drives and other
-                        # block devices in which fuel-agent aren't interested
-                        break
-                if line.startswith('E: DEVNAME='):
-                    d = line.split()[1].split('=')[1]
-                    if not any(os.path.basename(d).startswith(n)
-                               for n in ('nbd', 'ram', 'loop')):
-                        devs.append(line.split()[1].split('=')[1])
-                    break
+        if 'SUBSYSTEM=block' not in device or not (
+                'DEVTYPE=disk' in device or 'DEVTYPE=partition' in device):
+            continue
+
+        spec = {}
+        for line in device.split('\n'):
+            if not line.startswith('E: '):
+                continue
+            key, value = line[3:].split('=', 1)
+            # This is a list of symbolic links which were created for this
+            # block device (e.g. /dev/disk/by-id/foobar)
+            if key == 'DEVLINKS':
+                spec['DEVLINKS'] = value.split()
+            if key in UDEV_PROPERTIES:
+                spec[key] = value
+
+        # NOTE(agordeev): filter out cd/dvd drives and other
+        # block devices in which fuel-agent aren't interested
+        if 'MAJOR' in spec and int(spec['MAJOR']) not in VALID_MAJORS:
+            continue
+        if 'DEVNAME' in spec and not any(
+                os.path.basename(spec['DEVNAME']).startswith(n)
+                for n in ('nbd', 'ram', 'loop')):
+            devs.append((spec['DEVNAME'], spec))
     return devs
 
 
-def list_block_devices(disks=True):
-    """Gets list of block devices
+# NOTE: block devices are discovered once per agent run,
+# the result has to be invalidated after devices are changed,
+# see invalidate_block_devices_cache
+_block_devices = None
 
-    Tries to guess which of them are disks
-    and returns list of dicts representing those disks.
 
-    :returns: A list of dict representing disks available on a node.
+def invalidate_block_devices_cache():
+    """Makes the next list_block_devices call to discover devices again"""
+    global _block_devices
+    _block_devices = None
+
+
+def discover_block_devices():
+    """Discovers all block devices (disks and their partitions)
+
+    :returns: A list of dict representing block devices.
     """
     bdevs = []
     # NOTE(agordeev): blockdev from util-linux contains a bug
@@ -285,11 +352,11 @@ def list_block_devices(disks=True):
     #   - don't use HDIO_GETGEO  [Phillip Susi]
     # Since the bug only affects '--report' it is safe to use
     # 'blockdevreport'.
-    # fuel-agent has to be switched to use udev database in order to
-    # find all block devices recognized by kernel.
-    devs = get_block_devices_from_udev_db()
-    for device in devs:
-        uspec = udevreport(device)
+    # NOTE: udev properties of all devices are taken from
+    # the single udev database dump and blockdev properties are read
+    # from sysfs, so no processes are run per device unless sysfs
+    # lacks something.
+    for device, uspec in udevdbreport():
         espec = extrareport(device)
         # NOTE(agordeev): blockdevreport will fail if there's no medium
         # inserted into removable device.
@@ -297,11 +364,12 @@ def list_block_devices(disks=True):
         if (espec.get('removable') == '1' and
                 uspec.get('ID_VENDOR') not in REMOVABLE_VENDORS):
             continue
-        bspec = blockdevreport(device)
-
-        # if device is not disk,skip it
-        if disks and not is_disk(device, bspec=bspec, uspec=uspec):
-            continue
+        try:
+            bspec = sysfsreport(uspec['DEVPATH'])
+        except (KeyError, IOError, ValueError) as e:
+            LOG.debug('Failed to read %s properties from sysfs, falling '
+                      'back to blockdev: %s' % (device, e))
+            bspec = blockdevreport(device)
 
         bdev = {
             'device': device,
@@ -317,6 +385,24 @@ def list_block_devices(disks=True):
     return bdevs
 
 
+def list_block_devices(disks=True):
+    """Gets list of block devices
+
+    Tries to guess which of them are disks
+    and returns list of dicts representing those disks.
+
+    :returns: A list of dict representing disks available on a node.
+    """
+    global _block_devices
+    if _block_devices is None:
+        _block_devices = discover_block_devices()
+
+    # if device is not disk,skip it
+    return [copy.deepcopy(bdev) for bdev in _block_devices
+            if not disks or is_disk(bdev['device'], bspec=bdev['bspec'],
+                                    uspec=bdev['uspec'])]
+
+
 def match_device(uspec1, uspec2):
     """Tries to find out if uspec1 and uspec2 are uspecs from the same device
 
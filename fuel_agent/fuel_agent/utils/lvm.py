@@ -12,6 +12,8 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import collections
+
 from fuel_agent import errors
 from fuel_agent.openstack.common import log as logging
 from fuel_agent.utils import utils
@@ -51,29 +53,67 @@ def pvdisplay_parse(output):
     return pvs
 
 
+def _pvcreate_cmd(pvnames, metadatasize, metadatacopies):
+    return ['pvcreate',
+            '--metadatacopies', str(metadatacopies),
+            '--metadatasize', str(metadatasize) + 'm'] + list(pvnames)
+
+
+def _pvremove_cmd(pvnames):
+    return ['pvremove', '-ff', '-y'] + list(pvnames)
+
+
+def group_pvs(pvs):
+    """Groups physical volumes by their metadata options
+
+    :param pvs: list of partition scheme Pv objects
+    :returns: list of (metadatasize, metadatacopies, pvnames) tuples in order
+    of appearance, every group can be created by a single pvcreate call
+    """
+    groups = collections.OrderedDict()
+    for pv in pvs:
+        groups.setdefault((pv.metadatasize, pv.metadatacopies),
+                          []).append(pv.name)
+    return [key + (pvnames,) for key, pvnames in groups.items()]
+
+
 def pvcreate(pvname, metadatasize=64, metadatacopies=2):
-    # check if pv already exists
-    if filter(lambda x: x['name'] == pvname, pvdisplay()):
+    pvcreate_many([pvname], metadatasize=metadatasize,
+                  metadatacopies=metadatacopies)
+
+
+def pvcreate_many(pvnames, metadatasize=64, metadatacopies=2):
+    # check if any of pvs already exists
+    existing = set(pvnames) & set([pv['name'] for pv in pvdisplay()])
+    if existing:
         raise errors.PVAlreadyExistsError(
-            'Error while creating pv: pv %s already exists' % pvname)
-    utils.execute('pvcreate',
-                  '--metadatacopies', str(metadatacopies),
-                  '--metadatasize', str(metadatasize) + 'm',
-                  pvname, check_exit_code=[0])
+            'Error while creating pv: pv %s already exists' %
+            ', '.join(sorted(existing)))
+    utils.execute(*_pvcreate_cmd(pvnames, metadatasize, metadatacopies),
+                  check_exit_code=[0])
+
+
+def _pvremove_validate(pvnames, pvs):
+    pvs = dict((pv['name'], pv) for pv in pvs)
+    for pvname in pvnames:
+        # check if pv exists
+        if pvname not in pvs:
+            raise errors.PVNotFoundError(
+                'Error while removing pv: pv %s not found' % pvname)
+        # check if pv is attached to some vg
+        if pvs[pvname]['vg'] is not None:
+            raise errors.PVBelongsToVGError(
+                'Error while removing pv: '
+                'pv belongs to vg %s' % pvs[pvname]['vg'])
 
 
 def pvremove(pvname):
-    pv = filter(lambda x: x['name'] == pvname, pvdisplay())
+    pvremove_many([pvname])
 
-    # check if pv exists
-    if not pv:
-        raise errors.PVNotFoundError(
-            'Error while removing pv: pv %s not found' % pvname)
-    # check if pv is attached to some vg
-    if pv[0]['vg'] is not None:
-        raise errors.PVBelongsToVGError('Error while removing pv: '
-                                        'pv belongs to vg %s' % pv[0]['vg'])
-    utils.execute('pvremove', '-ff', '-y', pvname, check_exit_code=[0])
+
+def pvremove_many(pvnames):
+    _pvremove_validate(pvnames, pvdisplay())
+    utils.execute(*_pvremove_cmd(pvnames), check_exit_code=[0])
 
 
 def vgdisplay():
@@ -119,6 +159,10 @@ def _vg_attach_validate(pvnames):
             'already attached to some vg')
 
 
+def _vgcreate_cmd(vgname, pvnames):
+    return ['vgcreate', vgname] + list(pvnames)
+
+
 def vgcreate(vgname, pvname, *args):
     # check if vg already exists
     if filter(lambda x: x['name'] == vgname, vgdisplay()):
@@ -126,7 +170,7 @@ def vgcreate(vgname, pvname, *args):
             'Error while creating vg: vg %s already exists' % vgname)
     pvnames = [pvname] + list(args)
     _vg_attach_validate(pvnames)
-    utils.execute('vgcreate', vgname, *pvnames, check_exit_code=[0])
+    utils.execute(*_vgcreate_cmd(vgname, pvnames), check_exit_code=[0])
 
 
 def vgextend(vgname, pvname, *args):
@@ -154,12 +198,22 @@ def vgreduce(vgname, pvname, *args):
     utils.execute('vgreduce', '-f', vgname, *pvnames, check_exit_code=[0])
 
 
+def _vgremove_cmd(vgnames):
+    return ['vgremove', '-f'] + list(vgnames)
+
+
 def vgremove(vgname):
-    # check if vg exists
-    if not filter(lambda x: x['name'] == vgname, vgdisplay()):
+    vgremove_many([vgname])
+
+
+def vgremove_many(vgnames):
+    # check if all vgs exist
+    missing = set(vgnames) - set([vg['name'] for vg in vgdisplay()])
+    if missing:
         raise errors.VGNotFoundError(
-            'Error while removing vg: vg %s not found' % vgname)
-    utils.execute('vgremove', '-f', vgname, check_exit_code=[0])
+            'Error while removing vg: vg %s not found' %
+            ', '.join(sorted(missing)))
+    utils.execute(*_vgremove_cmd(vgnames), check_exit_code=[0])
 
 
 def lvdisplay():
@@ -195,6 +249,18 @@ def lvdisplay_parse(output):
     return lvs
 
 
+def _lvcreate_cmd(vgname, lvname, size):
+    # NOTE(agordeev): by default, lvcreate is configured to wipe signature
+    # on allocated volume. '--yes' should be passed to avoid waiting for
+    # user's confirmation:
+    # "WARNING: <signature> signature detected on <device>. Wipe it? [y/n]"
+    return ['lvcreate', '--yes', '-L', '%sm' % size, '-n', lvname, vgname]
+
+
+def _lvremove_cmd(lvpaths):
+    return ['lvremove', '-f'] + list(lvpaths)
+
+
 def lvcreate(vgname, lvname, size):
     vg = filter(lambda x: x['name'] == vgname, vgdisplay())
 
@@ -212,32 +278,81 @@ def lvcreate(vgname, lvname, size):
               lvdisplay()):
         raise errors.LVAlreadyExistsError(
             'Error while creating lv: lv %s already exists' % lvname)
-    # NOTE(agordeev): by default, lvcreate is configured to wipe signature
-    # on allocated volume. '--yes' should be passed to avoid waiting for
-    # user's confirmation:
-    # "WARNING: <signature> signature detected on <device>. Wipe it? [y/n]"
-    utils.execute('lvcreate', '--yes', '-L', '%sm' % size, '-n', lvname,
-                  vgname, check_exit_code=[0])
+    utils.execute(*_lvcreate_cmd(vgname, lvname, size), check_exit_code=[0])
 
 
 def lvremove(lvpath):
-    # check if lv exists
-    if not filter(lambda x: x['path'] == lvpath, lvdisplay()):
+    lvremove_many([lvpath])
+
+
+def lvremove_many(lvpaths):
+    # check if all lvs exist
+    missing = set(lvpaths) - set([lv['path'] for lv in lvdisplay()])
+    if missing:
         raise errors.LVNotFoundError(
-            'Error while removing lv: lv %s not found' % lvpath)
-    utils.execute('lvremove', '-f', lvpath, check_exit_code=[0])
+            'Error while removing lv: lv %s not found' %
+            ', '.join(sorted(missing)))
+    utils.execute(*_lvremove_cmd(lvpaths), check_exit_code=[0])
 
 
+# NOTE: *_remove_all functions pass all found volumes to a single command
+# instead of running (and validating) one command per volume, so wiping
+# out a node with dozens of volumes doesn't cost dozens of lvm calls.
 def lvremove_all():
-    for lv in lvdisplay():
-        lvremove(lv['path'])
+    lvpaths = [lv['path'] for lv in lvdisplay()]
+    if lvpaths:
+        utils.execute(*_lvremove_cmd(lvpaths), check_exit_code=[0])
 
 
 def vgremove_all():
-    for vg in vgdisplay():
-        vgremove(vg['name'])
+    vgnames = [vg['name'] for vg in vgdisplay()]
+    if vgnames:
+        utils.execute(*_vgremove_cmd(vgnames), check_exit_code=[0])
 
 
 def pvremove_all():
-    for pv in pvdisplay():
-        pvremove(pv['name'])
+    pvs = pvdisplay()
+    if pvs:
+        pvnames = [pv['name'] for pv in pvs]
+        _pvremove_validate(pvnames, pvs)
+        utils.execute(*_pvremove_cmd(pvnames), check_exit_code=[0])
+
+
+def plan_remove_all(pvs=None, vgs=None, lvs=None):
+    """Plans lvm commands which wipe out all volumes
+
+    Nothing is executed. Current volumes are taken from pvdisplay,
+    vgdisplay and lvdisplay unless they are passed explicitly.
+
+    :returns: list of commands, every command is a list of arguments
+    """
+    pvs = pvdisplay() if pvs is None else pvs
+    vgs = vgdisplay() if vgs is None else vgs
+    lvs = lvdisplay() if lvs is None else lvs
+
+    commands = []
+    if lvs:
+        commands.append(_lvremove_cmd([lv['path'] for lv in lvs]))
+    if vgs:
+        commands.append(_vgremove_cmd([vg['name'] for vg in vgs]))
+    if pvs:
+        commands.append(_pvremove_cmd([pv['name'] for pv in pvs]))
+    return commands
+
+
+def plan_create(partition_scheme):
+    """Plans lvm commands which create volumes of partition scheme
+
+    :param partition_scheme: PartitionScheme object
+    :returns: list of commands, every command is a list of arguments
+    """
+    commands = []
+    for metadatasize, metadatacopies, pvnames in \
+            group_pvs(partition_scheme.pvs):
+        commands.append(
+            _pvcreate_cmd(pvnames, metadatasize, metadatacopies))
+    for vg in partition_scheme.vgs:
+        commands.append(_vgcreate_cmd(vg.name, vg.pvnames))
+    for lv in partition_scheme.lvs:
+        commands.append(_lvcreate_cmd(lv.vgname, lv.name, lv.size))
+    return commands
@@ -108,13 +108,21 @@ def mdcreate(mdname, level, device, *args):
 
     # FIXME: mdadm will ask user to continue creating if any device appears to
     #       be a part of raid array. Superblock zeroing helps to avoid that.
-    map(mdclean, devices)
-    utils.execute('mdadm', '--create', '--force', mdname, '-e0.90',
-                  '--level=%s' % level,
-                  '--raid-devices=%s' % len(devices), *devices,
+    mdclean_many(devices)
+    utils.execute(*_mdcreate_cmd(mdname, level, devices),
                   check_exit_code=[0])
 
 
+def _mdcreate_cmd(mdname, level, devices):
+    return ['mdadm', '--create', '--force', mdname, '-e0.90',
+            '--level=%s' % level,
+            '--raid-devices=%s' % len(devices)] + list(devices)
+
+
+def _mdclean_cmd(devices):
+    return ['mdadm', '--zero-superblock', '--force'] + list(devices)
+
+
 def mdremove(mdname):
     # check if md exists
     if mdname not in get_mdnames():
@@ -144,27 +152,77 @@ def mdremove(mdname):
     #       too busy with events when we start to modifiy md devices hard.
     #           Thus `udevadm settle` is helping to avoid the later failure and
     #       to prevent strange behaviour of md device.
+    _mdremove_many([mdname])
+
+
+def _mdremove_many(mdnames):
+    # NOTE: see the FIXME in mdremove on why udev is settled first.
+    # One settle and one 'mdadm --stop' are enough for all md devices.
     utils.execute('udevadm', 'settle', '--quiet', check_exit_code=[0])
-    utils.execute('mdadm', '--stop', mdname, check_exit_code=[0])
-    utils.execute('mdadm', '--remove', mdname, check_exit_code=[0, 1])
+    utils.execute('mdadm', '--stop', *mdnames, check_exit_code=[0])
+    for mdname in mdnames:
+        utils.execute('mdadm', '--remove', mdname, check_exit_code=[0, 1])
 
 
 def mdclean(device):
-    # we don't care if device actually exists or not
-    utils.execute('mdadm', '--zero-superblock', '--force', device,
-                  check_exit_code=[0])
+    mdclean_many([device])
+
+
+def mdclean_many(devices):
+    # we don't care if devices actually exist or not
+    utils.execute(*_mdclean_cmd(devices), check_exit_code=[0])
 
 
 def mdclean_all():
     LOG.debug('Trying to wipe out all md devices')
-    for md in mddisplay():
-        mdremove(md['name'])
-        for dev in md.get('devices', []):
-            mdclean(dev)
+    mds = mddisplay()
+    if mds:
+        _mdremove_many([md['name'] for md in mds])
+        devices = [dev for md in mds for dev in md.get('devices', [])]
+        if devices:
+            mdclean_many(devices)
     # second attempt, remove stale inactive devices
-    for md in mddisplay():
-        mdremove(md['name'])
+    mds = mddisplay()
+    if mds:
+        _mdremove_many([md['name'] for md in mds])
     mds = mddisplay()
     if len(mds) > 0:
         raise errors.MDRemovingError(
             'Error while removing mds: few devices still presented %s' % mds)
+
+
+def plan_clean_all(mds=None):
+    """Plans mdadm commands which wipe out all md devices
+
+    Nothing is executed. Commands are the ones the first pass of
+    mdclean_all runs, the second pass depends on md devices which are
+    left after the first one, so it can't be planned.
+
+    :param mds: md devices as returned by mddisplay, current ones if None
+    :returns: list of commands, every command is a list of arguments
+    """
+    mds = mddisplay() if mds is None else mds
+
+    commands = []
+    if mds:
+        mdnames = [md['name'] for md in mds]
+        commands.append(['udevadm', 'settle', '--quiet'])
+        commands.append(['mdadm', '--stop'] + mdnames)
+        commands.extend(['mdadm', '--remove', mdname] for mdname in mdnames)
+        devices = [dev for md in mds for dev in md.get('devices', [])]
+        if devices:
+            commands.append(_mdclean_cmd(devices))
+    return commands
+
+
+def plan_create(partition_scheme):
+    """Plans mdadm commands which create md devices of partition scheme
+
+    :param partition_scheme: PartitionScheme object
+    :returns: list of commands, every command is a list of arguments
+    """
+    commands = []
+    for md in partition_scheme.mds:
+        commands.append(_mdclean_cmd(md.devices))
+        commands.append(_mdcreate_cmd(md.name, md.level, md.devices))
+    return commands
@@ -48,8 +48,9 @@ def parse_partition_info(output):
     return {'generic': generic, 'parts': parts}
 
 
-def info(dev):
-    utils.execute('udevadm', 'settle', '--quiet', check_exit_code=[0])
+def info(dev, settle=True):
+    if settle:
+        utils.execute('udevadm', 'settle', '--quiet', check_exit_code=[0])
     output = utils.execute('parted', '-s', dev, '-m',
                            'unit', 'MiB',
                            'print', 'free',
@@ -67,11 +68,12 @@ def wipe(dev):
     make_label(dev)
 
 
-def make_label(dev, label='gpt'):
+def make_label(dev, label='gpt', settle=True):
     """Creates partition label on a device.
 
     :param dev: A device file, e.g. /dev/sda.
     :param label: Partition label type 'gpt' or 'msdos'. Optional.
+    :param settle: Wait for udev events to be handled before. Optional.
 
     :returns: None
     """
@@ -80,14 +82,15 @@ def make_label(dev, label='gpt'):
     if label not in ('gpt', 'msdos'):
         raise errors.WrongPartitionLabelError(
             'Wrong partition label type: %s' % label)
-    utils.execute('udevadm', 'settle', '--quiet', check_exit_code=[0])
+    if settle:
+        utils.execute('udevadm', 'settle', '--quiet', check_exit_code=[0])
     out, err = utils.execute('parted', '-s', dev, 'mklabel', label,
                              check_exit_code=[0, 1])
     LOG.debug('Parted output: \n%s' % out)
     reread_partitions(dev, out=out)
 
 
-def set_partition_flag(dev, num, flag, state='on'):
+def set_partition_flag(dev, num, flag, state='on', settle=True):
     """Sets flag on a partition
 
     :param dev: A device file, e.g. /dev/sda.
@@ -95,6 +98,7 @@ def set_partition_flag(dev, num, flag, state='on'):
     :param flag: Flag name. Must be one of 'bios_grub', 'legacy_boot',
     'boot', 'raid', 'lvm'
     :param state: Desiable flag state. 'on' or 'off'. Default is 'on'.
+    :param settle: Wait for udev events to be handled before. Optional.
 
     :returns: None
     """
@@ -109,14 +113,15 @@ def set_partition_flag(dev, num, flag, state='on'):
     if state not in ('on', 'off'):
         raise errors.WrongPartitionSchemeError(
             'Wrong partition flag state: %s' % state)
-    utils.execute('udevadm', 'settle', '--quiet', check_exit_code=[0])
+    if settle:
+        utils.execute('udevadm', 'settle', '--quiet', check_exit_code=[0])
     out, err = utils.execute('parted', '-s', dev, 'set', str(num),
                              flag, state, check_exit_code=[0, 1])
     LOG.debug('Parted output: \n%s' % out)
     reread_partitions(dev, out=out)
 
 
-def set_gpt_type(dev, num, type_guid):
+def set_gpt_type(dev, num, type_guid, settle=True):
     """Sets guid on a partition.
 
     :param dev: A device file, e.g. /dev/sda.
@@ -124,18 +129,20 @@ def set_gpt_type(dev, num, type_guid):
     :param type_guid: Partition type guid. Must be one of those listed
     on this page http://en.wikipedia.org/wiki/GUID_Partition_Table.
     This method does not check whether type_guid is valid or not.
+    :param settle: Wait for udev events to be handled before. Optional.
 
     :returns: None
     """
     # TODO(kozhukalov): check whether type_guid is valid
     LOG.debug('Setting partition GUID: dev=%s num=%s guid=%s' %
               (dev, num, type_guid))
-    utils.execute('udevadm', 'settle', '--quiet', check_exit_code=[0])
+    if settle:
+        utils.execute('udevadm', 'settle', '--quiet', check_exit_code=[0])
     utils.execute('sgdisk', '--typecode=%s:%s' % (num, type_guid),
                   dev, check_exit_code=[0])
 
 
-def make_partition(dev, begin, end, ptype):
+def make_partition(dev, begin, end, ptype, settle=True):
     LOG.debug('Trying to create a partition: dev=%s begin=%s end=%s' %
               (dev, begin, end))
     if ptype not in ('primary', 'logical'):
@@ -149,12 +156,13 @@ def make_partition(dev, begin, end, ptype):
 
     # check if begin and end are inside one of free spaces available
     if not any(x['fstype'] == 'free' and begin >= x['begin'] and
-               end <= x['end'] for x in info(dev)['parts']):
+               end <= x['end'] for x in info(dev, settle=settle)['parts']):
         raise errors.WrongPartitionSchemeError(
             'Invalid boundaries: begin and end '
             'are not inside available free space')
 
-    utils.execute('udevadm', 'settle', '--quiet', check_exit_code=[0])
+    if settle:
+        utils.execute('udevadm', 'settle', '--quiet', check_exit_code=[0])
     out, err = utils.execute(
         'parted', '-a', 'optimal', '-s', dev, 'unit', 'MiB',
         'mkpart', ptype, str(begin), str(end), check_exit_code=[0, 1])
@@ -12,9 +12,11 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import errno
 import hashlib
 import locale
 import math
+import mmap
 import os
 import re
 import shlex
@@ -25,6 +27,7 @@ import time
 import jinja2
 from oslo.config import cfg
 import requests
+import six
 import stevedore.driver
 import urllib3
 
@@ -195,9 +198,56 @@ def calculate_md5(filename, size):
     return hash.hexdigest()
 
 
-def init_http_request(url, byte_range=0):
-    LOG.debug('Trying to initialize http request object %s, byte range: %s'
-              % (url, byte_range))
+def zero_out(dev, seek, count, bs=1048576, ignore_end=False):
+    """Writes zeros to a device like 'dd if=/dev/zero' does
+
+    Data are written with O_DIRECT, so that neither a process is forked
+    nor page cache is polluted.
+
+    :param dev: A device file, e.g. /dev/sda.
+    :param seek: Number of blocks to skip at the beginning of the device.
+    :param count: Number of blocks to write.
+    :param bs: Block size in bytes (Default: 1MiB).
+    :param ignore_end: Stop silently if the end of the device is reached.
+    """
+    LOG.debug('Zeroing out %s: bs=%s seek=%s count=%s' %
+              (dev, bs, seek, count))
+    flags = os.O_WRONLY
+    try:
+        fd = os.open(dev, flags | getattr(os, 'O_DIRECT', 0))
+    except OSError as e:
+        # NOTE: some file systems (e.g. tmpfs) don't support
+        # direct I/O
+        if e.errno != errno.EINVAL:
+            raise
+        fd = os.open(dev, flags)
+    try:
+        # NOTE: direct I/O requires aligned buffer, anonymous
+        # memory map is aligned to the page size and is filled with zeros
+        block = mmap.mmap(-1, bs)
+        try:
+            os.lseek(fd, seek * bs, os.SEEK_SET)
+            for _ in six.moves.range(count):
+                try:
+                    written = os.write(fd, block)
+                except OSError as e:
+                    if e.errno == errno.ENOSPC and ignore_end:
+                        break
+                    raise
+                if written < bs:
+                    if ignore_end:
+                        break
+                    raise IOError(errno.ENOSPC, os.strerror(errno.ENOSPC),
+                                  dev)
+        finally:
+            block.close()
+    finally:
+        os.close(fd)
+
+
+def init_http_request(url, byte_range=0, byte_range_end=None):
+    LOG.debug('Trying to initialize http request object %s, byte range: '
+              '%s-%s' % (url, byte_range, byte_range_end or ''))
     retry = 0
     while True:
         if (CONF.http_max_retries == 0) or retry <= CONF.http_max_retries:
@@ -205,7 +255,8 @@ def init_http_request(url, byte_range=0):
                 response_obj = requests.get(
                     url, stream=True,
                     timeout=CONF.http_request_timeout,
-                    headers={'Range': 'bytes=%s-' % byte_range})
+                    headers={'Range': 'bytes=%s-%s' % (
+                        byte_range, byte_range_end or '')})
             except (socket.timeout,
                     urllib3.exceptions.DecodeError,
                     urllib3.exceptions.ProxyError,
@@ -15,6 +15,7 @@
 #    under the License.
 
 from datetime import datetime
+import inspect
 import six
 import traceback
 
@@ -28,6 +29,7 @@ from nailgun.api.v1.validators.base import BasicValidator
 from nailgun.api.v1.validators.graph import GraphTasksValidator
 from nailgun import consts
 from nailgun.db import db
+from nailgun.db import get_revision
 from nailgun.errors import errors
 from nailgun.logger import logger
 from nailgun import objects
@@ -56,10 +58,16 @@ def load_db_driver(handler):
     only HTTPError should be rised up from this function. All another
     possible errors should be handle.
     """
+    streaming = False
     try:
         # execute handler and commit changes if all is ok
         response = handler()
         db.commit()
+        if inspect.isgenerator(response):
+            # streamed response is built from DB after handler returns,
+            # so session has to be kept until response is consumed
+            streaming = True
+            return _remove_db_session_after(response)
         return response
 
     except web.HTTPError:
@@ -80,6 +88,15 @@ def load_db_driver(handler):
         db.rollback()
         raise
 
+    finally:
+        if not streaming:
+            db.remove()
+
+
+def _remove_db_session_after(response):
+    try:
+        for chunk in response:
+            yield chunk
     finally:
         db.remove()
 
@@ -416,13 +433,110 @@ class CollectionHandler(BaseHandler):
     validator = BasicValidator
     eager = ()
 
+    #: serialize collection in GET chunk by chunk and send it
+    #: to client as it goes instead of building whole response at once
+    stream = False
+
+    def get_requested_fields(self):
+        """Get object fields requested with 'fields' parameter,
+        e.g. ?fields=id,status
+
+        :returns: tuple of fields or None if all fields are requested
+        :http: * 400 (unknown field is requested)
+        """
+        fields = web.input(fields=None).fields
+        if not fields:
+            return None
+
+        fields = tuple(f.strip() for f in fields.split(',') if f.strip())
+        unknown = set(fields) - set(self.collection.single.serializer.fields)
+        if unknown:
+            raise self.http(400, "Unknown fields requested: {0}".format(
+                ", ".join(sorted(unknown))))
+        return fields
+
+    def get_pagination(self):
+        """Get 'limit' and 'offset' parameters of request
+
+        :returns: (limit, offset) tuple, None for parameters not passed
+        :http: * 400 (invalid parameter value)
+        """
+        params = web.input(limit=None, offset=None)
+        pagination = []
+        for name in ('limit', 'offset'):
+            value = getattr(params, name)
+            if value is not None:
+                try:
+                    value = int(value)
+                except ValueError:
+                    value = -1
+                if value < 0:
+                    raise self.http(400, "Parameter '{0}' should be "
+                                         "a non-negative integer".format(name))
+            pagination.append(value)
+
+        limit, offset = pagination
+        if limit is not None and limit > settings.MAX_ITEMS_PER_PAGE:
+            raise self.http(400, "Parameter 'limit' should not be "
+                                 "greater than {0}".format(
+                                     settings.MAX_ITEMS_PER_PAGE))
+        return limit, offset
+
+    def render_collection(self, iterable):
+        """Serialize collection according to request parameters:
+        a page of it (limit, offset) with chosen object fields (fields).
+        Response is marked with weak ETag built from revision of
+        collection tables in DB, so clients polling collection can send
+        If-None-Match and get 304 while nothing is changed, without
+        collection being queried and serialized.
+
+        Whole collection is streamed, if handler streams responses
+        and no page is requested.
+
+        :returns: JSONized collection or generator of its chunks
+        :http: * 304 (collection matches If-None-Match header)
+               * 400 (invalid parameters)
+        """
+        fields = self.get_requested_fields()
+        limit, offset = self.get_pagination()
+        self.check_etag()
+
+        if limit is not None or offset is not None:
+            iterable = self.collection.paginate(iterable, limit, offset)
+        elif self.stream:
+            return self.collection.to_json_iter(iterable, fields=fields)
+        return self.collection.to_json(iterable, fields=fields)
+
+    def check_etag(self):
+        """Set weak ETag header built from revision of collection tables
+
+        Revision is read before data, so if data is changed
+        in the meantime, ETag is just outdated and the next request
+        gets the data again.
+
+        :raises: web.notmodified if If-None-Match header of request
+            contains the same ETag
+        """
+        etag = 'W/"{0}"'.format(
+            get_revision(self.collection.revision_tables))
+        web.header('ETag', etag)
+
+        if_none_match = web.ctx.env.get('HTTP_IF_NONE_MATCH', '')
+        # weak comparison, W/ prefix doesn't matter
+        tags = set(t.strip().replace('W/', '', 1)
+                   for t in if_none_match.split(','))
+        if etag[2:] in tags or '*' in tags:
+            raise web.notmodified()
+
     @content
     def GET(self):
         """:returns: Collection of JSONized REST objects.
         :http: * 200 (OK)
+               * 304 (collection is not modified)
+               * 400 (invalid pagination or fields parameters)
         """
         q = self.collection.eager(None, self.eager)
-        return self.collection.to_json(q)
+        return self.render_collection(q)
 
     @content
     def POST(self):
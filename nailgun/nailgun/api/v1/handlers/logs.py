@@ -18,8 +18,12 @@
 Handlers dealing with logs
 """
 
+import bisect
+import errno
+import hashlib
 from itertools import dropwhile
 import logging
+import multiprocessing
 import os
 import re
 import time
@@ -92,6 +96,194 @@ if settings.UI_LOG_DATE_FORMAT == '%Y-%m-%d %H:%M:%S':
     }
 
 
+# Same hack for comparing dates of log entries with requested dates
+def _fixed_date_tuple(date):
+    return (int(date[0:4]), int(date[5:7]), int(date[8:10]),
+            int(date[11:13]), int(date[14:16]), int(date[17:19]))
+
+
+DATE_TUPLE_PERFORMANCE_HACK = {
+    '%Y-%m-%dT%H:%M:%S': _fixed_date_tuple,
+    '%Y-%m-%d %H:%M:%S': _fixed_date_tuple,
+}
+
+
+def parse_log_date(date, date_format):
+    """Parses date of log entry into comparable tuple
+
+    :param date: date part of log entry
+    :param date_format: format of the date
+    :returns: tuple (year, month, day, hour, minute, second)
+    :raises: ValueError if date doesn't match the format
+    """
+    if date_format in DATE_TUPLE_PERFORMANCE_HACK:
+        return DATE_TUPLE_PERFORMANCE_HACK[date_format](date)
+    return tuple(time.strptime(date, date_format)[:6])
+
+
+class LogIndex(object):
+    """Sparse index of log entries offsets by their dates
+
+    Offset and date of a log entry are sampled every ``step`` lines.
+    The index is stored in LOG_INDEX_DIR, so a file is indexed once and
+    then only appended lines are indexed. Rotated or truncated file is
+    indexed from scratch. Indexing may be stopped by a deadline, then
+    only the beginning of the file is indexed and the next update
+    continues from there.
+
+    Entries are expected to be written in chronological order, samples
+    which are older than the previous one are not recorded.
+    """
+
+    version = 1
+    # number of bytes from the beginning of file to detect rotation
+    head_size = 1024
+
+    def __init__(self, log_file, regexp, date_format, step=None):
+        self.log_file = log_file
+        self.index_file = os.path.join(
+            settings.LOG_INDEX_DIR,
+            '{0}.idx'.format(
+                hashlib.md5(os.path.abspath(log_file)).hexdigest()))
+        self.regexp = regexp
+        self.date_format = date_format
+        self.step = step or settings.LOG_INDEX_STEP
+        self.reset()
+
+    def reset(self, inode=None):
+        self.inode = inode
+        self.head = None
+        # number of indexed bytes, always ends on a line boundary
+        self.size = 0
+        self.lines = 0
+        self.pending = False
+        self.offsets = []
+        self.dates = []
+
+    def load(self):
+        try:
+            with open(self.index_file, 'r') as f:
+                data = jsonutils.load(f)
+        except (IOError, ValueError):
+            return
+
+        if data.get('version') != self.version or \
+                data.get('step') != self.step:
+            return
+
+        self.inode = data['inode']
+        self.head = data['head']
+        self.size = data['size']
+        self.lines = data['lines']
+        self.pending = data['pending']
+        self.offsets = data['offsets']
+        self.dates = [tuple(d) for d in data['dates']]
+
+    def save(self):
+        tmp_file = '{0}.{1}'.format(self.index_file, os.getpid())
+        try:
+            try:
+                os.makedirs(os.path.dirname(self.index_file))
+            except OSError as exc:
+                if exc.errno != errno.EEXIST:
+                    raise
+            with open(tmp_file, 'w') as f:
+                jsonutils.dump({
+                    'version': self.version,
+                    'step': self.step,
+                    'inode': self.inode,
+                    'head': self.head,
+                    'size': self.size,
+                    'lines': self.lines,
+                    'pending': self.pending,
+                    'offsets': self.offsets,
+                    'dates': self.dates,
+                }, f)
+            os.rename(tmp_file, self.index_file)
+        except (IOError, OSError) as exc:
+            logger.warning("Unable to save index of log file %r: %s",
+                           self.log_file, exc)
+            try:
+                os.remove(tmp_file)
+            except OSError:
+                pass
+
+    def update(self, deadline=None):
+        """Indexes lines written since the last update
+
+        :param deadline: time after which indexing is stopped or None
+        """
+        self.load()
+        stat = os.stat(self.log_file)
+        with open(self.log_file, 'rb') as f:
+            if self.inode != stat.st_ino or self.size > stat.st_size or \
+                    self.head != self._read_head(f):
+                self.reset(stat.st_ino)
+            if self._index(f, deadline):
+                self.head = self._read_head(f)
+                self.save()
+
+    def _read_head(self, f):
+        f.seek(0, os.SEEK_SET)
+        return hashlib.md5(
+            f.read(min(self.head_size, self.size))).hexdigest()
+
+    def _index(self, f, deadline=None):
+        f.seek(self.size, os.SEEK_SET)
+        offset = self.size
+        for line in f:
+            # last line may be still being written
+            if not line.endswith('\n'):
+                break
+            if self.lines % self.step == 0:
+                if deadline is not None and time.time() > deadline:
+                    break
+                self.pending = True
+            self.lines += 1
+            if self.pending:
+                date = self._parse_date(line)
+                if date is not None and \
+                        (not self.dates or date >= self.dates[-1]):
+                    self.offsets.append(offset)
+                    self.dates.append(date)
+                    self.pending = False
+            offset += len(line)
+
+        indexed = offset != self.size
+        self.size = offset
+        return indexed
+
+    def _parse_date(self, line):
+        m = self.regexp.match(line.rstrip('\n'))
+        if m is None:
+            return None
+        try:
+            return parse_log_date(m.group('date'), self.date_format)
+        except ValueError:
+            return None
+
+    def bounds(self, date_after=None, date_before=None):
+        """Returns byte range of the log file with entries between dates
+
+        :param date_after: tuple with the earliest date or None
+        :param date_before: tuple with the latest date or None
+        :returns: tuple (lower, upper) where upper is None if entries
+            may be found up to the end of file
+        """
+        # entries after indexed part of the file are newer than indexed
+        # ones, so they are cut off only by an upper bound from the index
+        lower, upper = 0, None
+        if date_after is not None:
+            i = bisect.bisect_left(self.dates, date_after) - 1
+            if i >= 0:
+                lower = self.offsets[i]
+        if date_before is not None:
+            i = bisect.bisect_right(self.dates, date_before)
+            if i < len(self.offsets):
+                upper = self.offsets[i]
+        return lower, upper
+
+
 def read_log(
         log_file=None,
         level=None,
@@ -101,6 +293,10 @@ def read_log(
         from_byte=-1,
         fetch_older=False,
         to_byte=0,
+        date_after=None,
+        date_before=None,
+        search=None,
+        deadline=None,
         **kwargs):
     has_more = False
     entries = []
@@ -125,6 +321,20 @@ def read_log(
             time.strptime(date, log_date_format)
         )
 
+    # seek to entries of requested dates instead of reading whole file
+    lower_byte, upper_byte = 0, None
+    if date_after or date_before:
+        if date_after:
+            date_after = tuple(date_after[:6])
+        if date_before:
+            date_before = tuple(date_before[:6])
+        index = LogIndex(log_file, regexp, log_date_format)
+        index_deadline = time.time() + settings.LOG_INDEX_TIMEOUT
+        if deadline is not None:
+            index_deadline = min(index_deadline, deadline)
+        index.update(deadline=index_deadline)
+        lower_byte, upper_byte = index.bounds(date_after, date_before)
+
     with open(log_file, 'r') as f:
         # we need to calculate current position manually instead of using
         # tell() because read_backwards uses buffering
@@ -132,12 +342,19 @@ def read_log(
         pos = f.tell()
         if from_byte != -1 and fetch_older:
             pos = from_byte
+        if upper_byte is not None:
+            pos = min(pos, upper_byte)
         multilinebuf = []
         for line in read_backwards(f, from_byte=pos):
             pos -= len(line)
             if not fetch_older and pos < to_byte:
                 has_more = pos > 0
                 break
+            if pos < lower_byte:
+                break
+            if deadline is not None and time.time() > deadline:
+                has_more = True
+                break
             entry = line.rstrip('\n')
             if not len(entry):
                 continue
@@ -160,7 +377,15 @@ def read_log(
             entry_level = m.group('level').upper() or 'INFO'
             if level and not (entry_level in allowed_levels):
                 continue
+            if search and not search.search(entry_text):
+                continue
             try:
+                if date_after or date_before:
+                    entry_time = parse_log_date(m.group('date'),
+                                                log_date_format)
+                    if date_after and entry_time < date_after or \
+                            date_before and entry_time > date_before:
+                        continue
                 entry_date = strptime_function(m.group('date'))
             except ValueError:
                 logger.debug("Unable to parse date from log entry."
@@ -181,7 +406,7 @@ def read_log(
 
         if fetch_older or (not fetch_older and from_byte == -1):
             from_byte = pos
-            if from_byte == 0:
+            if from_byte <= lower_byte:
                 has_more = False
 
     return {
@@ -192,6 +417,96 @@ def read_log(
     }
 
 
+def get_node_log_dir(node, log_config):
+    """Returns directory with logs of the node received by remote syslog"""
+    if node.status == consts.NODE_STATUSES.discover:
+        ndir = node.ip
+    else:
+        ndir = node.fqdn
+    return os.path.join(log_config['base'], ndir)
+
+
+def search_log(args):
+    """Searches entries of one log file, runs in a worker process
+
+    :param args: tuple (node_id, log_config, log_file, params) where
+        params are keyword arguments of :func:`read_log`, regular
+        expressions are passed as strings
+    :returns: tuple (entries, has_more)
+    """
+    node_id, log_config, log_file, params = args
+    try:
+        result = read_log(
+            log_file=log_file,
+            log_config=log_config,
+            regexp=re.compile(log_config['regexp']),
+            search=re.compile(params.pop('search')),
+            **params)
+    except (IOError, OSError) as exc:
+        logger.warning("Unable to search in log file %r: %s", log_file, exc)
+        return [], False
+
+    entries = [
+        {
+            'date': date,
+            'level': level,
+            'text': text,
+            'node': node_id,
+            'source': log_config['id'],
+        }
+        for date, level, text in result['entries']
+    ]
+    return entries, result['has_more']
+
+
+def search_logs(tasks, max_entries, timeout):
+    """Searches log files in parallel processes
+
+    Every process stops when it finds max_entries of the latest entries
+    or when the timeout expires, so the search returns in time even if
+    some of the files are huge.
+
+    :param tasks: list of arguments for :func:`search_log`
+    :param max_entries: maximum number of returned entries
+    :param timeout: time limit of the search in seconds
+    :returns: tuple (entries ordered from the latest, has_more)
+    """
+    if not tasks:
+        return [], False
+
+    deadline = time.time() + timeout
+    for _, _, _, params in tasks:
+        params['max_entries'] = max_entries
+        params['deadline'] = deadline
+
+    entries = []
+    has_more = False
+    pool = multiprocessing.Pool(min(settings.LOG_SEARCH_WORKERS, len(tasks)))
+    try:
+        results = pool.imap_unordered(search_log, tasks)
+        for _ in tasks:
+            # give workers a second to return what they've found so far
+            wait = max(0, deadline - time.time()) + 1
+            try:
+                file_entries, file_has_more = results.next(timeout=wait)
+            except multiprocessing.TimeoutError:
+                logger.warning("Search in logs has timed out")
+                has_more = True
+                break
+            entries.extend(file_entries)
+            has_more = has_more or file_has_more
+    finally:
+        pool.terminate()
+        pool.join()
+
+    entries.sort(
+        key=lambda e: parse_log_date(e['date'], settings.UI_LOG_DATE_FORMAT),
+        reverse=True)
+    if len(entries) > max_entries:
+        has_more = True
+    return entries[:max_entries], has_more
+
+
 class LogEntryCollectionHandler(BaseHandler):
     """Log entry collection handler
     """
@@ -318,12 +633,7 @@ class LogEntryCollectionHandler(BaseHandler):
                 logger.error('Node %r has no assigned ip', node.id)
                 raise self.http(500, "Node has no assigned ip")
 
-            if node.status == consts.NODE_STATUSES.discover:
-                ndir = node.ip
-            else:
-                ndir = node.fqdn
-
-            remote_log_dir = os.path.join(log_config['base'], ndir)
+            remote_log_dir = get_node_log_dir(node, log_config)
             if not os.path.exists(remote_log_dir):
                 logger.debug("Log files dir %r for node %s not found",
                              remote_log_dir, node.id)
@@ -453,11 +763,7 @@ class LogSourceByNodeCollectionHandler(BaseHandler):
                 else:
                     return ''
             else:
-                if node.status == consts.NODE_STATUSES.discover:
-                    ndir = node.ip
-                else:
-                    ndir = node.fqdn
-                return os.path.join(x['base'], ndir, x['path'])
+                return os.path.join(get_node_log_dir(node, x), x['path'])
 
         f = lambda x: (
             x.get('remote') and x.get('path') and x.get('base') and
@@ -465,3 +771,73 @@ class LogSourceByNodeCollectionHandler(BaseHandler):
         )
         sources = filter(f, settings.LOGS)
         return sources
+
+
+class LogSearchHandler(BaseHandler):
+    """Log search handler
+    """
+
+    @content
+    def GET(self, cluster_id):
+        """Searches entries matching the pattern in remote logs of all
+        nodes of the cluster. Receives following parameters:
+
+        - *pattern* - regular expression to search in entries text
+        - *source* - source of logs, may be given several times
+          (all remote sources by default)
+        - *level* - minimal log level (all levels by default)
+        - *max_entries* - max number of entries to load
+
+        :returns: Collection of found entries ordered from the latest
+            and if there are more entries.
+        :http:
+            * 200 (OK)
+            * 400 (invalid *pattern* value)
+            * 400 (invalid *max_entries* value)
+            * 404 (cluster not found in db)
+        """
+        cluster = self.get_object_or_404(objects.Cluster, cluster_id)
+        user_data = web.input(source=[])
+
+        pattern = user_data.get('pattern')
+        if not pattern:
+            raise self.http(400, "'pattern' must be specified")
+        try:
+            re.compile(pattern)
+        except re.error:
+            logger.debug("Invalid 'pattern' value: %r", pattern)
+            raise self.http(400, "Invalid 'pattern' value")
+
+        try:
+            max_entries = int(user_data.get('max_entries',
+                                            settings.TRUNCATE_LOG_ENTRIES))
+        except ValueError:
+            logger.debug("Invalid 'max_entries' value: %r",
+                         user_data.get('max_entries'))
+            raise self.http(400, "Invalid 'max_entries' value")
+
+        level = user_data.get('level')
+        log_configs = [
+            lc for lc in settings.LOGS
+            if lc['remote'] and not lc.get('fake') and
+            (not user_data.source or lc['id'] in user_data.source) and
+            (not level or level in lc['levels'])
+        ]
+
+        tasks = []
+        for node in cluster.nodes:
+            if not node.ip:
+                continue
+            for log_config in log_configs:
+                log_file = os.path.join(get_node_log_dir(node, log_config),
+                                        log_config['path'])
+                if os.path.isfile(log_file):
+                    tasks.append((node.id, log_config, log_file,
+                                  {'search': pattern, 'level': level}))
+
+        entries, has_more = search_logs(
+            tasks, max_entries, settings.LOG_SEARCH_TIMEOUT)
+        return {
+            'entries': entries,
+            'has_more': has_more,
+        }
@@ -79,6 +79,7 @@ class NodeCollectionHandler(CollectionHandler):
 
     validator = NodeValidator
     collection = objects.NodeCollection
+    stream = True
 
     @content
     def GET(self):
@@ -87,6 +88,8 @@ class NodeCollectionHandler(CollectionHandler):
 
         :returns: Collection of JSONized Node objects.
         :http: * 200 (OK)
+               * 304 (collection is not modified)
+               * 400 (invalid pagination or fields parameters)
         """
         cluster_id = web.input(cluster_id=None).cluster_id
         nodes = self.collection.eager_nodes_handlers(None)
@@ -96,7 +99,7 @@ class NodeCollectionHandler(CollectionHandler):
         elif cluster_id:
             nodes = nodes.filter_by(cluster_id=cluster_id)
 
-        return self.collection.to_json(nodes)
+        return self.render_collection(nodes)
 
     @content
     def PUT(self):
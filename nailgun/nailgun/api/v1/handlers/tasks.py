@@ -74,13 +74,15 @@ class TaskCollectionHandler(CollectionHandler):
 
         :returns: Collection of JSONized Task objects.
         :http: * 200 (OK)
+               * 304 (collection is not modified)
+               * 400 (invalid pagination or fields parameters)
                * 404 (task not found in db)
         """
         cluster_id = web.input(cluster_id=None).cluster_id
 
         if cluster_id is not None:
-            return self.collection.to_json(
+            return self.render_collection(
                 self.collection.get_by_cluster_id(cluster_id)
             )
         else:
-            return self.collection.to_json()
+            return self.render_collection(self.collection.all())
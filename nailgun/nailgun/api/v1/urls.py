@@ -40,6 +40,7 @@ from nailgun.api.v1.handlers.cluster import VmwareAttributesHandler
 from nailgun.api.v1.handlers.logs import LogEntryCollectionHandler
 from nailgun.api.v1.handlers.logs import LogPackageDefaultConfig
 from nailgun.api.v1.handlers.logs import LogPackageHandler
+from nailgun.api.v1.handlers.logs import LogSearchHandler
 from nailgun.api.v1.handlers.logs import LogSourceByNodeCollectionHandler
 from nailgun.api.v1.handlers.logs import LogSourceCollectionHandler
 from nailgun.api.v1.handlers.logs import SnapshotDownloadHandler
@@ -236,6 +237,8 @@ urls = (
     LogSourceCollectionHandler,
     r'/logs/sources/nodes/(?P<node_id>\d+)/?$',
     LogSourceByNodeCollectionHandler,
+    r'/logs/search/clusters/(?P<cluster_id>\d+)/?$',
+    LogSearchHandler,
 
     r'/tracking/registration/?$',
     FuelRegistrationForm,
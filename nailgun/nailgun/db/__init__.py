@@ -18,5 +18,6 @@ from nailgun.db.sqlalchemy import db
 from nailgun.db.sqlalchemy import dropdb
 from nailgun.db.sqlalchemy import engine
 from nailgun.db.sqlalchemy import flush
+from nailgun.db.sqlalchemy import get_revision
 from nailgun.db.sqlalchemy import NoCacheQuery
 from nailgun.db.sqlalchemy import syncdb
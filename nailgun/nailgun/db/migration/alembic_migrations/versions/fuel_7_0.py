@@ -54,9 +54,13 @@ def upgrade():
     upgrade_node_roles_metadata()
     node_roles_as_plugin_upgrade()
     migrate_volumes_into_extension_upgrade()
+    extend_cluster_model_upgrade()
+    db_revision_upgrade()
 
 
 def downgrade():
+    db_revision_downgrade()
+    extend_cluster_model_downgrade()
     migrate_volumes_into_extension_downgrade()
     node_roles_as_plugin_downgrade()
     extend_plugin_model_downgrade()
@@ -91,6 +95,33 @@ def extend_node_model_downgrade():
     op.drop_column('node_nic_interfaces', 'offloading_modes')
 
 
+def extend_cluster_model_upgrade():
+    op.add_column(
+        'clusters',
+        sa.Column('deployment_revision',
+                  sa.Integer(),
+                  nullable=False,
+                  server_default='0'))
+
+
+def extend_cluster_model_downgrade():
+    op.drop_column('clusters', 'deployment_revision')
+
+
+def db_revision_upgrade():
+    op.execute('CREATE SEQUENCE db_revision')
+    op.create_table(
+        'db_revisions',
+        sa.Column('table_name', sa.String(64), primary_key=True),
+        sa.Column('revision', sa.BigInteger(), nullable=False),
+    )
+
+
+def db_revision_downgrade():
+    op.drop_table('db_revisions')
+    op.execute('DROP SEQUENCE db_revision')
+
+
 def extend_ip_addrs_model_upgrade():
     op.alter_column('ip_addrs', 'vip_type',
                     type_=sa.String(length=50),
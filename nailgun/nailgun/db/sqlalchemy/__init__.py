@@ -15,8 +15,12 @@
 #    under the License.
 
 import contextlib
+import re
 
+import sqlalchemy as sa
 from sqlalchemy import create_engine
+from sqlalchemy import exc as sa_exc
+from sqlalchemy import event
 from sqlalchemy import schema
 
 from sqlalchemy import MetaData
@@ -26,9 +30,12 @@ from sqlalchemy.orm import Session
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.orm.query import Query
 
+import six
+
 from nailgun.db.deadlock_detector import clean_locks
 from nailgun.db.deadlock_detector import handle_lock
 from nailgun.db.sqlalchemy import utils
+from nailgun.logger import logger
 from nailgun.settings import settings
 
 
@@ -88,6 +95,115 @@ db = scoped_session(
 )
 
 
+#: name of sequence which is increased after every commit changing data
+REVISION_SEQUENCE = 'db_revision'
+
+#: revisions of tables, every row keeps the value REVISION_SEQUENCE had
+#: when data of the table was changed last time
+revisions_table = sa.table(
+    'db_revisions',
+    sa.column('table_name'),
+    sa.column('revision'),
+)
+
+#: table name for modifying statements which table is not recognized,
+#: its revision is a part of revision of any set of tables
+UNKNOWN_TABLE = '*'
+
+_modified_table_re = re.compile(
+    r'^\s*(?:INSERT\s+INTO|UPDATE|DELETE\s+FROM)\s+(?:ONLY\s+)?"?(\w+)"?',
+    re.IGNORECASE)
+
+#: statements which could change data, WITH ones are never recognized
+_modifying_prefixes = ('INSERT', 'UPDATE', 'DELETE', 'WITH')
+
+
+def _mark_modifying_statement(conn, cursor, statement, parameters,
+                              context, executemany):
+    if statement.lstrip()[:6].upper().startswith(_modifying_prefixes):
+        match = _modified_table_re.match(statement)
+        table_name = match.group(1) if match else UNKNOWN_TABLE
+        if table_name != revisions_table.name:
+            conn.info.setdefault('modified', set()).add(table_name)
+
+
+def _remember_connection(session, transaction, connection):
+    connection.info.pop('modified', None)
+    session.info.setdefault('connections', []).append(connection)
+
+
+def _increase_revision(session):
+    connections = session.info.pop('connections', [])
+    modified = set()
+    for connection in connections:
+        modified.update(connection.info.pop('modified', ()))
+    if not modified:
+        return
+    # NOTE: revisions are increased only after changes are committed,
+    # so a reader never gets the new revision together with old data.
+    # Tables are updated in the same order by everyone to avoid deadlocks.
+    # Revision of a table could be inserted concurrently by another
+    # process, then it's just updated on the second attempt.
+    for attempt in six.moves.range(2):
+        try:
+            with engine.begin() as conn:
+                for table_name in sorted(modified):
+                    _set_revision(conn, table_name)
+            return
+        except sa_exc.IntegrityError:
+            continue
+        except sa_exc.DBAPIError as exc:
+            # changes are committed already, so it's too late to fail
+            # here, e.g. when revisions are not created by migrations yet
+            logger.warning("Failed to increase revision of DB: %s", exc)
+            return
+
+
+def _set_revision(conn, table_name):
+    revision = sa.func.nextval(REVISION_SEQUENCE)
+    updated = conn.execute(
+        revisions_table.update().where(
+            revisions_table.c.table_name == table_name
+        ).values(revision=revision))
+    if not updated.rowcount:
+        conn.execute(revisions_table.insert().values(
+            table_name=table_name, revision=revision))
+
+
+def _forget_connections(session):
+    for connection in session.info.pop('connections', []):
+        connection.info.pop('modified', None)
+
+
+event.listen(engine, 'after_cursor_execute', _mark_modifying_statement)
+event.listen(Session, 'after_begin', _remember_connection)
+event.listen(Session, 'after_commit', _increase_revision)
+event.listen(Session, 'after_rollback', _forget_connections)
+
+
+def get_revision(tables=None):
+    """Get revision of data in database
+
+    Revision is increased after every committed transaction which
+    inserts, updates or deletes anything, so it's a cheap way to find out
+    if data could have been changed since the revision was read last time.
+    Revision of given tables is increased only by transactions changing
+    data of these tables (or of tables which couldn't be recognized).
+
+    :param tables: names of tables to get revision of, all tables if None
+    :returns: revision as integer, 0 if nothing has been changed yet
+    """
+    if tables is None:
+        return db().execute(
+            "SELECT CASE WHEN is_called THEN last_value ELSE 0 END "
+            "FROM {0}".format(REVISION_SEQUENCE)).scalar()
+    return db().execute(
+        sa.select([sa.func.coalesce(sa.func.max(
+            revisions_table.c.revision), 0)]).where(
+            revisions_table.c.table_name.in_(
+                list(tables) + [UNKNOWN_TABLE]))).scalar()
+
+
 def syncdb():
     from nailgun.db.migration import do_upgrade_head
     do_upgrade_head()
@@ -140,6 +256,12 @@ def dropdb():
 
     for tp in custom_types:
         conn.execute("DROP TYPE {0}".format(tp[1]))
+
+    # sequences which are not owned by dropped tables
+    sequences = conn.execute(
+        "SELECT relname FROM pg_class WHERE relkind = 'S'")
+    for seq in sequences:
+        conn.execute("DROP SEQUENCE {0}".format(seq[0]))
     trans.commit()
     migration.drop_migration_meta(engine)
     conn.close()
@@ -100,6 +100,8 @@ class Cluster(Base):
     is_customized = Column(Boolean, default=False)
     fuel_version = Column(Text, nullable=False)
     deployment_tasks = Column(JSON, default=[])
+    deployment_revision = Column(Integer, nullable=False, default=0,
+                                 server_default='0')
 
     @property
     def changes(self):
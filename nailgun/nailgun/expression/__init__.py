@@ -14,6 +14,26 @@
 
 
 from nailgun.expression.expression_parser import parse
+from nailgun.expression.objects import ExpressionContext
+from nailgun.settings import settings
+from nailgun import utils
+
+
+#: expressions parsed by their text, shared by the whole process
+_compiled_expressions = utils.LRUCache(settings.EXPRESSION_CACHE_SIZE)
+
+
+def compile_expression(expression_text):
+    """Parse expression text once and reuse the result afterwards
+
+    :param expression_text: text of expression
+    :returns: callable which takes ExpressionContext
+    """
+    compiled_expression = _compiled_expressions.get(expression_text)
+    if compiled_expression is None:
+        compiled_expression = parse(expression_text)
+        _compiled_expressions.set(expression_text, compiled_expression)
+    return compiled_expression
 
 
 class Expression(object):
@@ -21,7 +41,20 @@ class Expression(object):
         self.expression_text = expression_text
         self.models = models if models is not None else {}
         self.strict = strict
-        self.compiled_expression = parse(self)
+        self.compiled_expression = compile_expression(expression_text)
+
+    def evaluate(self, models=None, context=None):
+        """Evaluate expression
+
+        Compiled expression keeps no state, so the same expression can
+        be evaluated against different models, even in parallel.
 
-    def evaluate(self):
-        return self.compiled_expression()
+        :param models: models to use instead of the ones passed
+            to constructor
+        :param context: ExpressionContext to evaluate in, it allows
+            to share resolved values of models between expressions
+        """
+        if context is None:
+            context = ExpressionContext(
+                self.models if models is None else models, self.strict)
+        return self.compiled_expression(context)
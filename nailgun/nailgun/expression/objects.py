@@ -17,28 +17,25 @@ class ScalarWrapper(object):
     def __init__(self, value):
         self.value = value
 
-    def evaluate(self):
+    def evaluate(self, context):
         return self.value
 
-    def __call__(self):
-        return self.value
+    __call__ = evaluate
 
 
 class SubexpressionWrapper(object):
     def __init__(self, subexpression):
         self.subexpression = subexpression
 
-    def evaluate(self):
-        self.value = self.subexpression()
-        return self.value
+    def evaluate(self, context):
+        return self.subexpression(context)
 
-    def __call__(self):
-        self.evaluate()
-        return self.value
+    __call__ = evaluate
 
 
 class ModelPath(object):
     def __init__(self, path):
+        self.path = path
         path_parts = path.split(':')
         if len(path_parts) == 1:
             self.model_name = 'default'
@@ -46,39 +43,56 @@ class ModelPath(object):
         else:
             self.model_name = path_parts[0]
             self.attribute = path_parts[1]
+        self.attribute_path = self.attribute.split('.')
 
-    def set_model(self, models):
+    def get_model(self, models):
         if self.model_name not in models:
             raise KeyError('No model with name "{0}" defined'.format(
                 self.model_name))
-        self.model = models[self.model_name]
+        return models[self.model_name]
 
-    def get_value(self):
-        def get_attribute_value(model, path):
-            value = model[path.pop(0)]
-            return get_attribute_value(value, path) if len(path) else value
-        return get_attribute_value(self.model, self.attribute.split('.'))
+    def get_value(self, model):
+        value = model
+        for attribute in self.attribute_path:
+            value = value[attribute]
+        return value
 
 
 class ModelPathWrapper(object):
-    def __init__(self, path, expression):
+    def __init__(self, path):
         self.path = path
         self.model_path = ModelPath(path)
-        self.expression = expression
-
-    def evaluate(self):
-        self.model_path.set_model(self.expression.models)
-        result = None
-        try:
-            result = self.model_path.get_value()
-        except (KeyError, AttributeError):
-            if self.expression.strict:
-                raise TypeError(
-                    'Value of {0} is undefined. Set options.strict'
-                    ' to false to allow undefined values.'.format(self.path))
-        self.value = result
-        return self.model_path
-
-    def __call__(self):
-        self.evaluate()
-        return self.value
+
+    def evaluate(self, context):
+        return context.get_value(self.model_path)
+
+    __call__ = evaluate
+
+
+class ExpressionContext(object):
+    """Models which expressions are evaluated against
+
+    Values of model paths are resolved once and remembered, so the same
+    context should be used to evaluate many expressions against models
+    which do not change in between.
+    """
+
+    def __init__(self, models, strict=True):
+        self.models = models
+        self.strict = strict
+        self._values = {}
+
+    def get_value(self, model_path):
+        if model_path.path not in self._values:
+            model = model_path.get_model(self.models)
+            try:
+                value = model_path.get_value(model)
+            except (KeyError, AttributeError):
+                if self.strict:
+                    raise TypeError(
+                        'Value of {0} is undefined. Set options.strict'
+                        ' to false to allow undefined values.'.format(
+                            model_path.path))
+                value = None
+            self._values[model_path.path] = value
+        return self._values[model_path.path]
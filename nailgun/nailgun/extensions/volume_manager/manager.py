@@ -220,14 +220,12 @@ class DisksFormatConvertor(object):
     def format_disks_to_full(cls, node, disks):
         '''convert disks from simple format to full format
         '''
-        full_format = []
-        volume_manager = node.volume_manager
-        for disk in disks:
-            for volume in disk['volumes']:
-                full_format = volume_manager.set_volume_size(
-                    disk['id'], volume['name'], volume['size'])
+        sizes = [(disk['id'], volume['name'], volume['size'])
+                 for disk in disks for volume in disk['volumes']]
+        if not sizes:
+            return []
 
-        return full_format
+        return node.volume_manager.set_volumes_sizes(sizes)
 
     @classmethod
     def format_disks_to_simple(cls, full):
@@ -432,11 +430,14 @@ class Disk(object):
             self.volumes.append(
                 {'type': 'lvm_meta_pool', 'size': self.get_size(size)})
 
+    def _get_lvm_meta_pool(self):
+        return next(volume for volume in self.volumes
+                    if volume['type'] == 'lvm_meta_pool')
+
     def get_lvm_meta_from_pool(self):
         """Take lvm meta from lvm meta pool
         """
-        lvm_meta_pool = filter(
-            lambda volume: volume['type'] == 'lvm_meta_pool', self.volumes)[0]
+        lvm_meta_pool = self._get_lvm_meta_pool()
 
         if lvm_meta_pool['size'] >= self.lvm_meta_size:
             lvm_meta_pool['size'] -= self.lvm_meta_size
@@ -449,8 +450,7 @@ class Disk(object):
     def put_size_to_lvm_meta_pool(self, size):
         """Return back lvm meta to pool
         """
-        lvm_meta_pool = filter(
-            lambda volume: volume['type'] == 'lvm_meta_pool', self.volumes)[0]
+        lvm_meta_pool = self._get_lvm_meta_pool()
 
         lvm_meta_pool['size'] += size
 
@@ -505,8 +505,7 @@ class Disk(object):
         """
         for i, volume in enumerate(self.volumes[:]):
             if volume.get('type') == 'pv' and volume.get('vg') == name:
-                lvm_meta_pool = filter(
-                    lambda v: v['type'] == 'lvm_meta_pool', self.volumes)[0]
+                lvm_meta_pool = self._get_lvm_meta_pool()
 
                 # Return back size to lvm_meta_pool
                 lvm_meta_pool['size'] += volume['lvm_meta_size']
@@ -525,6 +524,7 @@ class Disk(object):
                 # Recreate lvm meta
                 self.remove_pv(name)
                 self.create_pv({"id": name}, size)
+                break
 
     def set_partition_size(self, name, size):
         """Set partition size
@@ -588,17 +588,25 @@ class VolumeManager(object):
         # and volume groups which we should to allocate
         if node.cluster:
             self.allowed_volumes = get_node_spaces(node)
+        self.allowed_volumes_by_id = dict(
+            (volume['id'], volume) for volume in self.allowed_volumes)
 
-        self.disks = []
-        for d in sorted(node.meta['disks'], key=lambda i: i['name']):
-            disks_count = len(node.meta["disks"])
-            boot_is_raid = True if disks_count > 1 else False
+        self.generators = self._get_generators()
 
-            existing_disk = filter(
-                lambda disk: d['disk'] == disk['id'],
-                only_disks(self.volumes))
+        existing_disks = {}
+        for disk in only_disks(self.volumes):
+            existing_disks.setdefault(disk['id'], disk)
 
-            disk_volumes = existing_disk[0].get(
+        disks_count = len(node.meta["disks"])
+        boot_is_raid = True if disks_count > 1 else False
+        # Count of possible PVs equal to count of allowed VGs
+        possible_pvs_count = len(only_vg(self.allowed_volumes))
+
+        self.disks = []
+        self.disks_by_id = {}
+        for d in sorted(node.meta['disks'], key=lambda i: i['name']):
+            existing_disk = existing_disks.get(d['disk'])
+            disk_volumes = existing_disk.get(
                 'volumes', []) if existing_disk else []
 
             disk = Disk(
@@ -608,56 +616,67 @@ class VolumeManager(object):
                 d["name"],
                 byte_to_megabyte(d["size"]),
                 boot_is_raid=boot_is_raid,
-                # Count of possible PVs equal to count of allowed VGs
-                possible_pvs_count=len(only_vg(self.allowed_volumes)),
+                possible_pvs_count=possible_pvs_count,
                 disk_extra=d.get("extra", []))
 
             self.disks.append(disk)
+            self.disks_by_id.setdefault(disk.id, disk)
 
-        self.__logger('Initialized with node: %s' % node.full_name)
-        self.__logger('Initialized with volumes: %s' % self.volumes)
-        self.__logger('Initialized with disks: %s' % self.disks)
+        self.__logger('Initialized with node: %s', node.full_name)
+        self.__logger('Initialized with volumes: %s', self.volumes)
+        self.__logger('Initialized with disks: %s', self.disks)
 
     def set_volume_size(self, disk_id, volume_name, size):
         """Set size of volume
         """
-        self.__logger('Update volume size for disk=%s volume_name=%s size=%s' %
-                      (disk_id, volume_name, size))
+        return self.set_volumes_sizes([(disk_id, volume_name, size)])
+
+    def set_volumes_sizes(self, sizes):
+        """Set sizes of several volumes at once
+
+        Disks and volume groups are rendered once after all sizes are
+        set, it gives the same result as setting sizes one by one.
+
+        :param sizes: list of tuples (disk_id, volume_name, size)
+        """
+        updated_disks = set()
+        for disk_id, volume_name, size in sizes:
+            self.__logger(
+                'Update volume size for disk=%s volume_name=%s size=%s',
+                disk_id, volume_name, size)
+
+            disk = self.disks_by_id[disk_id]
 
-        disk = filter(lambda disk: disk.id == disk_id, self.disks)[0]
+            volume_type = self.get_space_type(volume_name)
+            if volume_type == 'partition':
+                disk.set_partition_size(volume_name, size)
+            elif volume_type == 'vg':
+                disk.set_pv_size(volume_name, size)
+            elif volume_type == 'raid':
+                disk.set_raid_size(volume_name, size)
 
-        volume_type = self.get_space_type(volume_name)
-        if volume_type == 'partition':
-            disk.set_partition_size(volume_name, size)
-        elif volume_type == 'vg':
-            disk.set_pv_size(volume_name, size)
-        elif volume_type == 'raid':
-            disk.set_raid_size(volume_name, size)
+            updated_disks.add(disk.id)
 
         for idx, volume in enumerate(self.volumes):
-            if volume.get('id') == disk.id:
-                self.volumes[idx] = disk.render()
+            if volume.get('id') in updated_disks:
+                self.volumes[idx] = self.disks_by_id[volume['id']].render()
 
         # Recalculate sizes of volume groups
         for idx, volume in enumerate(self.volumes):
             if volume.get('type') == 'vg':
-                vg_id = volume.get('id')
-                vg_template = filter(
-                    lambda volume: volume.get('id') == vg_id,
-                    self.allowed_volumes)[0]
-
+                vg_template = self.allowed_volumes_by_id[volume.get('id')]
                 self.volumes[idx] = self.expand_generators(vg_template)
 
-        self.__logger('Updated volume size %s' % self.volumes)
+        self.__logger('Updated volume size %s', self.volumes)
         return self.volumes
 
     def get_space_type(self, volume_name):
         """Get type of space which represents on disk
         as volume with volume_name
         """
-        for volume in self.allowed_volumes:
-            if volume['id'] == volume_name:
-                return volume['type']
+        volume = self.allowed_volumes_by_id.get(volume_name)
+        if volume is not None:
+            return volume['type']
 
     def get_pv_size(self, disk_id, volume_name):
         """Get PV size without lvm meta size
@@ -684,7 +703,7 @@ class VolumeManager(object):
 
         return size
 
-    def call_generator(self, generator, *args):
+    def _get_generators(self):
         generators = {
             # Calculate swap space based on total RAM
             'calc_swap_size': self._calc_swap_size,
@@ -717,14 +736,16 @@ class VolumeManager(object):
 
         generators['calc_os_vg_size'] = generators['calc_os_size']
         generators['calc_min_os_size'] = generators['calc_os_size']
+        return generators
 
-        if generator not in generators:
+    def call_generator(self, generator, *args):
+        if generator not in self.generators:
             raise errors.CannotFindGenerator(
                 u'Cannot find generator %s' % generator)
 
-        result = generators[generator](*args)
-        self.__logger('Generator %s with args %s returned result: %s' %
-                      (generator, args, result))
+        result = self.generators[generator](*args)
+        self.__logger('Generator %s with args %s returned result: %s',
+                      generator, args, result)
         return result
 
     def _calc_root_size(self):
@@ -775,28 +796,27 @@ class VolumeManager(object):
 
     def _allocate_all_free_space_for_volume(self, volume_info):
         """Allocate all existing space on all disks."""
-        self.__logger('Allocate all free space for volume %s ' % (volume_info))
+        self.__logger('Allocate all free space for volume %s ', volume_info)
 
         for disk in self.disks:
             if disk.free_space > 0:
                 self.__logger('Allocating all available space for volume: '
-                              'disk: %s volume: %s' %
-                              (disk.id, volume_info))
+                              'disk: %s volume: %s', disk.id, volume_info)
                 self._get_allocator(disk, volume_info)(volume_info)
             else:
                 self.__logger('Not enough free space for volume '
-                              'allocation: disk: %s volume: %s' %
-                              (disk.id, volume_info))
+                              'allocation: disk: %s volume: %s',
+                              disk.id, volume_info)
                 self._get_allocator(disk, volume_info)(volume_info, 0)
 
     def _allocate_size_for_volume(self, volume_info, size):
         """Allocate volumes with particaular size."""
-        self.__logger('Allocate volume %s with size %s ' % (volume_info, size))
+        self.__logger('Allocate volume %s with size %s ', volume_info, size)
 
         not_allocated_size = size
         for disk in self.disks:
-            self.__logger('Creating volume: disk: %s, vg: %s' %
-                          (disk.id, volume_info))
+            self.__logger('Creating volume: disk: %s, vg: %s',
+                          disk.id, volume_info)
 
             if disk.free_space >= not_allocated_size:
                 # if we can allocate all required size
@@ -815,7 +835,7 @@ class VolumeManager(object):
 
     def _allocate_full_disk(self, volume_info):
         """Allocate full disks for a volume."""
-        self.__logger('Allocate full disk for volume %s ' % (volume_info))
+        self.__logger('Allocate full disk for volume %s ', volume_info)
 
         for disk in self.disks:
             existing_volumes = [v for v in disk.volumes if not is_service(v)
@@ -843,7 +863,7 @@ class VolumeManager(object):
         self.volumes = [d.render() for d in self.disks]
 
         if not self.allowed_volumes:
-            self.__logger('Role is None return volumes: %s' % self.volumes)
+            self.__logger('Role is None return volumes: %s', self.volumes)
             return self.volumes
 
         self.volumes.extend(only_vg(self.allowed_volumes))
@@ -877,7 +897,7 @@ class VolumeManager(object):
 
         self.volumes = self.expand_generators(self.volumes)
 
-        self.__logger('Generated volumes: %s' % self.volumes)
+        self.__logger('Generated volumes: %s', self.volumes)
         return self.volumes
 
     @property
@@ -912,8 +932,8 @@ class VolumeManager(object):
                 genval = self.call_generator(
                     generator, *generator_args)
                 self.__logger(
-                    'Generator {0} with args {1} expanded to: {2}'.format(
-                        generator, generator_args, genval))
+                    'Generator %s with args %s expanded to: %s',
+                    generator, generator_args, genval)
                 return genval
             else:
                 return dict((k, self.expand_generators(v))
@@ -932,11 +952,8 @@ class VolumeManager(object):
         minimal_installation_size = self.__calc_minimal_installation_size()
 
         self.__logger(
-            'Checking disks space: disks space {0}, minimal size {1}'.format(
-                disks_space,
-                minimal_installation_size
-            )
-        )
+            'Checking disks space: disks space %s, minimal size %s',
+            disks_space, minimal_installation_size)
 
         if disks_space < minimal_installation_size:
             raise errors.NotEnoughFreeSpace()
@@ -969,5 +986,6 @@ class VolumeManager(object):
 
         return min_installation_size
 
-    def __logger(self, message):
-        logger.debug('VolumeManager %s: %s', id(self), message)
+    def __logger(self, message, *args):
+        # arguments are formatted only if debug messages are logged
+        logger.debug('VolumeManager %s: ' + message, id(self), *args)
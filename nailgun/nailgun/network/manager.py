@@ -16,7 +16,6 @@
 
 from collections import defaultdict
 
-from itertools import imap
 from itertools import islice
 
 from netaddr import IPAddress
@@ -25,6 +24,8 @@ from netaddr import IPRange
 
 import six
 
+from sqlalchemy import cast
+from sqlalchemy.dialects import postgresql as psql
 from sqlalchemy.orm import joinedload
 from sqlalchemy.sql import not_
 from sqlalchemy.sql import or_
@@ -89,8 +90,11 @@ class NetworkManager(object):
             name="fuelweb_admin",
         )
         if node_id:
-            node_db = db().query(Node).get(node_id)
-            admin_ng = admin_ngs.filter_by(group_id=node_db.group_id).first()
+            # NOTE: only group id is queried, fetching the whole node
+            # would refresh it and drop its already loaded relations
+            group_id = db().query(Node.group_id).filter_by(
+                id=node_id).scalar()
+            admin_ng = admin_ngs.filter_by(group_id=group_id).first()
 
         admin_ng = admin_ng or admin_ngs.filter_by(group_id=None).first()
 
@@ -144,6 +148,7 @@ class NetworkManager(object):
         # to one of the ranges of required to be able to reuse admin ip address
         # also such approach is backward compatible
         nodes_need_ips = defaultdict(list)
+        changed_clusters = set()
         for node in nodes:
             node_id = node.id
             admin_net = cls.get_admin_network_group(node_id)
@@ -156,9 +161,12 @@ class NetworkManager(object):
                     db().add(reusable_ip)
                 else:
                     nodes_need_ips[admin_net].append(node_id)
+                if node.cluster:
+                    changed_clusters.add(node.cluster)
         db().flush()
 
-        for admin_net, nodes in six.iteritems(nodes_need_ips):
+        for admin_net, nodes in sorted(six.iteritems(nodes_need_ips),
+                                       key=lambda item: item[0].id):
             free_ips = cls.get_free_ips(admin_net, len(nodes))
             for ip, n in zip(free_ips, nodes):
                 ip_db = IPAddr(node=n,
@@ -167,6 +175,9 @@ class NetworkManager(object):
                 db().add(ip_db)
             db().flush()
 
+        for cluster in changed_clusters:
+            objects.Cluster.bump_deployment_revision(cluster)
+
     @classmethod
     def assign_ips(cls, nodes, network_name):
         """Idempotent assignment IP addresses to nodes.
@@ -194,76 +205,93 @@ class NetworkManager(object):
                     )
                 )
 
-        network_groups = db().query(NetworkGroup).\
-            filter_by(name=network_name)
-
-        if not network_groups:
-            raise errors.AssignIPError(
-                u"Network '%s' for cluster_id=%s not found." %
-                (network_name, cluster_id)
-            )
+        # Resolve node group to network mapping once for all nodes
+        default_group_id = objects.Cluster.get_default_group(
+            nodes[0].cluster).id
+        group_ids = set(n.group_id or default_group_id for n in nodes)
+        networks_by_group = dict(
+            (ng.group_id, ng) for ng in
+            db().query(NetworkGroup).filter(
+                NetworkGroup.name == network_name,
+                or_(NetworkGroup.group_id.in_(group_ids),
+                    NetworkGroup.group_id.is_(None)))
+        )
 
-        # Check which nodes need ips
-        nodes_need_ips = defaultdict(list)
+        nodes_networks = {}
         for node in nodes:
-            node_id = node.id
-
             if network_name == 'public' and \
                     not objects.Node.should_have_public(node):
                 continue
-            group_id = (node.group_id or
-                objects.Cluster.get_default_group(node.cluster).id)
 
-            network = network_groups.filter(
-                or_(
-                    NetworkGroup.group_id == group_id,
-                    NetworkGroup.group_id == None  # flake8: noqa
+            group_id = node.group_id or default_group_id
+            network = (networks_by_group.get(group_id) or
+                       networks_by_group.get(None))
+            if network is None:
+                raise errors.AssignIPError(
+                    u"Network '%s' for cluster_id=%s not found." %
+                    (network_name, cluster_id)
                 )
-            ).first()
+            nodes_networks[node.id] = network
 
-            node_ips = imap(
-                lambda i: i.ip_addr,
-                cls._get_ips_except_admin(
-                    node_id=node_id,
-                    network_id=network.id
-                )
-            )
+        if not nodes_networks:
+            return
 
-            # check if any of node_ips in required ranges
-            ip_already_assigned = False
-
-            for ip in node_ips:
-                if cls.check_ip_belongs_to_net(ip, network):
-                    logger.info(
-                        u"Node id='{0}' already has an IP address "
-                        "inside '{1}' network.".format(
-                            node_id,
-                            network.name
-                        )
-                    )
-                    ip_already_assigned = True
-                    break
+        # Fetch IPs of all the nodes in required networks with one query
+        assigned_ips = defaultdict(list)
+        ips = db().query(IPAddr.node, IPAddr.network, IPAddr.ip_addr).filter(
+            IPAddr.node.in_(nodes_networks.keys()),
+            IPAddr.network.in_(set(n.id for n in nodes_networks.values()))
+        )
+        for node_id, network_id, ip_addr in ips:
+            assigned_ips[(node_id, network_id)].append(ip_addr)
+
+        # Check which nodes need ips
+        nodes_need_ips = defaultdict(list)
+        for node in nodes:
+            network = nodes_networks.get(node.id)
+            if network is None:
+                continue
 
+            # check if any of node ips in required ranges
+            ip_already_assigned = any(
+                cls.check_ip_belongs_to_net(ip, network)
+                for ip in assigned_ips[(node.id, network.id)]
+            )
             if ip_already_assigned:
+                logger.info(
+                    u"Node id='{0}' already has an IP address "
+                    "inside '{1}' network.".format(
+                        node.id,
+                        network.name
+                    )
+                )
                 continue
 
-            nodes_need_ips[network].append(node_id)
+            nodes_need_ips[network].append(node.id)
 
-        # Get and assign ips for nodes
-        for network, nodes in six.iteritems(nodes_need_ips):
-            free_ips = cls.get_free_ips(network, len(nodes))
-            for ip, n in zip(free_ips, nodes):
+        # Get and assign ips for nodes, one bulk insert per network
+        for network, nodes_ids in sorted(six.iteritems(nodes_need_ips),
+                                         key=lambda item: item[0].id):
+            free_ips = cls.get_free_ips(network, len(nodes_ids))
+            new_ips = []
+            for ip, n in zip(free_ips, nodes_ids):
                 logger.info(
                     "Assigning IP for node '{0}' in network '{1}'".format(
                         n,
                         network_name
                     )
                 )
-                ip_db = IPAddr(node=n,
-                               ip_addr=ip,
-                               network=network.id)
-                db().add(ip_db)
-            db().flush()
+                new_ips.append({
+                    'node': n,
+                    'ip_addr': ip,
+                    'network': network.id,
+                })
+            db().execute(IPAddr.__table__.insert(), new_ips)
+
+        if nodes_need_ips:
+            for node in nodes:
+                db().expire(node, ['ip_addrs'])
+            objects.Cluster.bump_deployment_revision(nodes[0].cluster)
 
     @classmethod
     def assign_vip(cls, cluster, network_name,
@@ -310,6 +338,7 @@ class NetworkManager(object):
         ne_db = IPAddr(network=network.id, ip_addr=vip, vip_type=vip_type)
         db().add(ne_db)
         db().flush()
+        objects.Cluster.bump_deployment_revision(cluster)
 
         return vip
 
@@ -347,17 +376,50 @@ class NetworkManager(object):
 
     @classmethod
     def is_ip_usable(cls, network_group, ip):
-        return (ip != network_group.gateway
-            and db().query(IPAddr).filter_by(ip_addr=ip).first() is None)
+        return (ip != network_group.gateway and
+                db().query(IPAddr).filter_by(ip_addr=ip).first() is None)
+
+    @classmethod
+    def _get_used_ips(cls, network_group):
+        """Returns set of IP addresses (as integers) inside of ranges
+        of given Network Group which can't be allocated.
+
+        All the addresses are fetched with one query. Network Group
+        row is locked for update, so concurrent transactions allocating
+        addresses from the same network are serialized.
+
+        :param network_group: NetworkGroup object.
+        :type  network_group: NetworkGroup
+        :returns: set of integers
+        """
+        db().query(NetworkGroup).filter_by(
+            id=network_group.id).with_lockmode('update').first()
+
+        used_ips = set()
+        if network_group.gateway:
+            used_ips.add(int(IPAddress(network_group.gateway)))
+
+        if not network_group.ip_ranges:
+            return used_ips
+
+        ip_addr = cast(IPAddr.ip_addr, psql.INET)
+        ips = db().query(IPAddr.ip_addr).filter(
+            or_(*[ip_addr.between(r.first, r.last)
+                  for r in network_group.ip_ranges])
+        )
+        used_ips.update(int(IPAddress(ip)) for ip, in ips)
+        return used_ips
 
     @classmethod
     def _iter_free_ips(cls, network_group):
         """Represents iterator over free IP addresses
         in all ranges for given Network Group
         """
+        used_ips = cls._get_used_ips(network_group)
         for ip_range in network_group.ip_ranges:
             for ip in IPRange(ip_range.first, ip_range.last):
-                if cls.is_ip_usable(network_group, str(ip)):
+                if int(ip) not in used_ips:
+                    used_ips.add(int(ip))
                     yield str(ip)
 
     @classmethod
@@ -541,10 +603,9 @@ class NetworkManager(object):
 
     @classmethod
     def _get_admin_node_network(cls, node):
-        node_db = db().query(Node).get(node)
-        net = cls.get_admin_network_group(node)
+        net = cls.get_admin_network_group(node.id)
         net_cidr = IPNetwork(net.cidr)
-        ip_addr = cls.get_admin_ip_for_node(node)
+        ip_addr = cls.get_admin_ip_for_node(node.id)
         if ip_addr:
             ip_addr = "{0}/{1}".format(ip_addr, net_cidr.prefixlen)
 
@@ -561,9 +622,24 @@ class NetworkManager(object):
 
     @classmethod
     def get_node_network_by_netname(cls, node, netname):
-        networks = cls.get_node_networks(node)
-        return filter(
-            lambda n: n['name'] == netname, networks)[0]
+        """Returns the same dict as :meth:`get_node_networks` does
+        for given network, but without collecting data of all others.
+
+        :raises: IndexError if network is not assigned to the node
+        """
+        if node.cluster is not None:
+            if netname == 'fuelweb_admin':
+                return cls._get_admin_node_network(node)
+
+            for interface in node.interfaces:
+                for net in interface.assigned_networks_list:
+                    if net.name == netname:
+                        return cls._get_node_network_data(
+                            node, interface, net)
+
+        raise IndexError(
+            u'Network "{0}" is not assigned to node {1}'.format(
+                netname, node.full_name))
 
     @classmethod
     def get_network_vlan(cls, net_db, cl_db):
@@ -590,6 +666,13 @@ class NetworkManager(object):
                 'vlan': cls.get_network_vlan(net, node_db.cluster),
                 'dev': interface.name}
 
+    @classmethod
+    def _get_node_network_data(cls, node_db, interface, net):
+        ip = cls.get_ip_by_network_name(node_db, net.name)
+        if ip is not None:
+            return cls._get_network_data_with_ip(node_db, interface, net, ip)
+        return cls._get_network_data_wo_ip(node_db, interface, net)
+
     @classmethod
     def _get_networks_except_admin(cls, networks):
         return (net for net in networks
@@ -607,23 +690,23 @@ class NetworkManager(object):
             networks_wo_admin = cls._get_networks_except_admin(
                 interface.assigned_networks_list)
             for net in networks_wo_admin:
-                ip = cls.get_ip_by_network_name(node, net.name)
-                if ip is not None:
-                    network_data.append(cls._get_network_data_with_ip(
-                        node, interface, net, ip))
-                else:
-                    network_data.append(cls._get_network_data_wo_ip(
-                        node, interface, net))
+                network_data.append(
+                    cls._get_node_network_data(node, interface, net))
 
-        network_data.append(cls._get_admin_node_network(node.id))
+        network_data.append(cls._get_admin_node_network(node))
 
         return network_data
 
     @classmethod
     def _update_attrs(cls, node_data):
         node_db = db().query(Node).get(node_data['id'])
-        is_ether = lambda x: x['type'] == consts.NETWORK_INTERFACE_TYPES.ether
-        is_bond = lambda x: x['type'] == consts.NETWORK_INTERFACE_TYPES.bond
+
+        def is_ether(iface):
+            return iface['type'] == consts.NETWORK_INTERFACE_TYPES.ether
+
+        def is_bond(iface):
+            return iface['type'] == consts.NETWORK_INTERFACE_TYPES.bond
+
         interfaces = filter(is_ether, node_data['interfaces'])
         bond_interfaces = filter(is_bond, node_data['interfaces'])
 
@@ -682,6 +765,9 @@ class NetworkManager(object):
                 )
             db().commit()
 
+        if node_db.cluster:
+            objects.Cluster.bump_deployment_revision(node_db.cluster)
+
         return node_db.id
 
     @classmethod
@@ -776,14 +862,17 @@ class NetworkManager(object):
         db().flush()
 
     @classmethod
-    def __update_existing_interface(cls, interface_id, interface_attrs, update_by_agent=False):
+    def __update_existing_interface(cls, interface_id, interface_attrs,
+                                    update_by_agent=False):
         interface = db().query(NodeNICInterface).get(interface_id)
-        cls.__set_interface_attributes(interface, interface_attrs, update_by_agent)
+        cls.__set_interface_attributes(interface, interface_attrs,
+                                       update_by_agent)
         db().add(interface)
         db().flush()
 
     @classmethod
-    def __set_interface_attributes(cls, interface, interface_attrs, update_by_agent=False):
+    def __set_interface_attributes(cls, interface, interface_attrs,
+                                   update_by_agent=False):
         interface.name = interface_attrs['name']
         interface.mac = interface_attrs['mac']
 
@@ -1138,7 +1227,7 @@ class NetworkManager(object):
             for key, value in network_configuration['networking_parameters'] \
                     .items():
                 setattr(cluster.network_config, key, value)
-            db().flush()
+            objects.Cluster.bump_deployment_revision(cluster)
 
     @classmethod
     def cluster_has_bonds(cls, cluster_id):
@@ -1168,9 +1257,9 @@ class NetworkManager(object):
     @classmethod
     def get_networks_not_on_node(cls, node):
         node_net = [(n['name'], n['cidr'])
-                for n in cls.get_node_networks(node) if n.get('cidr')]
+                    for n in cls.get_node_networks(node) if n.get('cidr')]
         all_nets = [(n.name, n.cidr)
-                for n in node.cluster.network_groups if n.cidr]
+                    for n in node.cluster.network_groups if n.cidr]
 
         admin_net = cls.get_admin_network_group()
         all_nets.append((admin_net.name, admin_net.cidr))
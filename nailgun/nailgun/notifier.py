@@ -25,3 +25,12 @@ def notify(topic, message, cluster_id=None, node_id=None, task_uuid=None):
         "node_id": node_id,
         "task_uuid": task_uuid
     })
+
+
+def notify_nodes(topic, messages, cluster_id=None, task_uuid=None):
+    objects.NotificationCollection.create_for_nodes(
+        topic,
+        messages,
+        cluster_id=cluster_id,
+        task_uuid=task_uuid
+    )
@@ -22,10 +22,13 @@ import collections
 
 from itertools import ifilter
 import operator
+import six
 
 from oslo.serialization import jsonutils
 
 from sqlalchemy import and_, not_
+from sqlalchemy import bindparam
+from sqlalchemy.orm.attributes import set_committed_value
 from sqlalchemy.orm import joinedload
 
 from nailgun.objects.serializers.base import BasicSerializer
@@ -175,6 +178,13 @@ class NailgunCollection(object):
     #: Single object class
     single = NailgunObject
 
+    #: Number of objects loaded from DB at once by to_json_iter
+    stream_chunk_size = 100
+
+    #: Names of tables serialized objects are built from, their
+    #: revision is used as ETag of collection (all tables if None)
+    revision_tables = None
+
     @classmethod
     def _is_iterable(cls, obj):
         return isinstance(
@@ -401,6 +411,28 @@ class NailgunCollection(object):
         options = [joinedload(field) for field in fields]
         return cls.eager_base(iterable, options)
 
+    @classmethod
+    def paginate(cls, iterable, limit=None, offset=None):
+        """Get a page of objects, ordered by id if iterable is a query
+        In case if iterable=None pages all object instances
+
+        :param iterable: iterable (SQLAlchemy query)
+        :param limit: max number of objects in page
+        :param offset: number of objects to skip
+        :returns: iterable (SQLAlchemy query)
+        """
+        use_iterable = cls.all() if iterable is None else iterable
+        offset = offset or 0
+        if cls._is_query(use_iterable):
+            # id makes order of objects stable from page to page
+            return use_iterable.order_by(
+                cls.single.model.id).offset(offset).limit(limit)
+        elif cls._is_iterable(use_iterable):
+            end = offset + limit if limit is not None else None
+            return list(use_iterable)[offset:end]
+        else:
+            raise TypeError("First argument should be iterable")
+
     @classmethod
     def count(cls, iterable=None):
         use_iterable = iterable or cls.all()
@@ -442,6 +474,58 @@ class NailgunCollection(object):
             )
         )
 
+    @classmethod
+    def to_json_iter(cls, iterable=None, fields=None):
+        """Serialize iterable to JSON chunk by chunk
+        In case if iterable=None serializes all object instances
+
+        Only ids of objects are fetched from DB at once, objects
+        themselves are loaded, serialized and released in chunks of
+        stream_chunk_size, so memory consumption doesn't depend on
+        size of collection. Joined string of chunks is the same as
+        the one returned by to_json.
+
+        :param iterable: iterable (SQLAlchemy query)
+        :param fields: exact fields to serialize
+        :returns: generator of JSON string chunks
+        """
+        use_iterable = iterable or cls.all()
+        yield '['
+        separator = ''
+        for chunk in cls._iter_chunks(use_iterable):
+            data = [jsonutils.dumps(cls.single.to_dict(o, fields=fields))
+                    for o in chunk]
+            if data:
+                yield separator + ', '.join(data)
+                separator = ', '
+        yield ']'
+
+    @classmethod
+    def _iter_chunks(cls, iterable):
+        """Split iterable into lists of stream_chunk_size objects
+
+        Query ordering, filtering and eager loading options are kept
+        for every chunk. Objects which are deleted or don't match the
+        query anymore by the time their chunk is loaded are skipped.
+        """
+        size = cls.stream_chunk_size
+        if not cls._is_query(iterable):
+            iterable = list(iterable)
+            for start in six.moves.range(0, len(iterable), size):
+                yield iterable[start:start + size]
+            return
+
+        model = cls.single.model
+        ids = [row[0] for row in iterable.with_entities(model.id)]
+        # limit, offset and ordering are already taken into account
+        # by ids, chunks are just picked out of the same query by them
+        query = iterable.limit(None).offset(None).order_by(None)
+        for start in six.moves.range(0, len(ids), size):
+            chunk_ids = ids[start:start + size]
+            objs = dict(
+                (o.id, o) for o in query.filter(model.id.in_(chunk_ids)))
+            yield [objs[obj_id] for obj_id in chunk_ids if obj_id in objs]
+
     @classmethod
     def create(cls, data):
         """Create object instance with specified parameters in DB
@@ -450,3 +534,32 @@ class NailgunCollection(object):
         :returns: instance of an object (model)
         """
         return cls.single.create(data)
+
+    @classmethod
+    def update_many(cls, changes):
+        """Update fields of many objects in DB at once
+
+        Objects with the same set of changed fields are updated by one
+        executemany UPDATE instead of a statement per object. Changed
+        fields of given instances are set as already saved ones, so
+        instances are neither reloaded nor flushed again.
+
+        :param changes: list of (instance, dict of new field values)
+        """
+        # previous changes of instances should go to DB first
+        db().flush()
+
+        groups = collections.defaultdict(list)
+        for instance, data in changes:
+            if data:
+                groups[tuple(sorted(data))].append((instance, data))
+
+        table = cls.single.model.__table__
+        query = table.update().where(table.c.id == bindparam('obj_id'))
+        for group in six.itervalues(groups):
+            params = []
+            for instance, data in group:
+                params.append(dict(data, obj_id=instance.id))
+                for field, value in six.iteritems(data):
+                    set_committed_value(instance, field, value)
+            db().execute(query, params)
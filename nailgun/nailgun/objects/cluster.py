@@ -334,6 +334,19 @@ class Cluster(NailgunObject):
             from nailgun.network.nova_network import NovaNetworkManager
             return NovaNetworkManager
 
+    @classmethod
+    def bump_deployment_revision(cls, instance):
+        """Mark deployment facts of the Cluster as changed.
+        Serialized facts cached for previous revisions won't be used
+        anymore (see :func:`deployment_serializers.serialize_cached`).
+
+        :param instance: Cluster instance
+        :returns: None
+        """
+        instance.deployment_revision = \
+            models.Cluster.deployment_revision + 1
+        db().flush()
+
     @classmethod
     def add_pending_changes(cls, instance, changes_type, node_id=None):
         """Add pending changes for current Cluster.
@@ -351,6 +364,7 @@ class Cluster(NailgunObject):
                 u" node_id={0}".format(node_id) if node_id else u""
             )
         )
+        cls.bump_deployment_revision(instance)
 
         # TODO(enchantner): check if node belongs to cluster
         ex_chs = db().query(models.ClusterChanges).filter_by(
@@ -424,6 +438,7 @@ class Cluster(NailgunObject):
             cls.update_nodes(instance, nodes)
         if changes is not None:
             cls.update_changes(instance, changes)
+        cls.bump_deployment_revision(instance)
         return instance
 
     @classmethod
@@ -535,6 +550,7 @@ class Cluster(NailgunObject):
     def replace_deployment_info(cls, instance, data):
         instance.is_customized = True
         cls.replace_deployment_info_on_nodes(instance, data, instance.nodes)
+        cls.bump_deployment_revision(instance)
         return cls.get_deployment_info(instance)
 
     @classmethod
@@ -630,6 +646,7 @@ class Cluster(NailgunObject):
 
                 primary_node.primary_roles = list(primary_node.primary_roles)
                 primary_node.primary_roles.append(role_name)
+                cls.bump_deployment_revision(instance)
 
         db().flush()
 
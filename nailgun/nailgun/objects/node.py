@@ -496,6 +496,9 @@ class Node(NailgunObject):
         ):
             cls.update_volumes(instance)
 
+        if disks_changed and instance.cluster:
+            Cluster.bump_deployment_revision(instance.cluster)
+
         return instance
 
     @classmethod
@@ -598,7 +601,7 @@ class Node(NailgunObject):
                 new_roles))
 
         instance.roles = new_roles
-        db().flush()
+        Cluster.bump_deployment_revision(instance.cluster)
 
     @classmethod
     def update_pending_roles(cls, instance, new_pending_roles):
@@ -629,7 +632,7 @@ class Node(NailgunObject):
             )
 
         instance.pending_roles = new_pending_roles
-        db().flush()
+        Cluster.bump_deployment_revision(instance.cluster)
 
     @classmethod
     def update_primary_roles(cls, instance, new_primary_roles):
@@ -663,7 +666,7 @@ class Node(NailgunObject):
                 new_primary_roles))
 
         instance.primary_roles = new_primary_roles
-        db().flush()
+        Cluster.bump_deployment_revision(instance.cluster)
 
     @classmethod
     def add_into_cluster(cls, instance, cluster_id):
@@ -722,6 +725,7 @@ class Node(NailgunObject):
         :returns: None
         """
         if instance.cluster:
+            Cluster.bump_deployment_revision(instance.cluster)
             Cluster.clear_pending_changes(
                 instance.cluster,
                 node_id=instance.id
@@ -749,6 +753,8 @@ class Node(NailgunObject):
         instance.pending_roles = instance.pending_roles + instance.roles
         instance.roles = []
         instance.primary_roles = []
+        if instance.cluster:
+            Cluster.bump_deployment_revision(instance.cluster)
         db().flush()
 
     @classmethod
@@ -792,6 +798,22 @@ class NodeCollection(NailgunCollection):
     #: Single Node object class
     single = Node
 
+    #: Tables of nodes with their network data
+    revision_tables = (
+        'nodes',
+        'clusters',
+        'nodegroups',
+        'network_groups',
+        'ip_addrs',
+        'node_nic_interfaces',
+        'node_bond_interfaces',
+        'net_nic_assignments',
+        'net_bond_assignments',
+        'networking_configs',
+        'neutron_config',
+        'nova_network_config',
+    )
+
     @classmethod
     def eager_nodes_handlers(cls, iterable):
         """Eager load objects instances that is used in nodes handler.
@@ -807,6 +829,20 @@ class NodeCollection(NailgunCollection):
         )
         return cls.eager_base(iterable, options)
 
+    @classmethod
+    def preload(cls, instances):
+        """Load cluster, interfaces and IPs of all given nodes at once.
+
+        Nodes are refreshed in place, so the following code which walks
+        through them (e.g. serializers) doesn't make several lazy loads
+        for every node.
+
+        :param instances: list of Node instances
+        """
+        ids = [n.id for n in instances]
+        if ids:
+            cls.eager_nodes_handlers(cls.filter_by_id_list(None, ids)).all()
+
     @classmethod
     def update_slave_nodes_fqdn(cls, instances):
         for n in instances:
@@ -16,7 +16,10 @@
 
 from datetime import datetime
 
+import six
+
 from nailgun import consts
+from nailgun.db import db
 from nailgun.db.sqlalchemy import models
 
 from nailgun.errors import errors
@@ -115,3 +118,49 @@ class Notification(NailgunObject):
 class NotificationCollection(NailgunCollection):
 
     single = Notification
+
+    @classmethod
+    def create_for_nodes(cls, topic, messages, cluster_id=None,
+                         task_uuid=None):
+        """Creates notifications about several nodes at once.
+
+        Like Notification.create it skips notifications which already
+        exist for the task, but checks them by one query and inserts
+        new ones by one statement.
+
+        :param topic: a topic of notifications
+        :param messages: a dict of node id -> notification message
+        :param cluster_id: a cluster id
+        :param task_uuid: an uuid of task notifications belong to
+        """
+        task = Task.get_by_uuid(task_uuid) if task_uuid else None
+        if task and messages:
+            existing = set(db().query(
+                models.Notification.node_id,
+                models.Notification.message
+            ).filter(
+                models.Notification.task_id == task.id,
+                models.Notification.node_id.in_(list(messages))
+            ))
+            messages = dict(
+                (node_id, message)
+                for node_id, message in six.iteritems(messages)
+                if (node_id, message) not in existing)
+        if not messages:
+            return
+
+        now = datetime.now()
+        notifications = []
+        for node_id, message in sorted(six.iteritems(messages)):
+            notifications.append({
+                'topic': topic,
+                'message': message,
+                'cluster_id': cluster_id,
+                'node_id': node_id,
+                'task_id': task.id if task else None,
+                'datetime': now,
+            })
+            logger.info(
+                u"Notification: topic: {0} message: {1}".format(
+                    topic, message))
+        db().execute(models.Notification.__table__.insert(), notifications)
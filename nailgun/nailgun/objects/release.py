@@ -102,7 +102,9 @@ class Release(NailgunObject):
         # roles array. since fuel 7.0 we don't use it anymore, and
         # we don't require it even for old releases.
         data.pop("roles", None)
-        return super(Release, cls).update(instance, data)
+        super(Release, cls).update(instance, data)
+        cls.bump_clusters_deployment_revision(instance)
+        return instance
 
     @classmethod
     def update_role(cls, instance, role):
@@ -121,6 +123,7 @@ class Release(NailgunObject):
         instance.roles_metadata[role['name']] = role['meta']
         instance.volumes_metadata['volumes_roles_mapping'][role['name']] = \
             role.get('volumes_roles_mapping', [])
+        cls.bump_clusters_deployment_revision(instance)
 
     @classmethod
     def remove_role(cls, instance, role_name):
@@ -131,8 +134,20 @@ class Release(NailgunObject):
 
         result = instance.roles_metadata.pop(role_name, None)
         instance.volumes_metadata['volumes_roles_mapping'].pop(role_name, None)
+        cls.bump_clusters_deployment_revision(instance)
         return bool(result)
 
+    @classmethod
+    def bump_clusters_deployment_revision(cls, instance):
+        """Mark deployment facts of all the Release clusters as changed.
+
+        :param instance: a Release instance
+        :returns: None
+        """
+        from nailgun.objects import Cluster
+        for cluster in instance.clusters:
+            Cluster.bump_deployment_revision(cluster)
+
     @classmethod
     def is_deployable(cls, instance):
         """Returns whether a given release deployable or not.
@@ -285,6 +285,8 @@ class TaskCollection(NailgunCollection):
 
     single = Task
 
+    revision_tables = ('tasks',)
+
     @classmethod
     def get_by_cluster_id(cls, cluster_id):
         if cluster_id == '':
@@ -55,6 +55,8 @@ class DeploymentGraph(nx.DiGraph):
     adjlist_dict_factory = OrderedDict
 
     def __init__(self, tasks=None, *args, **kwargs):
+        # ordered tasks of groups, see get_tasks_topology
+        self._tasks_topology = {}
         super(DeploymentGraph, self).__init__(*args, **kwargs)
         # (dshulyak) we need to monkey patch created dicts, 1.9.1
         # doesnt support chaning those data structures by fabric
@@ -67,6 +69,7 @@ class DeploymentGraph(nx.DiGraph):
             self.add_tasks(tasks)
 
     def add_node(self, n, **attr):
+        self._tasks_topology.clear()
         if n not in self.succ:
             self.succ[n] = self.adjlist_dict_factory()
             self.pred[n] = self.adjlist_dict_factory()
@@ -74,6 +77,7 @@ class DeploymentGraph(nx.DiGraph):
         super(DeploymentGraph, self).add_node(n, **attr)
 
     def add_edge(self, u, v, **attr):
+        self._tasks_topology.clear()
         if u not in self.succ:
             self.succ[u] = self.adjlist_dict_factory()
             self.pred[u] = self.adjlist_dict_factory()
@@ -121,16 +125,57 @@ class DeploymentGraph(nx.DiGraph):
         :param processed_nodes: set of nodes names
         :returns: list of nodes names
         """
-        result = []
-        for node in self.nodes():
-            if node in processed_nodes:
-                continue
+        return next(self.iter_next_groups(processed_nodes), [])
 
-            predecessors = nx.dfs_predecessors(self.reverse(), node)
-            if (set(predecessors.keys()) <= processed_nodes):
-                result.append(node)
+    def iter_next_groups(self, processed_nodes):
+        """Iterate over groups of nodes in the order of their processing
 
-        return result
+        Every yielded list is what get_next_groups would return once
+        the nodes of all previous lists are processed too.
+
+        Node is ready when all its direct predecessors are done, that
+        is processed and have all their own predecessors done, so it is
+        enough to track number of not done direct predecessors of each
+        node, which takes linear time in total.
+
+        :param processed_nodes: set of nodes names
+        :returns: iterator over lists of nodes names
+        """
+        processed = set(processed_nodes)
+        order = dict((node, i) for i, node in enumerate(self.nodes()))
+        not_done = dict(
+            (node, len(self.pred[node]) - (node in self.pred[node]))
+            for node in self.nodes())
+
+        ready = []
+
+        def mark_done(nodes):
+            # processed successors become done together with the node
+            while nodes:
+                node = nodes.pop()
+                for successor in self.succ[node]:
+                    if successor == node:
+                        continue
+                    not_done[successor] -= 1
+                    if not_done[successor]:
+                        continue
+                    if successor in processed:
+                        nodes.append(successor)
+                    else:
+                        ready.append(successor)
+
+        for node in self.nodes():
+            if not not_done[node] and node not in processed:
+                ready.append(node)
+        mark_done([node for node in self.nodes()
+                   if not not_done[node] and node in processed])
+
+        while ready:
+            current = sorted(ready, key=order.get)
+            del ready[:]
+            yield current
+            processed.update(current)
+            mark_done(list(current))
 
     def get_groups_subgraph(self):
         roles = [t['id'] for t in self.node.values()
@@ -144,6 +189,20 @@ class DeploymentGraph(nx.DiGraph):
                 tasks.append(task)
         return self.subgraph(tasks)
 
+    def get_tasks_topology(self, group_name):
+        """Get tasks of the group in the order of their execution
+
+        Result is cached by group, as tasks are serialized for every
+        node of a role, and cache is dropped once the graph changes.
+
+        :param group_name: id of the group
+        :returns: list of tasks
+        """
+        if group_name not in self._tasks_topology:
+            self._tasks_topology[group_name] = \
+                self.get_tasks(group_name).topology
+        return self._tasks_topology[group_name]
+
     @property
     def topology(self):
         return map(lambda t: self.node[t], nx.topological_sort(self))
@@ -163,6 +222,7 @@ class DeploymentGraph(nx.DiGraph):
             return
 
         task['type'] = consts.ORCHESTRATOR_TASK_TYPES.skipped
+        self._tasks_topology.clear()
 
     def only_tasks(self, task_ids):
         """Leave only tasks that are specified in request.
@@ -303,9 +363,9 @@ class AstuteGraph(object):
 
         # if there is no nodes with some roles - mark them as success roles
         processed_groups = set(all_groups) - set(grouped_nodes.keys())
-        current_groups = groups_subgraph.get_next_groups(processed_groups)
 
-        while current_groups:
+        for current_groups in groups_subgraph.iter_next_groups(
+                processed_groups):
             one_by_one = []
             parallel = []
 
@@ -324,10 +384,6 @@ class AstuteGraph(object):
 
             self.process_parallel_nodes(priority, parallel, grouped_nodes)
 
-            # fetch next part of groups
-            processed_groups.update(current_groups)
-            current_groups = groups_subgraph.get_next_groups(processed_groups)
-
     def stage_tasks_serialize(self, tasks, nodes):
         """Serialize tasks for certain stage
 
@@ -382,7 +438,7 @@ class AstuteGraph(object):
 
         :param node: dict with serialized node
         """
-        tasks = self.graph.get_tasks(node['role']).topology
+        tasks = self.graph.get_tasks_topology(node['role'])
         serialized = []
         priority = ps.PriorityStrategy()
 
@@ -17,6 +17,7 @@
 """Deployment serializers for orchestrator"""
 
 from copy import deepcopy
+import hashlib
 from itertools import groupby
 
 import sqlalchemy as sa
@@ -25,11 +26,14 @@ from sqlalchemy.orm import joinedload
 import math
 import six
 
+from oslo.serialization import jsonutils
+
 from nailgun import consts
 from nailgun.db import db
 from nailgun.db.sqlalchemy.models import Node
 from nailgun.extensions.volume_manager import manager as volume_manager
 from nailgun import objects
+from nailgun.settings import settings
 from nailgun import utils
 
 from nailgun.orchestrator.base_serializers import GraphBasedSerializer
@@ -83,7 +87,10 @@ class DeploymentMultinodeSerializer(GraphBasedSerializer):
         self.set_deployment_priorities(nodes)
         self.set_critical_nodes(nodes)
         self.set_tasks(nodes)
-        return [utils.dict_merge(node, common_attrs) for node in nodes]
+        # common attrs (e.g. list of all cluster nodes) are the same for
+        # every node, so they are shared instead of being copied per node
+        return [utils.dict_merge_shared(node, common_attrs)
+                for node in nodes]
 
     def serialize_customized(self, cluster, nodes):
         serialized = []
@@ -532,7 +539,79 @@ def serialize(orchestrator_graph, cluster, nodes, ignore_customized=False):
         nst = cluster.network_config.get('segmentation_type')
         objects.NodeCollection.prepare_for_deployment(cluster.nodes, nst)
 
+    # network data of all cluster nodes is serialized for every node
+    objects.NodeCollection.preload(cluster.nodes)
+
     serializer = get_serializer_for_cluster(cluster)(orchestrator_graph)
 
     return serializer.serialize(
         cluster, nodes, ignore_customized=ignore_customized)
+
+
+#: serialized (JSON) deployment facts, see :func:`serialize_cached`
+_facts_cache = utils.LRUCache(settings.DEPLOYMENT_FACTS_CACHE_SIZE)
+
+
+def _get_interfaces_digest(node):
+    """Digest of NICs data which is reported by agent."""
+    nics = [
+        (nic.id, nic.name, nic.mac, nic.max_speed, nic.current_speed,
+         nic.ip_addr, nic.netmask, nic.state, nic.driver, nic.bus_info,
+         nic.parent_id, nic.interface_properties, nic.offloading_modes)
+        for nic in sorted(node.nic_interfaces, key=lambda nic: nic.id)
+    ]
+    return hashlib.sha1(jsonutils.dumps(nics, sort_keys=True)).hexdigest()
+
+
+def _get_facts_cache_key(cluster, nodes, ignore_customized):
+    """Cache key of deployment facts for given nodes.
+
+    Besides cluster deployment revision it includes state of all cluster
+    nodes which is changed outside of nailgun objects (e.g. by receiver,
+    agent or on deployment preparation), so such changes don't require
+    revision to be bumped.
+    """
+    nodes_state = tuple(
+        (n.id, n.status, n.online, n.pending_addition, n.pending_deletion,
+         n.group_id, n.name, n.fqdn, tuple(n.roles), tuple(n.pending_roles),
+         tuple(n.primary_roles), _get_interfaces_digest(n))
+        for n in sorted(cluster.nodes, key=lambda n: n.id)
+    )
+    return (
+        cluster.id,
+        cluster.deployment_revision,
+        tuple(n.id for n in nodes),
+        nodes_state,
+        objects.MasterNodeSettings.must_send_stats(),
+        ignore_customized,
+    )
+
+
+def serialize_cached(cluster, nodes, ignore_customized=False):
+    """Same as :func:`serialize` with the full deployment graph,
+    but facts are reused while cluster and its nodes are not changed.
+
+    Should be used for read-only purposes only, since side effects
+    of serialization (e.g. IPs assignment) are skipped on cache hit.
+    """
+    # NOTE: deployment_graph depends on this module
+    from nailgun.orchestrator.deployment_graph import AstuteGraph
+
+    # NICs of all cluster nodes are a part of the key
+    objects.NodeCollection.preload(cluster.nodes)
+
+    facts = _facts_cache.get(
+        _get_facts_cache_key(cluster, nodes, ignore_customized))
+    if facts is not None:
+        return jsonutils.loads(facts)
+
+    serialized = serialize(
+        AstuteGraph(cluster), cluster, nodes,
+        ignore_customized=ignore_customized)
+
+    # serialization itself could change the cluster, so the key
+    # is calculated once again
+    _facts_cache.set(
+        _get_facts_cache_key(cluster, nodes, ignore_customized),
+        jsonutils.dumps(serialized))
+    return serialized
@@ -333,6 +333,7 @@ def get_serializer_for_cluster(cluster):
 def serialize(cluster, nodes, ignore_customized=False):
     """Serialize cluster for provisioning."""
     objects.NodeCollection.prepare_for_provisioning(nodes)
+    objects.NodeCollection.preload(nodes)
     serializer = get_serializer_for_cluster(cluster)
 
     return serializer.serialize(
@@ -15,11 +15,11 @@
 #    under the License.
 
 import six
-import functools
 
 import amqp.exceptions as amqp_exceptions
 from kombu import Connection
 from kombu import Exchange
+from kombu import pools
 from oslo.serialization import jsonutils
 from kombu import Queue
 
@@ -75,6 +75,16 @@ nailgun_queue = Queue(
 )
 
 
+#: how to retry publishing when connection to broker is lost, the
+#: connection is reestablished before every next attempt
+retry_policy = {
+    'max_retries': 3,
+    'interval_start': 0,
+    'interval_step': 1,
+    'interval_max': 2,
+}
+
+
 def cast(name, message, service=False):
     logger.debug(
         "RPC cast to orchestrator:\n{0}".format(
@@ -83,17 +93,33 @@ def cast(name, message, service=False):
     )
     use_queue = naily_queue if not service else naily_service_queue
     use_exchange = naily_exchange if not service else naily_service_exchange
-    with Connection(conn_str) as conn:
-        with conn.Producer(serializer='json') as producer:
-            publish = functools.partial(producer.publish, message,
-                exchange=use_exchange, routing_key=name, declare=[use_queue])
-            try:
-                publish()
-            except amqp_exceptions.PreconditionFailed as e:
-                logger.warning(six.text_type(e))
-                # (dshulyak) we should drop both exchanges/queues in order
-                # for astute to be able to recover temporary queues
+
+    def publish(producer):
+        producer.publish(
+            message, serializer='json', exchange=use_exchange,
+            routing_key=name, declare=[use_queue],
+            retry=True, retry_policy=retry_policy)
+
+    # producers and their connections are shared by all casts of
+    # the process instead of connecting to broker every time
+    with pools.producers[Connection(conn_str)].acquire(block=True) \
+            as producer:
+        # entities are declared on every cast as they may be removed
+        # by astute, the declaration also checks that pooled connection
+        # is still alive and reconnects if it is not
+        producer.connection.declared_entities.clear()
+        try:
+            publish(producer)
+        except amqp_exceptions.PreconditionFailed as e:
+            logger.warning(six.text_type(e))
+            # (dshulyak) we should drop both exchanges/queues in order
+            # for astute to be able to recover temporary queues
+            # NOTE: broker closes the channel of the pooled producer on
+            # this error, so it reconnects on the next cast and entities
+            # are recreated using a separate connection
+            with Connection(conn_str) as conn:
                 utils.delete_entities(
                     conn, naily_service_exchange, naily_service_queue,
                     naily_exchange, naily_queue)
-                publish()
+                with conn.Producer() as recovery_producer:
+                    publish(recovery_producer)
@@ -245,6 +245,7 @@ class NailgunReceiver(object):
         # if there no node except master - then just skip updating
         # nodes status, for the task itself astute will send
         # message with descriptive error
+        nodes_db = {}
         if nodes:
 
             # lock nodes for updating so they can't be deleted
@@ -253,11 +254,22 @@ class NailgunReceiver(object):
                 [n['uid'] for n in nodes],
             )
             q_nodes = objects.NodeCollection.order_by(q_nodes, 'id')
-            objects.NodeCollection.lock_for_update(q_nodes).all()
+            nodes_db = dict(
+                (node_db.id, node_db) for node_db in
+                objects.NodeCollection.lock_for_update(q_nodes).all())
 
         # First of all, let's update nodes in database
+        update_fields = (
+            'error_msg',
+            'error_type',
+            'status',
+            'progress',
+            'online'
+        )
+        changes = {}
+        failed_nodes = {}
         for node in nodes:
-            node_db = objects.Node.get_by_uid(node['uid'])
+            node_db = nodes_db.get(int(node['uid']))
             if not node_db:
                 logger.warning(
                     u"No node found with uid '{0}' - nothing changed".format(
@@ -266,44 +278,37 @@ class NailgunReceiver(object):
                 )
                 continue
 
-            update_fields = (
-                'error_msg',
-                'error_type',
-                'status',
-                'progress',
-                'online'
-            )
-            for param in update_fields:
-                if param in node:
-                    logger.debug(
-                        u"Updating node {0} - set {1} to {2}".format(
-                            node['uid'],
-                            param,
-                            node[param]
-                        )
-                    )
-                    setattr(node_db, param, node[param])
-
-                    if param == 'progress' and node.get('status') == 'error' \
-                            or node.get('online') is False:
-                        # If failure occurred with node
-                        # it's progress should be 100
-                        node_db.progress = 100
-                        # Setting node error_msg for offline nodes
-                        if node.get('online') is False \
-                                and not node_db.error_msg:
-                            node_db.error_msg = u"Node is offline"
-                        # Notification on particular node failure
-                        notifier.notify(
-                            "error",
-                            u"Failed to deploy node '{0}': {1}".format(
-                                node_db.name,
-                                node_db.error_msg or "Unknown error"
-                            ),
-                            cluster_id=task.cluster_id,
-                            node_id=node['uid'],
-                            task_uuid=task_uuid
-                        )
+            data = dict(
+                (param, node[param]) for param in update_fields
+                if param in node)
+            if not data:
+                continue
+            logger.debug(
+                u"Updating node {0} - set {1}".format(node['uid'], data))
+
+            if 'progress' in data and node.get('status') == 'error' \
+                    or node.get('online') is False:
+                # If failure occurred with node
+                # it's progress should be 100
+                data['progress'] = 100
+                error_msg = data.get('error_msg', node_db.error_msg)
+                # Setting node error_msg for offline nodes
+                if node.get('online') is False and not error_msg:
+                    error_msg = data['error_msg'] = u"Node is offline"
+                # Notification on particular node failure
+                failed_nodes[node_db.id] = \
+                    u"Failed to deploy node '{0}': {1}".format(
+                        node_db.name,
+                        error_msg or "Unknown error")
+            changes.setdefault(node_db, {}).update(data)
+
+        objects.NodeCollection.update_many(changes.items())
+        notifier.notify_nodes(
+            "error",
+            failed_nodes,
+            cluster_id=task.cluster_id,
+            task_uuid=task_uuid
+        )
         db().flush()
         if nodes and not progress:
             progress = TaskHelper.recalculate_deployment_task_progress(task)
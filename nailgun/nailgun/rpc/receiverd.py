@@ -19,6 +19,7 @@ import sys
 
 sys.path.insert(0, os.path.dirname(__file__))
 
+import time
 import traceback
 
 import six
@@ -34,20 +35,111 @@ from nailgun.logger import logger
 import nailgun.rpc as rpc
 from nailgun.rpc.receiver import NailgunReceiver
 from nailgun.rpc import utils
+from nailgun.settings import settings
 
 
 class RPCConsumer(ConsumerMixin):
 
-    def __init__(self, connection, receiver):
+    def __init__(self, connection, receiver, coalesce_window=0,
+                 coalesce_timeout=1):
         self.connection = connection
         self.receiver = receiver
+        #: max number of messages processed in one transaction,
+        #: messages are processed one by one if it is 0
+        self.coalesce_window = coalesce_window
+        #: max number of seconds the first message of window waits
+        #: for processing while next messages keep coming
+        self.coalesce_timeout = coalesce_timeout
+        self.window = []
+        self.window_started = None
+        self.received = False
 
     def get_consumers(self, Consumer, channel):
+        if self.coalesce_window:
+            callback = self.buffer_msg
+        else:
+            callback = self.consume_msg
         return [Consumer(queues=[rpc.nailgun_queue],
-                         callbacks=[self.consume_msg])]
+                         callbacks=[callback])]
+
+    def on_consume_ready(self, connection, channel, consumers, **kwargs):
+        if self.coalesce_window:
+            for consumer in consumers:
+                consumer.qos(prefetch_count=self.coalesce_window)
+
+    def on_iteration(self):
+        # nothing has been received while waiting for next message,
+        # so queue is drained and there is no reason to wait for more;
+        # steady stream of messages (e.g. progress reports) must not
+        # hold messages which are already received for longer than timeout
+        if self.window and (
+                not self.received or
+                time.time() - self.window_started >= self.coalesce_timeout):
+            self.consume_window()
+        self.received = False
+
+    def buffer_msg(self, body, msg):
+        if not self.window:
+            self.window_started = time.time()
+        self.window.append((body, msg))
+        self.received = True
+        if len(self.window) >= self.coalesce_window:
+            self.consume_window()
+
+    def consume_window(self):
+        """Process buffered messages in one transaction
+
+        Superseded progress messages are merged, all messages of the
+        window are acked after transaction is committed.
+        """
+        window, self.window = self.window, []
+        bodies = utils.coalesce_progress_messages(
+            [body for body, _ in window])
+        logger.info(
+            "Processing %d RPC messages coalesced into %d" %
+            (len(window), len(bodies))
+        )
+        try:
+            for body in bodies:
+                self.consume_body_in_savepoint(body)
+            db.commit()
+        except KeyboardInterrupt:
+            logger.error("Receiverd interrupted.")
+            for _, msg in window:
+                msg.requeue()
+            raise
+        finally:
+            db.remove()
+
+        for _, msg in window:
+            msg.ack()
+
+    def consume_body_in_savepoint(self, body):
+        """Call receiver for message body, failure of one message
+        rolls back its changes only
+        """
+        callback = getattr(self.receiver, body["method"])
+        started = time.time()
+        db.begin_nested()
+        try:
+            callback(**body["args"])
+        except errors.CannotFindTask as e:
+            db.rollback()
+            logger.warn(str(e))
+        except Exception:
+            db.rollback()
+            logger.error(traceback.format_exc())
+        else:
+            db.commit()
+        finally:
+            logger.info(
+                "RPC method %s processed in %.3f s" %
+                (body["method"], time.time() - started)
+            )
 
     def consume_msg(self, body, msg):
         callback = getattr(self.receiver, body["method"])
+        started = time.time()
         try:
             callback(**body["args"])
         except errors.CannotFindTask as e:
@@ -65,6 +157,10 @@ class RPCConsumer(ConsumerMixin):
             msg.ack()
         finally:
             db.remove()
+            logger.info(
+                "RPC method %s processed in %.3f s" %
+                (body["method"], time.time() - started)
+            )
 
     def on_precondition_failed(self, error_msg):
         logger.warning(error_msg)
@@ -83,6 +179,11 @@ def run():
     logger.info("Starting standalone RPC consumer...")
     with Connection(rpc.conn_str) as conn:
         try:
-            RPCConsumer(conn, NailgunReceiver).run()
+            RPCConsumer(
+                conn,
+                NailgunReceiver,
+                coalesce_window=settings.RPC_COALESCE_WINDOW,
+                coalesce_timeout=settings.RPC_COALESCE_TIMEOUT
+            ).run()
         except (KeyboardInterrupt, SystemExit):
             logger.info("Stopping standalone RPC consumer...")
@@ -25,3 +25,79 @@ def delete_entities(conn, *entities):
         channel = conn.channel()
         bound_entity = entity(channel)
         bound_entity.delete()
+
+
+#: methods which are called by orchestrator to report task progress
+PROGRESS_METHODS = ('deploy_resp', 'provision_resp')
+
+
+def _get_progress_message_key(body):
+    """Get key of progress message, messages with the same key report
+    progress of the same task
+
+    :returns: (method, task_uuid) or None if message reports something
+        besides progress (error, task completion, etc.)
+    """
+    args = body.get('args') or {}
+    if body.get('method') not in PROGRESS_METHODS or \
+            set(args) - set(['task_uuid', 'nodes', 'status', 'progress']) or \
+            args.get('status') not in (None, 'running'):
+        return None
+    return body['method'], args.get('task_uuid')
+
+
+def _merge_progress_messages(body, next_body):
+    """Merge two progress messages of the same task
+
+    :returns: merged message or None if next message changes anything
+        besides progress of nodes reported by the first one
+    """
+    def without_progress(node):
+        return dict(
+            (k, v) for k, v in six.iteritems(node) if k != 'progress')
+
+    nodes = [dict(n) for n in body['args'].get('nodes') or []]
+    nodes_by_uid = dict((n.get('uid'), n) for n in nodes)
+    for node in next_body['args'].get('nodes') or []:
+        merged_node = nodes_by_uid.get(node.get('uid'))
+        if merged_node is None:
+            merged_node = nodes_by_uid[node.get('uid')] = dict(node)
+            nodes.append(merged_node)
+        elif without_progress(merged_node) != without_progress(node):
+            return None
+        else:
+            merged_node.update(node)
+
+    args = dict(body['args'])
+    args.update(next_body['args'])
+    args['nodes'] = nodes
+    return dict(next_body, args=args)
+
+
+def coalesce_progress_messages(bodies):
+    """Merge progress messages of the same task which are superseded
+    by next ones.
+
+    Only progress values are merged. Messages with node status
+    changes, errors or task completion are kept, as well as order
+    of messages relative to them and to messages of other methods.
+
+    :param bodies: list of message bodies in order they were received
+    :returns: list of message bodies to process
+    """
+    result = []
+    # key of progress message -> its index in result
+    pending = {}
+    for body in bodies:
+        key = _get_progress_message_key(body)
+        if key is None:
+            pending.clear()
+        elif key in pending:
+            merged = _merge_progress_messages(result[pending[key]], body)
+            if merged is not None:
+                result[pending[key]] = merged
+                continue
+        if key is not None:
+            pending[key] = len(result)
+        result.append(body)
+    return result
@@ -69,6 +69,7 @@ from nailgun.consts import NETWORK_INTERFACE_TYPES
 from nailgun.middleware.connection_monitor import ConnectionMonitorMiddleware
 from nailgun.middleware.keystone import NailgunFakeKeystoneAuthMiddleware
 from nailgun.network.manager import NetworkManager
+from nailgun.orchestrator import deployment_serializers
 from nailgun.utils import reverse
 
 
@@ -1025,6 +1026,7 @@ class BaseTestCase(TestCase):
     def setUp(self):
         self.db = db
         flush()
+        deployment_serializers._facts_cache.clear()
         self.env = EnvironmentManager(app=self.app, session=self.db)
         self.env.upload_fixtures(self.fixtures)
 
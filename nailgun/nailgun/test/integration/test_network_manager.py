@@ -21,6 +21,7 @@ from mock import patch
 from netaddr import IPAddress
 from netaddr import IPNetwork
 from netaddr import IPRange
+from sqlalchemy import event
 from sqlalchemy import not_
 
 import nailgun
@@ -31,6 +32,7 @@ from nailgun.db.sqlalchemy.models import IPAddrRange
 from nailgun.db.sqlalchemy.models import NetworkGroup
 from nailgun.db.sqlalchemy.models import Node
 from nailgun.db.sqlalchemy.models import NodeNICInterface
+from nailgun.errors import errors
 from nailgun.network.neutron import NeutronManager
 from nailgun.network.nova_network import NovaNetworkManager
 from nailgun.test.base import BaseIntegrationTest
@@ -143,6 +145,33 @@ class TestNetworkManager(BaseIntegrationTest):
         )
         self.assertEqual(vip, vip2)
 
+    def test_get_free_ips_skips_used_ips_and_gateway(self):
+        self.env.create_cluster(api=False)
+        admin_ng = self.env.network_manager.get_admin_network_group()
+        map(self.db.delete, admin_ng.ip_ranges)
+        admin_ng.gateway = '10.0.0.2'
+        self.db.add(IPAddrRange(
+            first='10.0.0.1',
+            last='10.0.0.6',
+            network_group_id=admin_ng.id
+        ))
+        # address is taken in another network but still can't be reused
+        other_ng = self.db.query(NetworkGroup).filter(
+            NetworkGroup.id != admin_ng.id).first()
+        self.db.add(IPAddr(ip_addr='10.0.0.3', network=other_ng.id))
+        self.db.add(IPAddr(ip_addr='10.0.0.5', network=admin_ng.id))
+        self.db.commit()
+
+        with patch.object(self.env.network_manager,
+                          'is_ip_usable') as is_ip_usable:
+            free_ips = self.env.network_manager.get_free_ips(admin_ng, 3)
+
+        self.assertEqual(free_ips, ['10.0.0.1', '10.0.0.4', '10.0.0.6'])
+        self.assertFalse(is_ip_usable.called)
+        self.assertRaises(
+            errors.OutOfIPs,
+            self.env.network_manager.get_free_ips, admin_ng, 4)
+
     def test_get_node_networks_for_vlan_manager(self):
         cluster = self.env.create(
             cluster_kwargs={},
@@ -245,6 +274,71 @@ class TestNetworkManager(BaseIntegrationTest):
                 IPNetwork(mgmt_net.cidr)
             )
 
+    def test_assign_ips_queries_count_does_not_depend_on_nodes(self):
+        self.env.create(
+            cluster_kwargs={'api': False},
+            nodes_kwargs=[{'roles': ['compute']} for _ in range(6)]
+        )
+        # load lazy attributes used by assign_ips beforehand
+        for node in self.env.nodes:
+            objects.Node.should_have_public(node)
+        self.env.network_manager.assign_ips(self.env.nodes[:1], 'storage')
+
+        def count_queries(nodes):
+            queries = []
+
+            def handler(conn, cursor, statement, *args):
+                queries.append(statement)
+
+            engine = self.db.get_bind()
+            event.listen(engine, 'before_cursor_execute', handler)
+            try:
+                self.env.network_manager.assign_ips(nodes, 'storage')
+            finally:
+                event.remove(engine, 'before_cursor_execute', handler)
+            return len(queries)
+
+        self.assertEqual(
+            count_queries(self.env.nodes[1:3]),
+            count_queries(self.env.nodes[3:])
+        )
+
+        storage_ips = self.db.query(IPAddr.ip_addr).filter(
+            IPAddr.node.in_([n.id for n in self.env.nodes]),
+            IPAddr.network.in_([ng.id for ng in
+                                self.env.clusters[0].network_groups
+                                if ng.name == 'storage'])
+        ).all()
+        self.assertEqual(len(storage_ips), 6)
+        self.assertEqual(len(set(storage_ips)), 6)
+
+    def test_assign_ips_loads_networks_of_cluster_only(self):
+        for _ in range(2):
+            self.env.create(
+                cluster_kwargs={'api': False},
+                nodes_kwargs=[{'roles': ['compute']}]
+            )
+        other_cluster, cluster = self.env.clusters
+        other_group_id = objects.Cluster.get_default_group(other_cluster).id
+        cluster_id = cluster.id
+        self.db.commit()
+        self.db.expunge_all()
+
+        nodes = self.db.query(Node).filter_by(cluster_id=cluster_id).all()
+        loaded_groups = set()
+
+        def handler(network_group, context):
+            loaded_groups.add(network_group.group_id)
+
+        event.listen(NetworkGroup, 'load', handler)
+        try:
+            self.env.network_manager.assign_ips(nodes, 'storage')
+        finally:
+            event.remove(NetworkGroup, 'load', handler)
+
+        self.assertIn(nodes[0].group_id, loaded_groups)
+        self.assertNotIn(other_group_id, loaded_groups)
+
     def test_ipaddr_joinedload_relations(self):
         self.env.create(
             cluster_kwargs={},
@@ -269,6 +363,28 @@ class TestNetworkManager(BaseIntegrationTest):
         network_data = self.env.network_manager.get_node_networks(node)
         self.assertEqual(network_data, [])
 
+    def test_get_node_network_by_netname(self):
+        self.env.create(
+            cluster_kwargs={},
+            nodes_kwargs=[
+                {"pending_addition": True, "roles": ["controller"]},
+            ]
+        )
+        node = self.env.nodes[0]
+        self.env.network_manager.assign_ips([node], 'management')
+        self.env.network_manager.assign_admin_ips([node])
+
+        for net in self.env.network_manager.get_node_networks(node):
+            self.assertEqual(
+                self.env.network_manager.get_node_network_by_netname(
+                    node, net['name']),
+                net)
+
+        self.assertRaises(
+            IndexError,
+            self.env.network_manager.get_node_network_by_netname,
+            node, 'non-existent')
+
     def test_assign_admin_ips(self):
         node = self.env.create_node()
         self.env.network_manager.assign_admin_ips([node])
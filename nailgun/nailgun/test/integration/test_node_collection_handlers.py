@@ -14,10 +14,13 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import mock
 from oslo.serialization import jsonutils
 
 from nailgun.db.sqlalchemy.models import Node
 from nailgun.db.sqlalchemy.models import Notification
+from nailgun import objects
+from nailgun.settings import settings
 from nailgun.test.base import BaseIntegrationTest
 from nailgun.utils import reverse
 
@@ -101,6 +104,144 @@ class TestHandlers(BaseIntegrationTest):
         self.assertEqual(200, resp.status_code)
         self.assertEqual(2, len(resp.json_body))
 
+    def test_node_get_page(self):
+        self.env.create_nodes(5)
+        node_ids = sorted(n.id for n in self.env.nodes)
+
+        resp = self.app.get(
+            reverse('NodeCollectionHandler'),
+            params={'limit': 2, 'offset': 1},
+            headers=self.default_headers
+        )
+        self.assertEqual(200, resp.status_code)
+        self.assertEqual(node_ids[1:3], [n['id'] for n in resp.json_body])
+
+        resp = self.app.get(
+            reverse('NodeCollectionHandler'),
+            params={'offset': 4},
+            headers=self.default_headers
+        )
+        self.assertEqual(200, resp.status_code)
+        self.assertEqual(node_ids[4:], [n['id'] for n in resp.json_body])
+
+    def test_node_get_page_with_invalid_params(self):
+        for params in ({'limit': -1},
+                       {'offset': 'a'},
+                       {'limit': settings.MAX_ITEMS_PER_PAGE + 1}):
+            resp = self.app.get(
+                reverse('NodeCollectionHandler'),
+                params=params,
+                headers=self.default_headers,
+                expect_errors=True
+            )
+            self.assertEqual(400, resp.status_code)
+
+    def test_node_get_fields(self):
+        self.env.create_nodes(2)
+
+        resp = self.app.get(
+            reverse('NodeCollectionHandler'),
+            params={'fields': 'id,status'},
+            headers=self.default_headers
+        )
+        self.assertEqual(200, resp.status_code)
+        for node in resp.json_body:
+            self.assertItemsEqual(['id', 'status'], node.keys())
+
+        resp = self.app.get(
+            reverse('NodeCollectionHandler'),
+            params={'fields': 'id,replaced_deployment_info'},
+            headers=self.default_headers,
+            expect_errors=True
+        )
+        self.assertEqual(400, resp.status_code)
+
+    def test_node_get_not_modified(self):
+        self.env.create_nodes(2)
+        params = {'limit': 10}
+
+        resp = self.app.get(
+            reverse('NodeCollectionHandler'),
+            params=params,
+            headers=self.default_headers
+        )
+        self.assertEqual(200, resp.status_code)
+        etag = resp.headers['ETag']
+        self.assertTrue(etag.startswith('W/'))
+
+        headers = dict(self.default_headers, **{'If-None-Match': etag})
+        resp = self.app.get(
+            reverse('NodeCollectionHandler'),
+            params=params,
+            headers=headers
+        )
+        self.assertEqual(304, resp.status_code)
+        self.assertEqual(etag, resp.headers['ETag'])
+
+        self.env.nodes[0].status = 'error'
+        self.db.commit()
+        resp = self.app.get(
+            reverse('NodeCollectionHandler'),
+            params=params,
+            headers=headers
+        )
+        self.assertEqual(200, resp.status_code)
+        self.assertNotEqual(etag, resp.headers['ETag'])
+
+    def test_node_get_streamed_not_modified(self):
+        self.env.create_nodes(2)
+        self.db.commit()
+
+        resp = self.app.get(
+            reverse('NodeCollectionHandler'),
+            headers=self.default_headers
+        )
+        self.assertEqual(200, resp.status_code)
+        self.assertEqual(2, len(resp.json_body))
+        etag = resp.headers['ETag']
+
+        headers = dict(self.default_headers, **{'If-None-Match': etag})
+        with mock.patch.object(objects.NodeCollection,
+                               'to_json_iter') as to_json_iter:
+            resp = self.app.get(
+                reverse('NodeCollectionHandler'),
+                headers=headers
+            )
+        self.assertEqual(304, resp.status_code)
+        # collection is neither queried nor serialized
+        self.assertFalse(to_json_iter.called)
+
+        self.env.create_node()
+        self.db.commit()
+        resp = self.app.get(
+            reverse('NodeCollectionHandler'),
+            headers=headers
+        )
+        self.assertEqual(200, resp.status_code)
+        self.assertEqual(3, len(resp.json_body))
+        self.assertNotEqual(etag, resp.headers['ETag'])
+
+    def test_node_get_not_modified_by_other_tables(self):
+        self.env.create_nodes(2)
+        self.db.commit()
+
+        resp = self.app.get(
+            reverse('NodeCollectionHandler'),
+            headers=self.default_headers
+        )
+        self.assertEqual(200, resp.status_code)
+        etag = resp.headers['ETag']
+
+        self.env.create_release()
+        self.env.create_notification()
+        self.db.commit()
+        headers = dict(self.default_headers, **{'If-None-Match': etag})
+        resp = self.app.get(
+            reverse('NodeCollectionHandler'),
+            headers=headers
+        )
+        self.assertEqual(304, resp.status_code)
+
     def test_node_get_with_cluster_and_assigned_ip_addrs(self):
         self.env.create(
             cluster_kwargs={},
@@ -62,6 +62,92 @@ class TestDefaultOrchestratorInfoHandlers(BaseIntegrationTest):
         self.assertEqual(resp.status_code, 200)
         self.assertEqual(3, len(resp.json_body))
 
+    @patch('nailgun.orchestrator.deployment_serializers.serialize')
+    def test_default_deployment_handler_reuses_facts(self, m_serialize):
+        m_serialize.return_value = [{'uid': '1'}]
+        url = reverse('DefaultDeploymentInfo',
+                      kwargs={'cluster_id': self.cluster.id})
+
+        for _ in range(2):
+            resp = self.app.get(url, headers=self.default_headers)
+            self.assertEqual(resp.status_code, 200)
+            self.assertEqual([{'uid': '1'}], resp.json_body)
+        self.assertEqual(1, m_serialize.call_count)
+
+        objects.Cluster.patch_attributes(
+            self.cluster, {'editable': {}})
+        self.db.commit()
+
+        resp = self.app.get(url, headers=self.default_headers)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(2, m_serialize.call_count)
+
+    @patch('nailgun.orchestrator.deployment_serializers.serialize')
+    def test_default_deployment_facts_depend_on_nodes_state(self,
+                                                            m_serialize):
+        m_serialize.return_value = []
+        url = reverse('DefaultDeploymentInfo',
+                      kwargs={'cluster_id': self.cluster.id})
+
+        self.app.get(url, headers=self.default_headers)
+        self.env.nodes[0].status = consts.NODE_STATUSES.error
+        self.db.commit()
+        self.app.get(url, headers=self.default_headers)
+
+        self.assertEqual(2, m_serialize.call_count)
+
+    def test_default_deployment_facts_depend_on_node_name(self):
+        url = reverse('DefaultDeploymentInfo',
+                      kwargs={'cluster_id': self.cluster.id})
+        node = self.env.nodes[0]
+
+        resp = self.app.get(url, headers=self.default_headers)
+        self.assertEqual(resp.status_code, 200)
+
+        resp = self.app.put(
+            reverse('NodeHandler', kwargs={'obj_id': node.id}),
+            jsonutils.dumps({'name': 'renamed-node'}),
+            headers=self.default_headers)
+        self.assertEqual(resp.status_code, 200)
+
+        resp = self.app.get(url, headers=self.default_headers)
+        self.assertEqual(resp.status_code, 200)
+        names = set(n['user_node_name'] for n in resp.json_body
+                    if n['uid'] == str(node.id))
+        self.assertEqual(set(['renamed-node']), names)
+
+    @patch('nailgun.orchestrator.deployment_serializers.serialize')
+    def test_default_deployment_facts_depend_on_fqdn(self, m_serialize):
+        m_serialize.return_value = []
+        url = reverse('DefaultDeploymentInfo',
+                      kwargs={'cluster_id': self.cluster.id})
+
+        self.app.get(url, headers=self.default_headers)
+        self.env.nodes[0].fqdn = 'new-fqdn.test.domain.local'
+        self.db.commit()
+        self.app.get(url, headers=self.default_headers)
+
+        self.assertEqual(2, m_serialize.call_count)
+
+    @patch('nailgun.orchestrator.deployment_serializers.serialize')
+    def test_default_deployment_facts_depend_on_agent_nics(self,
+                                                           m_serialize):
+        m_serialize.return_value = []
+        url = reverse('DefaultDeploymentInfo',
+                      kwargs={'cluster_id': self.cluster.id})
+        node = self.env.nodes[0]
+
+        self.app.get(url, headers=self.default_headers)
+        for iface in node.meta['interfaces']:
+            iface['current_speed'] = 42
+        node.meta = dict(node.meta)
+        self.env.network_manager.update_interfaces_info(
+            node, update_by_agent=True)
+        self.db.commit()
+        self.app.get(url, headers=self.default_headers)
+
+        self.assertEqual(2, m_serialize.call_count)
+
     def test_default_provisioning_handler(self):
         resp = self.app.get(
             reverse('DefaultProvisioningInfo',
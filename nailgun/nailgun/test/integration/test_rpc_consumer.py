@@ -951,6 +951,53 @@ class TestConsumer(BaseReciverTestCase):
         # if there are error nodes
         self.assertEqual(task.status, "running")
 
+    def test_node_deploy_resp_failed_nodes(self):
+        self.env.create(
+            cluster_kwargs={},
+            nodes_kwargs=[
+                {"api": False, "name": "First"},
+                {"api": False, "name": "Second"},
+                {"api": False, "name": "Third"}]
+        )
+
+        node, node2, node3 = self.env.nodes
+
+        task = Task(
+            uuid=str(uuid.uuid4()),
+            name="deploy",
+            cluster_id=self.env.clusters[0].id
+        )
+        self.db.add(task)
+        self.db.commit()
+
+        kwargs = {'task_uuid': task.uuid,
+                  'nodes': [{'uid': node.id, 'status': 'deploying',
+                             'progress': 30},
+                            {'uid': node2.id, 'status': 'error',
+                             'progress': 50, 'error_type': 'deploy',
+                             'error_msg': 'Puppet failed'},
+                            {'uid': node3.id, 'online': False}]}
+        # astute repeats errors in next messages
+        self.receiver.deploy_resp(**kwargs)
+        self.receiver.deploy_resp(**kwargs)
+
+        self.db.refresh(node)
+        self.db.refresh(node2)
+        self.db.refresh(node3)
+        self.assertEqual(
+            [(n.status, n.progress, n.error_type, n.error_msg, n.online)
+             for n in (node, node2, node3)],
+            [('deploying', 30, None, None, True),
+             ('error', 100, 'deploy', 'Puppet failed', True),
+             ('discover', 100, None, 'Node is offline', False)])
+
+        notifications = self.db.query(Notification).filter_by(
+            topic='error', task_id=task.id).order_by(Notification.node_id)
+        self.assertEqual(
+            [(n.node_id, n.message) for n in notifications],
+            [(node2.id, "Failed to deploy node 'Second': Puppet failed"),
+             (node3.id, "Failed to deploy node 'Third': Node is offline")])
+
     def test_node_provision_resp(self):
         self.env.create(
             cluster_kwargs={},
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+#    Copyright 2015 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import copy
+import functools
+import six
+
+from nailgun import objects
+from nailgun.settings import settings
+from nailgun.test.performance import base
+from nailgun.utils.restrictions import VmwareAttributesRestriction
+
+
+class RestrictionOperationsLoadTest(base.BaseUnitLoadTestCase):
+
+    AZ_NUM = 50
+    NOVA_COMPUTES_NUM = 10
+
+    @classmethod
+    def setUpClass(cls):
+        super(RestrictionOperationsLoadTest, cls).setUpClass()
+        cluster = objects.Cluster.get_by_uid(cls.cluster['id'])
+        attributes = copy.deepcopy(cluster.attributes.editable)
+        attributes['common']['use_vcenter']['value'] = True
+        attributes['storage']['images_vcenter']['value'] = True
+        vmware_attributes = copy.deepcopy(
+            cls.env.read_fixtures(['vmware_attributes'])[0]['editable'])
+        cls.metadata = vmware_attributes['metadata']
+        cls.data = vmware_attributes['value']
+        cls.data['availability_zones'] = [
+            cls.make_availability_zone(i)
+            for i in six.moves.range(cls.AZ_NUM)]
+        # the same models as in CheckBeforeDeploymentTask
+        cls.models = {
+            'settings': attributes,
+            'default': vmware_attributes,
+            'cluster': cluster,
+            'version': settings.VERSION,
+            'networking_parameters': cluster.network_config,
+        }
+
+    @classmethod
+    def make_availability_zone(cls, number):
+        return {
+            'az_name': 'Zone {0}'.format(number),
+            'vcenter_host': '1.2.3.{0}'.format(number),
+            'vcenter_username': 'admin',
+            'vcenter_password': 'secret',
+            'nova_computes': [
+                {
+                    'vsphere_cluster': 'cluster{0}'.format(i),
+                    'service_name': 'Compute {0}'.format(i),
+                    'datastore_regex': '',
+                }
+                for i in six.moves.range(cls.NOVA_COMPUTES_NUM)
+            ],
+        }
+
+    @base.evaluate_unit_performance
+    def test_check_vmware_attributes_restrictions(self):
+        func = functools.partial(
+            VmwareAttributesRestriction.check_data,
+            self.models,
+            self.metadata,
+            self.data
+        )
+        self.check_time_exec(func, 1)
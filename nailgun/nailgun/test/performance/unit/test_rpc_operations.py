@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+#    Copyright 2015 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import functools
+import six
+
+from kombu import Connection
+from kombu import pools
+import mock
+
+from nailgun import rpc
+from nailgun.test.performance import base
+
+
+def cast_with_new_connection(name, message):
+    """Casts message the way it was done before producers pooling
+    """
+    with Connection(rpc.conn_str) as conn:
+        with conn.Producer(serializer='json') as producer:
+            producer.publish(
+                message, exchange=rpc.naily_exchange, routing_key=name,
+                declare=[rpc.naily_queue])
+
+
+class RpcCastLoadTest(base.BaseUnitLoadTestCase):
+    """Measures how many casts are done per second
+
+    Broker is emulated with in-memory transport, so the results
+    show overhead of kombu rather than network latency.
+    """
+
+    CASTS_NUM = 1000
+
+    @classmethod
+    def setUpClass(cls):
+        super(RpcCastLoadTest, cls).setUpClass()
+        cls.conn_str_patcher = mock.patch.object(rpc, 'conn_str', 'memory://')
+        cls.conn_str_patcher.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.conn_str_patcher.stop()
+        pools.reset()
+        super(RpcCastLoadTest, cls).tearDownClass()
+
+    def cast_many(self, cast):
+        message = {'method': 'test', 'args': {'task_uuid': 'uuid'}}
+        for _ in six.moves.range(self.CASTS_NUM):
+            cast('naily', message)
+
+        with Connection(rpc.conn_str) as conn:
+            conn.SimpleQueue(rpc.naily_queue).clear()
+
+    @base.evaluate_unit_performance
+    def test_cast_with_connection_per_call(self):
+        func = functools.partial(self.cast_many, cast_with_new_connection)
+        self.check_time_exec(func)
+
+    @base.evaluate_unit_performance
+    def test_cast_with_pooled_producer(self):
+        func = functools.partial(self.cast_many, rpc.cast)
+        self.check_time_exec(func)
@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+#    Copyright 2015 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from nailgun.extensions.volume_manager.manager import DisksFormatConvertor
+from nailgun.extensions.volume_manager.manager import VolumeManager
+from nailgun.test.performance import base
+
+
+class VolumeManagerOperationsLoadTest(base.BaseUnitLoadTestCase):
+    """Measures volumes allocation on nodes with many disks
+    """
+
+    DISKS_NUM = 24
+    ROLES = [['controller'], ['compute', 'cinder'], ['ceph-osd'],
+             ['controller', 'cinder', 'ceph-osd']]
+
+    @classmethod
+    def make_disks(cls):
+        return [
+            {
+                'disk': 'disk/by-path/pci-0000:00:0d.0-scsi-{0}:0:0:0'.format(
+                    i),
+                'name': 'sd{0}'.format(chr(ord('a') + i)),
+                'model': 'TOSHIBA MK1002TS',
+                # disks of different sizes, the same ones on every run
+                'size': (100 + i * 150) * 1024 ** 3,
+            }
+            for i in range(cls.DISKS_NUM)
+        ]
+
+    @classmethod
+    def setUpClass(cls):
+        super(VolumeManagerOperationsLoadTest, cls).setUpClass()
+        for roles in cls.ROLES:
+            cls.env.create_node(
+                cluster_id=cls.cluster['id'],
+                pending_roles=roles,
+                pending_addition=True,
+                meta={'disks': cls.make_disks()})
+
+    def gen_volumes_info(self):
+        for node in self.env.nodes:
+            VolumeManager(node).gen_volumes_info()
+
+    def set_volumes_sizes(self):
+        for node in self.env.nodes:
+            volumes = VolumeManager(node).gen_volumes_info()
+            disks = DisksFormatConvertor.format_disks_to_simple(volumes)
+            for disk in disks:
+                for volume in disk['volumes']:
+                    volume['size'] /= 2
+            DisksFormatConvertor.format_disks_to_full(node, disks)
+
+    @base.evaluate_unit_performance
+    def test_gen_volumes_info(self):
+        self.check_time_exec(self.gen_volumes_info, 2)
+
+    @base.evaluate_unit_performance
+    def test_set_volumes_sizes(self):
+        self.check_time_exec(self.set_volumes_sizes, 4)
@@ -350,7 +350,7 @@ class TestInstallationInfo(BaseTestCase):
             'tasks', 'cluster_changes', 'nodegroups', 'pending_release_id',
             'releases', 'replaced_provisioning_info', 'notifications',
             'deployment_tasks', 'name', 'replaced_deployment_info',
-            'grouping'
+            'grouping', 'deployment_revision'
         )
         for field in remove_fields:
             cluster_schema.pop(field)
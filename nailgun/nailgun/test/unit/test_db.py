@@ -14,6 +14,8 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+from nailgun.db import get_revision
+from nailgun.db.sqlalchemy.models import Release
 from nailgun.db.sqlalchemy import utils
 from nailgun.test import base
 
@@ -45,3 +47,53 @@ class TestDbUtils(base.BaseUnitTest):
             dsn,
             'db_engine://db_user:db_pass@/database?host=/path/to/socket'
         )
+
+
+class TestDbRevision(base.BaseTestCase):
+
+    def test_revision_increased_by_committed_changes(self):
+        revision = get_revision()
+        self.env.create_release()
+        self.db.commit()
+        changed_revision = get_revision()
+        self.assertGreater(changed_revision, revision)
+
+        # reading doesn't change the revision
+        self.db.query(Release).all()
+        self.db.commit()
+        self.assertEqual(changed_revision, get_revision())
+
+    def test_revision_increased_by_bulk_update(self):
+        self.env.create_release()
+        revision = get_revision()
+        self.db.query(Release).update({'name': 'new_name'})
+        self.db.commit()
+        self.assertGreater(get_revision(), revision)
+
+    def test_revision_not_increased_by_rolled_back_changes(self):
+        self.env.create_release()
+        revision = get_revision()
+        self.db.query(Release).update({'name': 'new_name'})
+        self.db.rollback()
+        self.db.commit()
+        self.assertEqual(revision, get_revision())
+
+    def test_revision_of_tables_increased_by_their_changes(self):
+        self.env.create_release()
+        self.db.commit()
+        revision = get_revision(['nodes'])
+        releases_revision = get_revision(['releases'])
+        self.assertGreater(releases_revision, 0)
+
+        self.db.query(Release).update({'name': 'new_name'})
+        self.db.commit()
+        self.assertEqual(revision, get_revision(['nodes']))
+        self.assertGreater(get_revision(['releases']), releases_revision)
+        self.assertEqual(get_revision(), get_revision(['releases']))
+
+    def test_revision_of_unknown_changes_is_revision_of_all_tables(self):
+        revision = get_revision(['nodes'])
+        self.db.execute(
+            "WITH rel AS (SELECT 1) UPDATE releases SET name = 'new_name'")
+        self.db.commit()
+        self.assertGreater(get_revision(['nodes']), revision)
@@ -16,8 +16,12 @@
 
 import inspect
 
+import mock
+
 from nailgun.errors import errors
 from nailgun.expression import Expression
+from nailgun.expression import ExpressionContext
+from nailgun.expression.expression_parser import parse
 from nailgun.test.base import BaseTestCase
 
 
@@ -95,3 +99,37 @@ class TestExpressionParser(BaseTestCase):
             else:
                 self.assertEqual(evaluate_expression(expression, models),
                                  result)
+
+    def test_expression_parsed_once(self):
+        text = 'cluster:mode == "parsed_once" and true'
+        with mock.patch('nailgun.expression.parse', wraps=parse) as m_parse:
+            first = Expression(text)
+            second = Expression(text)
+
+        self.assertIs(first.compiled_expression, second.compiled_expression)
+        self.assertEqual(m_parse.call_count, 1)
+
+    def test_evaluate_with_models(self):
+        condition = Expression('settings:hypervisor.value == "kvm"')
+        kvm = {'settings': {'hypervisor': {'value': 'kvm'}}}
+        qemu = {'settings': {'hypervisor': {'value': 'qemu'}}}
+
+        self.assertTrue(condition.evaluate(kvm))
+        self.assertFalse(condition.evaluate(qemu))
+        self.assertFalse(Expression(
+            'settings:hypervisor.value == "kvm"', qemu).evaluate())
+        self.assertRaises(TypeError, condition.evaluate, {'settings': {}})
+        self.assertIsNone(Expression(
+            'settings:hypervisor.value', strict=False).evaluate({
+                'settings': {}}))
+
+    def test_model_paths_resolved_once_in_context(self):
+        settings = mock.MagicMock()
+        settings.__getitem__.return_value = {'value': 'kvm'}
+        context = ExpressionContext({'settings': settings})
+
+        self.assertTrue(Expression('settings:hypervisor.value == "kvm"')
+                        .evaluate(context=context))
+        self.assertFalse(Expression('settings:hypervisor.value == "qemu"')
+                         .evaluate(context=context))
+        self.assertEqual(settings.__getitem__.call_count, 1)
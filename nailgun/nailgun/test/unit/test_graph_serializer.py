@@ -18,6 +18,7 @@ from collections import defaultdict
 from itertools import groupby
 
 import mock
+import networkx as nx
 import yaml
 
 from nailgun.orchestrator import deployment_graph
@@ -274,6 +275,27 @@ class TestTasksRemoval(base.BaseTestCase):
         self.assertItemsEqual(
             tasks.node.keys(), ['setup_network', 'install_controller'])
 
+    def test_tasks_topology_is_cached_by_group(self):
+        graph = self.astute.graph
+        with mock.patch.object(graph, 'get_tasks',
+                               wraps=graph.get_tasks) as m_get_tasks:
+            tasks = graph.get_tasks_topology('controller')
+            self.assertIs(graph.get_tasks_topology('controller'), tasks)
+            graph.get_tasks_topology('primary-controller')
+        self.assertEqual(
+            [t['id'] for t in tasks], ['setup_network', 'install_controller'])
+        self.assertEqual(m_get_tasks.call_count, 2)
+
+    def test_only_tasks_drops_tasks_topology(self):
+        graph = self.astute.graph
+        tasks = graph.get_tasks_topology('controller')
+        self.astute.only_tasks(['setup_network'])
+
+        self.assertEqual(len(tasks), 2)
+        self.assertEqual(
+            [t['id'] for t in graph.get_tasks_topology('controller')],
+            ['setup_network'])
+
 
 class GroupsTraversalTest(base.BaseTestCase):
 
@@ -622,6 +644,51 @@ class TestFindGraph(base.BaseTestCase):
             ['task_a', 'task_b', 'task_c', 'task_d'])
 
 
+class TestNextGroups(base.BaseTestCase):
+
+    def setUp(self):
+        super(TestNextGroups, self).setUp()
+        self.graph = deployment_graph.DeploymentGraph()
+        self.graph.add_tasks(yaml.load(COMPLEX_DEPENDENCIES))
+
+    def get_next_groups_by_predecessors(self, processed_nodes):
+        result = []
+        for node in self.graph.nodes():
+            if node in processed_nodes:
+                continue
+            predecessors = nx.dfs_predecessors(self.graph.reverse(), node)
+            if set(predecessors.keys()) <= processed_nodes:
+                result.append(node)
+        return result
+
+    def test_processed_node_with_not_processed_predecessors(self):
+        groups = self.graph.iter_next_groups(set(['pre_deployment']))
+        self.assertEqual(next(groups), ['pre_deployment_start', 'pre_c'])
+        self.assertEqual(next(groups), ['pre_a'])
+        self.assertEqual(next(groups), ['pre_b'])
+        self.assertEqual(next(groups), ['pre_d'])
+        # pre_deployment is done with pre_d, so deploy_start is ready
+        self.assertEqual(next(groups), ['deploy_start'])
+
+    def test_same_rounds_as_traversal_of_predecessors(self):
+        for processed in (set(),
+                          set(['pre_deployment', 'task_b']),
+                          set(['group_a', 'deploy_end', 'post_a'])):
+            expected = []
+            processed_nodes = set(processed)
+            current = self.get_next_groups_by_predecessors(processed_nodes)
+            while current:
+                expected.append(current)
+                processed_nodes.update(current)
+                current = self.get_next_groups_by_predecessors(
+                    processed_nodes)
+
+            self.assertEqual(
+                list(self.graph.iter_next_groups(processed)), expected)
+            self.assertEqual(
+                self.graph.get_next_groups(processed), expected[0])
+
+
 class TestOrdered(base.BaseTestCase):
 
     TASKS = """
@@ -15,6 +15,7 @@
 #    under the License.
 
 import datetime
+import mock
 import unittest
 
 import web
@@ -77,3 +78,14 @@ class TestLoadDbDriverWithSAExceptions(unittest.TestCase):
             db.flush()
 
         self.assertRaises(AssertionError, load_db_driver, handler)
+
+    @mock.patch('nailgun.api.v1.handlers.base.db')
+    def test_session_is_kept_until_streamed_response_is_consumed(
+            self, db_mock):
+        def handler():
+            yield 'chunk'
+
+        response = load_db_driver(handler)
+        self.assertEqual(db_mock.remove.call_count, 0)
+        self.assertEqual(list(response), ['chunk'])
+        self.assertEqual(db_mock.remove.call_count, 1)
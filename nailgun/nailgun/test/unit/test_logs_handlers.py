@@ -16,6 +16,7 @@
 
 import copy
 import os
+import re
 import shutil
 import tempfile
 import time
@@ -25,6 +26,7 @@ import mock
 from oslo.serialization import jsonutils
 
 import nailgun
+from nailgun.api.v1.handlers.logs import LogIndex
 from nailgun.api.v1.handlers.logs import read_backwards
 from nailgun.errors import errors
 from nailgun.settings import settings
@@ -100,9 +102,13 @@ class TestLogs(BaseIntegrationTest):
             ]
         )
         self.patcher.start()
+        self.index_patcher = mock.patch.object(
+            settings, 'LOG_INDEX_DIR', os.path.join(self.log_dir, 'index'))
+        self.index_patcher.start()
 
     def tearDown(self):
         shutil.rmtree(self.log_dir)
+        self.index_patcher.stop()
         self.patcher.stop()
         super(TestLogs, self).tearDown()
 
@@ -369,6 +375,163 @@ class TestLogs(BaseIntegrationTest):
                     lines
                 )
 
+    def _make_log_entries(self, count, start=0):
+        return [
+            [
+                time.strftime(settings.UI_LOG_DATE_FORMAT,
+                              time.gmtime(i * 60)),
+                'LEVEL{0}'.format(i),
+                'text{0}'.format(i),
+            ]
+            for i in range(start, start + count)
+        ]
+
+    def _make_log_index(self, step=2):
+        log_config = settings.LOGS[0]
+        return LogIndex(log_config['path'],
+                        re.compile(log_config['regexp']),
+                        log_config['date_format'],
+                        step=step)
+
+    def test_log_index_updated_incrementally(self):
+        log_entries = self._make_log_entries(5)
+        self._create_logfile_for_node(settings.LOGS[0], log_entries)
+        lines = map(self._format_log_entry, log_entries)
+        offsets = [len(''.join(lines[:i])) for i in range(0, 5, 2)]
+
+        index = self._make_log_index()
+        index.update()
+        self.assertEqual(index.offsets, offsets)
+        self.assertEqual(index.size, len(''.join(lines)))
+        self.assertEqual(os.path.dirname(index.index_file),
+                         settings.LOG_INDEX_DIR)
+        self.assertTrue(os.path.exists(index.index_file))
+
+        more_entries = self._make_log_entries(2, start=5)
+        with open(settings.LOGS[0]['path'], 'a') as f:
+            f.write(''.join(map(self._format_log_entry, more_entries)))
+
+        index = self._make_log_index()
+        with mock.patch.object(index, 'reset') as m_reset:
+            index.update()
+        self.assertFalse(m_reset.called)
+        lines += map(self._format_log_entry, more_entries)
+        self.assertEqual(index.offsets,
+                         offsets + [len(''.join(lines[:6]))])
+
+    def test_log_index_stopped_by_deadline(self):
+        log_entries = self._make_log_entries(5)
+        self._create_logfile_for_node(settings.LOGS[0], log_entries)
+        lines = map(self._format_log_entry, log_entries)
+
+        index = self._make_log_index()
+        with mock.patch('nailgun.api.v1.handlers.logs.time.time',
+                        side_effect=[0, 0, 10]):
+            index.update(deadline=5)
+        self.assertEqual(index.offsets, [0, len(''.join(lines[:2]))])
+        self.assertEqual(index.size, len(''.join(lines[:4])))
+        # entries after indexed part are in the range
+        self.assertEqual(index.bounds(date_after=time.gmtime(240)[:6]),
+                         (len(''.join(lines[:2])), None))
+
+        index = self._make_log_index()
+        index.update()
+        self.assertEqual(index.offsets,
+                         [len(''.join(lines[:i])) for i in range(0, 5, 2)])
+
+    def test_log_index_rebuilt_on_rotation(self):
+        self._create_logfile_for_node(
+            settings.LOGS[0], self._make_log_entries(5))
+        self._make_log_index().update()
+
+        log_entries = self._make_log_entries(6, start=10)
+        self._create_logfile_for_node(settings.LOGS[0], log_entries)
+        index = self._make_log_index()
+        index.update()
+
+        lines = map(self._format_log_entry, log_entries)
+        self.assertEqual(index.offsets,
+                         [len(''.join(lines[:i])) for i in range(0, 6, 2)])
+        self.assertEqual(index.dates[0], time.gmtime(600)[:6])
+
+    @mock.patch.object(settings, 'LOG_INDEX_STEP', 2)
+    def test_log_entries_filtered_by_date(self):
+        log_entries = self._make_log_entries(10)
+        self.env.create_cluster(api=False)
+        self._create_logfile_for_node(settings.LOGS[0], log_entries)
+
+        resp = self.app.get(
+            reverse('LogEntryCollectionHandler'),
+            params={
+                'source': settings.LOGS[0]['id'],
+                'date_after': log_entries[3][0],
+                'date_before': log_entries[6][0],
+                'max_entries': 2,
+            },
+            headers=self.default_headers
+        )
+        self.assertEqual(200, resp.status_code)
+        response = resp.json_body
+        self.assertEqual(response['entries'],
+                         [log_entries[6], log_entries[5]])
+        self.assertTrue(response['has_more'])
+
+        resp = self.app.get(
+            reverse('LogEntryCollectionHandler'),
+            params={
+                'source': settings.LOGS[0]['id'],
+                'date_after': log_entries[3][0],
+                'date_before': log_entries[6][0],
+                'fetch_older': True,
+                'from': response['from'],
+                'to': response['to'],
+            },
+            headers=self.default_headers
+        )
+        self.assertEqual(200, resp.status_code)
+        response = resp.json_body
+        self.assertEqual(response['entries'],
+                         [log_entries[4], log_entries[3]])
+        self.assertFalse(response['has_more'])
+
+    def test_log_search_handler(self):
+        cluster = self.env.create_cluster(api=False)
+        nodes = [
+            self.env.create_node(cluster_id=cluster['id'], ip=ip)
+            for ip in ('10.20.30.40', '10.20.30.41')
+        ]
+        log_entries = self._make_log_entries(6)
+        self._create_logfile_for_node(
+            settings.LOGS[1], log_entries[0::2], nodes[0])
+        self._create_logfile_for_node(
+            settings.LOGS[1], log_entries[1::2], nodes[1])
+
+        resp = self.app.get(
+            reverse('LogSearchHandler', kwargs={'cluster_id': cluster['id']}),
+            params={'pattern': 'text[1-4]', 'max_entries': 3},
+            headers=self.default_headers
+        )
+        self.assertEqual(200, resp.status_code)
+        response = resp.json_body
+        self.assertEqual(
+            [(e['date'], e['level'], e['text'], e['node'])
+             for e in response['entries']],
+            [tuple(log_entries[i]) + (nodes[i % 2].id,) for i in (4, 3, 2)])
+        self.assertEqual(
+            set(e['source'] for e in response['entries']),
+            set([settings.LOGS[1]['id']]))
+        self.assertTrue(response['has_more'])
+
+    def test_log_search_handler_invalid_pattern(self):
+        cluster = self.env.create_cluster(api=False)
+        resp = self.app.get(
+            reverse('LogSearchHandler', kwargs={'cluster_id': cluster['id']}),
+            params={'pattern': '(text'},
+            headers=self.default_headers,
+            expect_errors=True
+        )
+        self.assertEqual(400, resp.status_code)
+
     def _format_log_entry(self, log_entry):
         return ':'.join(log_entry) + '\n'
 
@@ -476,3 +476,26 @@ class TestSchemalessRoles(base.BaseAlembicMigrationTest):
         self.assertNotIn('node_roles', self.meta.tables)
         self.assertNotIn('pending_node_roles', self.meta.tables)
         self.assertNotIn('roles', self.meta.tables)
+
+
+class TestClusterDeploymentRevisionMigration(base.BaseAlembicMigrationTest):
+
+    def test_deployment_revision_field_exists(self):
+        column = self.meta.tables['clusters'].c.deployment_revision
+        self.assertFalse(column.nullable)
+        self.assertIsInstance(column.type, sa.Integer)
+
+
+class TestDbRevisionMigration(base.BaseAlembicMigrationTest):
+
+    def test_revisions_table_exists_and_empty(self):
+        table = self.meta.tables['db_revisions']
+        self.assertEqual(['table_name'],
+                         [c.name for c in table.primary_key.columns])
+        self.assertEqual(
+            0, db.execute(sa.select([sa.func.count()]).select_from(
+                table)).scalar())
+
+    def test_sequence_is_not_called(self):
+        self.assertFalse(db.execute(
+            'SELECT is_called FROM db_revision').scalar())
@@ -26,6 +26,7 @@ from nailgun.extensions.volume_manager.manager import Disk
 from nailgun.extensions.volume_manager.manager import DisksFormatConvertor
 from nailgun.extensions.volume_manager.manager import only_disks
 from nailgun.extensions.volume_manager.manager import only_vg
+from nailgun.extensions.volume_manager.manager import VolumeManager
 from nailgun.test.base import BaseIntegrationTest
 from nailgun.test.base import fake_tasks
 from nailgun.utils import reverse
@@ -808,6 +809,25 @@ class TestVolumeManager(BaseIntegrationTest):
 
         self.update_ram_and_assert_swap_size(node, 81920, 4096)
 
+    def test_set_volumes_sizes_same_as_one_by_one(self):
+        node = self.create_node('compute', 'cinder')
+        volume_manager = VolumeManager(node)
+        volumes = volume_manager.gen_volumes_info()
+
+        sizes = []
+        for disk in DisksFormatConvertor.format_disks_to_simple(volumes):
+            for volume in disk['volumes']:
+                sizes.append((disk['id'], volume['name'], volume['size'] / 2))
+        self.assertGreater(len(sizes), 1)
+
+        for disk_id, volume_name, size in sizes:
+            expected = volume_manager.set_volume_size(
+                disk_id, volume_name, size)
+
+        volume_manager = VolumeManager(node)
+        volume_manager.gen_volumes_info()
+        self.assertEqual(volume_manager.set_volumes_sizes(sizes), expected)
+
 
 class TestDisks(BaseIntegrationTest):
 
@@ -18,6 +18,7 @@ import copy
 import datetime
 import hashlib
 import jsonschema
+import mock
 import six
 import uuid
 
@@ -93,6 +94,23 @@ class TestObjects(BaseIntegrationTest):
         self.assertIsInstance(iterable_filtered, ifilter)
         self.assertEquals(0, len(list(iterable_filtered)))
 
+    def test_paginate(self):
+        for i in xrange(5):
+            self.env.create_release(name=str(i))
+        ids = sorted(r.id for r in objects.ReleaseCollection.all())
+
+        page = objects.ReleaseCollection.paginate(None, limit=2, offset=1)
+        self.assertIsInstance(page, NoCacheQuery)
+        self.assertEqual(ids[1:3], [r.id for r in page])
+
+        releases = list(objects.ReleaseCollection.all())
+        page = objects.ReleaseCollection.paginate(releases, offset=3)
+        self.assertEqual(releases[3:], page)
+
+        # empty iterable is not replaced with all objects
+        self.assertEqual(
+            [], objects.ReleaseCollection.paginate([], limit=2))
+
     def test_filter_by_not(self):
         names = cycle('ABCDE')
         os = cycle(['CentOS', 'Ubuntu'])
@@ -424,6 +442,43 @@ class TestNodeObject(BaseIntegrationTest):
         nodes_db = objects.NodeCollection.eager_nodes_handlers(None)
         self.assertEqual(nodes_db.count(), nodes_count)
 
+    def test_to_json_iter_is_the_same_as_to_json(self):
+        self.env.create_nodes(5)
+        with mock.patch.object(objects.NodeCollection,
+                               'stream_chunk_size', 2):
+            # order of objects fetched by query without ORDER BY isn't
+            # defined, so all queries here are ordered
+            for nodes in (
+                objects.NodeCollection.order_by(
+                    objects.NodeCollection.eager_nodes_handlers(None), 'id'),
+                objects.NodeCollection.order_by(
+                    objects.NodeCollection.all(), '-id').limit(4),
+                objects.NodeCollection.all().all(),
+                objects.NodeCollection.filter_by(None, id=-1),
+            ):
+                chunks = list(objects.NodeCollection.to_json_iter(nodes))
+                self.assertEqual(
+                    ''.join(chunks),
+                    objects.NodeCollection.to_json(nodes))
+
+    def test_to_json_iter_skips_objects_deleted_in_between(self):
+        self.env.create_nodes(5)
+        nodes = objects.NodeCollection.order_by(
+            objects.NodeCollection.all(), 'id')
+        ids = [n.id for n in nodes]
+        with mock.patch.object(objects.NodeCollection,
+                               'stream_chunk_size', 2):
+            chunks = objects.NodeCollection.to_json_iter(nodes)
+            data = [next(chunks), next(chunks)]
+            # the rest of nodes are loaded by the next chunks
+            self.db.delete(objects.Node.get_by_uid(ids[2]))
+            self.db.flush()
+            data.extend(chunks)
+
+        self.assertEqual(
+            [ids[0], ids[1], ids[3], ids[4]],
+            [n['id'] for n in jsonutils.loads(''.join(data))])
+
     def test_reset_to_discover(self):
         self.env.create(
             nodes_kwargs=[
@@ -17,7 +17,9 @@
 import mock
 
 from nailgun.errors import errors
+from nailgun import objects
 from nailgun.rpc import receiverd
+from nailgun.rpc import utils
 from nailgun.test import base
 
 
@@ -56,3 +58,161 @@ class TestRpcAcknowledge(base.BaseTestCase):
             self.consumer.consume_msg, self.body, self.msg)
         self.assertFalse(self.msg.ack.called)
         self.assertEqual(self.msg.requeue.call_count, 1)
+
+
+class TestRpcAcknowledgeWindow(base.BaseTestCase):
+
+    def setUp(self):
+        super(TestRpcAcknowledgeWindow, self).setUp()
+        self.receiver = mock.Mock()
+        self.connection = mock.Mock()
+        self.consumer = receiverd.RPCConsumer(
+            self.connection, self.receiver, coalesce_window=3)
+        self.msgs = [mock.Mock() for _ in range(3)]
+        self.bodies = [
+            {'method': 'deploy_resp',
+             'args': {'task_uuid': 'uuid', 'progress': progress}}
+            for progress in (10, 20, 30)]
+
+    def test_messages_processed_when_window_is_full(self):
+        for body, msg in zip(self.bodies, self.msgs)[:2]:
+            self.consumer.buffer_msg(body, msg)
+        self.assertFalse(self.receiver.deploy_resp.called)
+
+        self.consumer.buffer_msg(self.bodies[2], self.msgs[2])
+        self.receiver.deploy_resp.assert_called_once_with(
+            task_uuid='uuid', progress=30, nodes=[])
+        for msg in self.msgs:
+            self.assertEqual(msg.ack.call_count, 1)
+
+    def test_messages_processed_when_queue_is_drained(self):
+        self.consumer.on_iteration()
+        self.consumer.buffer_msg(self.bodies[0], self.msgs[0])
+        self.consumer.on_iteration()
+        self.assertFalse(self.receiver.deploy_resp.called)
+
+        # nothing is received during next iteration
+        self.consumer.on_iteration()
+        self.assertEqual(self.receiver.deploy_resp.call_count, 1)
+        self.assertEqual(self.msgs[0].ack.call_count, 1)
+
+    @mock.patch('nailgun.rpc.receiverd.time.time')
+    def test_messages_processed_when_timeout_expires(self, time_mock):
+        time_mock.return_value = 100
+        self.consumer.buffer_msg(self.bodies[0], self.msgs[0])
+        self.consumer.on_iteration()
+        self.assertFalse(self.receiver.deploy_resp.called)
+
+        # messages keep coming, but the first one waits too long
+        time_mock.return_value = 101
+        self.consumer.buffer_msg(self.bodies[1], self.msgs[1])
+        self.consumer.on_iteration()
+        self.assertEqual(self.receiver.deploy_resp.call_count, 1)
+        for msg in self.msgs[:2]:
+            self.assertEqual(msg.ack.call_count, 1)
+
+        # timeout is counted from the first message of the next window
+        time_mock.return_value = 101.5
+        self.consumer.buffer_msg(self.bodies[2], self.msgs[2])
+        time_mock.return_value = 102
+        self.consumer.on_iteration()
+        self.assertEqual(self.receiver.deploy_resp.call_count, 1)
+
+    def test_messages_acked_if_exception(self):
+        self.receiver.deploy_resp.side_effect = Exception
+        self.receiver.test.side_effect = errors.NoTaskFound
+        self.consumer.buffer_msg(self.bodies[0], self.msgs[0])
+        self.consumer.buffer_msg({'method': 'test', 'args': {}},
+                                 self.msgs[1])
+        self.consumer.buffer_msg(self.bodies[1], self.msgs[2])
+        self.assertEqual(self.receiver.deploy_resp.call_count, 2)
+        self.assertEqual(self.receiver.test.call_count, 1)
+        for msg in self.msgs:
+            self.assertEqual(msg.ack.call_count, 1)
+
+    def test_only_changes_of_failed_message_rolled_back(self):
+        self.env.create_nodes(2)
+        node_ids = [n.id for n in self.env.nodes]
+        self.db.commit()
+
+        def update_node(node_id, fail):
+            objects.Node.get_by_uid(node_id).name = 'updated'
+            self.db.flush()
+            if fail:
+                raise Exception()
+
+        self.receiver.test.side_effect = update_node
+        self.consumer.buffer_msg(
+            {'method': 'test', 'args': {'node_id': node_ids[0],
+                                        'fail': True}},
+            self.msgs[0])
+        self.consumer.buffer_msg(
+            {'method': 'test', 'args': {'node_id': node_ids[1],
+                                        'fail': False}},
+            self.msgs[1])
+        self.consumer.consume_window()
+
+        self.assertEqual(
+            [objects.Node.get_by_uid(node_id).name == 'updated'
+             for node_id in node_ids],
+            [False, True])
+
+    def test_messages_requeued_in_case_of_interrupt(self):
+        self.receiver.deploy_resp.side_effect = KeyboardInterrupt
+        for body, msg in zip(self.bodies, self.msgs)[:2]:
+            self.consumer.buffer_msg(body, msg)
+        self.assertRaises(
+            KeyboardInterrupt,
+            self.consumer.buffer_msg, self.bodies[2], self.msgs[2])
+        for msg in self.msgs:
+            self.assertFalse(msg.ack.called)
+            self.assertEqual(msg.requeue.call_count, 1)
+
+
+class TestCoalesceProgressMessages(base.BaseUnitTest):
+
+    def progress_msg(self, task_uuid, nodes, **kwargs):
+        kwargs.update(task_uuid=task_uuid, nodes=nodes)
+        return {'method': 'deploy_resp', 'args': kwargs}
+
+    def test_progress_of_nodes_merged(self):
+        bodies = [
+            self.progress_msg('1', [{'uid': 1, 'progress': 10,
+                                     'status': 'deploying'}], progress=5),
+            self.progress_msg('2', [{'uid': 3, 'progress': 10}]),
+            self.progress_msg('1', [{'uid': 1, 'progress': 20,
+                                     'status': 'deploying'},
+                                    {'uid': 2, 'progress': 30}],
+                              progress=15),
+        ]
+        self.assertEqual(
+            utils.coalesce_progress_messages(bodies),
+            [self.progress_msg('1', [{'uid': 1, 'progress': 20,
+                                      'status': 'deploying'},
+                                     {'uid': 2, 'progress': 30}],
+                               progress=15),
+             bodies[1]])
+
+    def test_status_changes_kept(self):
+        bodies = [
+            self.progress_msg('1', [{'uid': 1, 'progress': 10,
+                                     'status': 'deploying'}]),
+            self.progress_msg('1', [{'uid': 1, 'progress': 100,
+                                     'status': 'ready'}]),
+            self.progress_msg('1', [{'uid': 2, 'progress': 50}],
+                              status='error', error='Failed'),
+            self.progress_msg('1', [{'uid': 2, 'progress': 60}]),
+            self.progress_msg('1', [], status='ready', progress=100),
+        ]
+        self.assertEqual(utils.coalesce_progress_messages(bodies), bodies)
+
+    def test_order_of_other_messages_kept(self):
+        bodies = [
+            self.progress_msg('1', [{'uid': 1, 'progress': 10}]),
+            {'method': 'remove_nodes_resp', 'args': {'task_uuid': '2'}},
+            self.progress_msg('1', [{'uid': 1, 'progress': 20}]),
+            self.progress_msg('1', [{'uid': 1, 'progress': 30}]),
+        ]
+        self.assertEqual(
+            utils.coalesce_progress_messages(bodies),
+            bodies[:2] + bodies[3:])
@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+
+#    Copyright 2015 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import amqp.exceptions as amqp_exceptions
+from kombu import Connection
+from kombu import messaging
+from kombu import pools
+import mock
+
+from nailgun import rpc
+from nailgun.test import base
+
+
+class TestRpcCast(base.BaseTestCase):
+
+    conn_str = 'memory://'
+
+    def setUp(self):
+        super(TestRpcCast, self).setUp()
+        self.conn_str_patcher = mock.patch.object(
+            rpc, 'conn_str', self.conn_str)
+        self.conn_str_patcher.start()
+        self.connection = Connection(self.conn_str)
+        self.queue = self.connection.SimpleQueue(rpc.naily_queue)
+        self.queue.clear()
+
+        establish = Connection._establish_connection
+        self.establish_patcher = mock.patch.object(
+            Connection, '_establish_connection',
+            side_effect=establish, autospec=True)
+        self.establish = self.establish_patcher.start()
+
+        # memory transport treats any channel error as recoverable,
+        # unlike amqp one which is used in production
+        self.errors_patcher = mock.patch.object(
+            Connection, 'recoverable_connection_errors',
+            new_callable=mock.PropertyMock,
+            return_value=(amqp_exceptions.RecoverableConnectionError,))
+        self.errors_patcher.start()
+
+    def tearDown(self):
+        self.errors_patcher.stop()
+        self.establish_patcher.stop()
+        self.conn_str_patcher.stop()
+        pools.reset()
+        self.queue.close()
+        self.connection.close()
+        super(TestRpcCast, self).tearDown()
+
+    def fail_once(self, exc):
+        publish = messaging.Producer._publish
+        calls = []
+
+        def _publish(*args, **kwargs):
+            calls.append(args)
+            if len(calls) == 1:
+                raise exc
+            return publish(*args, **kwargs)
+
+        return mock.patch.object(
+            messaging.Producer, '_publish', side_effect=_publish,
+            autospec=True)
+
+    def get_casted(self):
+        casted = []
+        while self.queue.qsize():
+            msg = self.queue.get_nowait()
+            msg.ack()
+            casted.append(msg.payload)
+        return casted
+
+    def test_connection_is_reused(self):
+        for i in range(3):
+            rpc.cast('naily', {'method': 'test', 'args': {'i': i}})
+
+        self.assertEqual(self.establish.call_count, 1)
+        self.assertEqual(
+            [m['args']['i'] for m in self.get_casted()], [0, 1, 2])
+
+    def test_reconnect_on_connection_error(self):
+        rpc.cast('naily', {'method': 'first'})
+
+        with self.fail_once(amqp_exceptions.RecoverableConnectionError(
+                'connection already closed')):
+            rpc.cast('naily', {'method': 'second'})
+
+        self.assertEqual(self.establish.call_count, 2)
+        self.assertEqual(
+            [m['method'] for m in self.get_casted()], ['first', 'second'])
+
+    @mock.patch('nailgun.rpc.utils.delete_entities')
+    def test_entities_recreated_on_precondition_failed(self, m_delete):
+        with self.fail_once(amqp_exceptions.PreconditionFailed()):
+            rpc.cast('naily', {'method': 'test'})
+
+        self.assertEqual(m_delete.call_count, 1)
+        self.assertEqual(
+            m_delete.call_args[0][1:],
+            (rpc.naily_service_exchange, rpc.naily_service_queue,
+             rpc.naily_exchange, rpc.naily_queue))
+        self.assertEqual(
+            [m['method'] for m in self.get_casted()], ['test'])
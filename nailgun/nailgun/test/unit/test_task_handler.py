@@ -83,3 +83,36 @@ class TestTaskHandlers(BaseTestCase):
             headers=self.default_headers
         )
         self.assertEqual(resp.status_code, 204)
+
+    def test_tasks_collection_page(self):
+        self.env.create(
+            nodes_kwargs=[
+                {"roles": ["controller"]}
+            ]
+        )
+        cluster_id = self.env.clusters[0].id
+        tasks = [Task(name=consts.TASK_NAMES.check_networks,
+                      cluster_id=cluster_id)
+                 for _ in range(3)]
+        self.db.add_all(tasks)
+        self.db.commit()
+
+        params = {'cluster_id': cluster_id, 'limit': 1, 'offset': 1,
+                  'fields': 'id,name'}
+        resp = self.app.get(
+            reverse('TaskCollectionHandler'),
+            params=params,
+            headers=self.default_headers
+        )
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.json_body,
+                         [{'id': tasks[1].id, 'name': tasks[1].name}])
+
+        headers = dict(self.default_headers,
+                       **{'If-None-Match': resp.headers['ETag']})
+        resp = self.app.get(
+            reverse('TaskCollectionHandler'),
+            params=params,
+            headers=headers
+        )
+        self.assertEqual(resp.status_code, 304)
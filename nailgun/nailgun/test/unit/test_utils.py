@@ -25,9 +25,11 @@ from nailgun.test import base
 from nailgun.utils import camel_to_snake_case
 from nailgun.utils import compact
 from nailgun.utils import dict_merge
+from nailgun.utils import dict_merge_shared
 from nailgun.utils import flatten
 from nailgun.utils import get_fuel_release_versions
 from nailgun.utils import grouper
+from nailgun.utils import LRUCache
 from nailgun.utils import traverse
 
 from nailgun.utils.debian import get_apt_preferences_line
@@ -56,6 +58,23 @@ class TestUtils(base.BaseIntegrationTest):
                                            "dict": {"stuff": "hz",
                                                     "another_stuff": "hz"}}})
 
+    def test_dict_merge_shared(self):
+        custom = {"pass": "qwerty",
+                  "dict": {"body": "solid", "dict": {"stuff": "hz"}}}
+        common = {"nodes": [{"uid": 1}, {"uid": 2}],
+                  "dict": {"transparency": 100,
+                           "dict": {"another_stuff": "hz"}}}
+        result = dict_merge_shared(custom, common)
+        self.assertEqual(result, dict_merge(custom, common))
+        # values which don't need merging are not copied
+        self.assertIs(result["nodes"], common["nodes"])
+        # merged dicts are new ones, so the arguments are left intact
+        self.assertEqual(custom["dict"],
+                         {"body": "solid", "dict": {"stuff": "hz"}})
+        self.assertEqual(common["dict"],
+                         {"transparency": 100,
+                          "dict": {"another_stuff": "hz"}})
+
     @patch('nailgun.utils.glob.glob', return_value=['test.yaml'])
     @patch('__builtin__.open', mock_open(read_data='test_data'))
     def test_get_release_versions(self, _):
@@ -104,6 +123,32 @@ class TestUtils(base.BaseIntegrationTest):
             list(grouper([0, 1, 2, 3, 4], 3, 'x')), [(0, 1, 2), (3, 4, 'x')])
 
 
+class TestLRUCache(base.BaseUnitTest):
+
+    def test_least_recently_used_item_is_dropped(self):
+        cache = LRUCache(2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        self.assertEqual(cache.get('a'), 1)
+        cache.set('c', 3)
+
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), 1)
+        self.assertEqual(cache.get('c'), 3)
+
+    def test_zero_size_cache_keeps_nothing(self):
+        cache = LRUCache(0)
+        cache.set('a', 1)
+        self.assertIsNone(cache.get('a'))
+
+    def test_clear(self):
+        cache = LRUCache(2)
+        cache.set('a', 1)
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+
+
 class TestTraverse(base.BaseUnitTest):
 
     class TestGenerator(object):
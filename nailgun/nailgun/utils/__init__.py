@@ -19,14 +19,21 @@ import re
 import shutil
 import string
 import six
+import threading
 import yaml
 
+from copy import copy
 from copy import deepcopy
 from itertools import chain
 from random import choice
 
 from six.moves import zip_longest
 
+try:
+    from collections import OrderedDict
+except ImportError:
+    from ordereddict import OrderedDict
+
 from nailgun.logger import logger
 from nailgun.settings import settings
 
@@ -84,6 +91,25 @@ def dict_merge(a, b):
     return result
 
 
+def dict_merge_shared(a, b):
+    """Merges dicts like :func:`dict_merge` but without deep copying.
+
+    Nested dicts are copied only where both a and b have a dict under
+    the same key, all other values are taken by reference. It makes
+    merging one big dict into many small ones cheap, but the results
+    share values with a and b, so they must be treated as read-only.
+    """
+    if not isinstance(b, dict):
+        return b
+    result = copy(a)
+    for k, v in b.iteritems():
+        if k in result and isinstance(result[k], dict):
+            result[k] = dict_merge_shared(result[k], v)
+        else:
+            result[k] = v
+    return result
+
+
 def traverse(data, generator_class, formatter_context=None):
     """Traverse data.
 
@@ -221,3 +247,41 @@ def join_range(r):
     """Converts (1, 2) -> "1:2"
     """
     return ":".join(map(str, r)) if r else None
+
+
+class LRUCache(object):
+    """Size-bounded mapping which drops least recently used items.
+
+    Access is guarded by a lock, so an instance can be shared
+    between threads of the same process.
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value = self._data.pop(key)
+            except KeyError:
+                return default
+            self._data[key] = value
+            return value
+
+    def set(self, key, value):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data.pop(key, None)
+            self._data[key] = value
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
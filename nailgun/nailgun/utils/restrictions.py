@@ -24,6 +24,7 @@ import six
 
 from nailgun.errors import errors
 from nailgun.expression import Expression
+from nailgun.expression import ExpressionContext
 from nailgun.utils import camel_to_snake_case
 from nailgun.utils import compact
 from nailgun.utils import flatten
@@ -34,6 +35,9 @@ class LimitsMixin(object):
     processing functionality
     """
 
+    #: context in which limits of the current check are evaluated
+    context = None
+
     def check_node_limits(self, models, nodes, role,
                           limits, limit_reached=True,
                           limit_types=['min', 'max', 'recommended']):
@@ -55,16 +59,15 @@ class LimitsMixin(object):
         """
         self.checked_limit_types = {}
         self.models = models
+        self.context = ExpressionContext(models)
         self.overrides = limits.get('overrides', [])
         self.limit_reached = limit_reached
         self.limit_types = limit_types
         self.limit_values = {
-            'max': self._evaluate_expression(
-                limits.get('max'), self.models),
-            'min': self._evaluate_expression(
-                limits.get('min'), self.models),
+            'max': self._evaluate_expression(limits.get('max')),
+            'min': self._evaluate_expression(limits.get('min')),
             'recommended': self._evaluate_expression(
-                limits.get('recommended'), self.models)
+                limits.get('recommended'))
         }
         self.count = len(filter(
             lambda node: not(node.pending_deletion) and (role in node.roles),
@@ -109,8 +112,7 @@ class LimitsMixin(object):
         else:
             compare = lambda a, b: a < b
 
-        limit_value = int(
-            self._evaluate_expression(obj.get(limit_type), self.models))
+        limit_value = int(self._evaluate_expression(obj.get(limit_type)))
         self.limit_values[limit_type] = limit_value
         self.checked_limit_types[limit_type] = True
         # TODO(apopovych): write proper default message
@@ -125,7 +127,7 @@ class LimitsMixin(object):
         """Check overridden restriction for limit
         """
         expression = override.get('condition')
-        result = self._evaluate_expression(expression, self.models)
+        result = self._evaluate_expression(expression)
         if result:
             return map(partial(self._check_limit, override), self.limit_types)
 
@@ -156,11 +158,14 @@ class LimitsMixin(object):
         if message:
             return message[0].get('message')
 
-    def _evaluate_expression(self, expression, models):
+    def _evaluate_expression(self, expression):
         """Evaluate expression if it exists
+
+        Expression is evaluated against models of the current check
         """
         if expression:
-            return Expression(str(expression), models).evaluate()
+            return Expression(str(expression), self.models).evaluate(
+                context=self.context)
 
 
 class RestrictionMixin(object):
@@ -169,7 +174,8 @@ class RestrictionMixin(object):
     """
 
     @classmethod
-    def check_restrictions(cls, models, restrictions, action=None):
+    def check_restrictions(cls, models, restrictions, action=None,
+                           context=None):
         """Check if attribute satisfied restrictions
 
         :param models: objects which represent models in restrictions
@@ -178,9 +184,14 @@ class RestrictionMixin(object):
         :type restrictions: list
         :param action: filtering restrictions by action key
         :type action: string
+        :param context: context shared by checks of the same models,
+            values of models are resolved in it only once
+        :type context: ExpressionContext
         :returns: dict -- object with 'result' as number and 'message' as dict
         """
         satisfied = []
+        if context is None:
+            context = ExpressionContext(models)
 
         if restrictions:
             expened_restrictions = map(
@@ -195,7 +206,7 @@ class RestrictionMixin(object):
             # Filter which restriction satisfied condition
             satisfied = filter(
                 lambda item: Expression(
-                    item.get('condition'), models).evaluate(),
+                    item.get('condition'), models).evaluate(context=context),
                 filterd_by_action_restrictions)
 
         return {
@@ -248,6 +259,8 @@ class AttributesRestriction(RestrictionMixin):
         :type data: list|dict
         :retruns: func -- generator which produces errors
         """
+        context = ExpressionContext(models)
+
         def find_errors(data=data):
             """Generator which traverses through cluster attributes tree
             checks restrictions for attributes and values for correctness
@@ -255,7 +268,7 @@ class AttributesRestriction(RestrictionMixin):
             """
             if isinstance(data, dict):
                 restr = cls.check_restrictions(
-                    models, data.get('restrictions', []))
+                    models, data.get('restrictions', []), context=context)
                 if restr.get('result'):
                     # TODO(apopovych): handle restriction message
                     return
@@ -303,6 +316,7 @@ class VmwareAttributesRestriction(RestrictionMixin):
         :retruns: func -- generator which produces errors
         """
         root_key = camel_to_snake_case(cls.__name__)
+        context = ExpressionContext(models)
 
         def find_errors(metadata=metadata, path_key=root_key):
             """Generator for vmware attributes errors which for each
@@ -311,7 +325,8 @@ class VmwareAttributesRestriction(RestrictionMixin):
             """
             if isinstance(metadata, dict):
                 restr = cls.check_restrictions(
-                    models, metadata.get('restrictions', []))
+                    models, metadata.get('restrictions', []),
+                    context=context)
                 if restr.get('result'):
                     # TODO(apopovych): handle restriction message?
                     return
@@ -20,6 +20,7 @@
 # Analyse dumps for packets with special cookie in UDP payload.
 #
 import argparse
+import binascii
 import json
 import logging
 import os
@@ -27,6 +28,7 @@ import re
 import shutil
 import signal
 import socket
+import struct
 import subprocess
 import sys
 import time
@@ -35,13 +37,139 @@ import traceback
 import logging.handlers
 
 
-from scapy import config as scapy_config
+def _checksum(data):
+    """Internet checksum as defined in RFC 1071"""
+    if len(data) % 2:
+        data += '\0'
+    s = sum(struct.unpack('!{0}H'.format(len(data) // 2), data))
+    s = (s >> 16) + (s & 0xffff)
+    s += s >> 16
+    return ~s & 0xffff
 
-scapy_config.logLevel = 40
-scapy_config.use_pcap = True
-import scapy.all as scapy
 
-from scapy.utils import rdpcap
+def build_probe_frame(src_mac, vlan, src, dst, sport, dport, data):
+    """Builds raw ethernet frame of probe UDP packet
+
+    Header fields are the same scapy uses by default, so the frame is
+    equal to the one built as Ether/Dot1Q/IP/UDP packet by scapy, but
+    building it doesn't take per packet overhead of scapy.
+    """
+    src_ip = socket.inet_aton(src)
+    dst_ip = socket.inet_aton(dst)
+    udp_len = 8 + len(data)
+
+    ip_header = struct.pack(
+        '!BBHHHBBH4s4s', 0x45, 0, 20 + udp_len, 1, 0, 64,
+        socket.IPPROTO_UDP, 0, src_ip, dst_ip)
+    ip_header = ''.join((ip_header[:10],
+                         struct.pack('!H', _checksum(ip_header)),
+                         ip_header[12:]))
+
+    udp_header = struct.pack('!HHHH', sport, dport, udp_len, 0)
+    pseudo_header = struct.pack(
+        '!4s4sHH', src_ip, dst_ip, socket.IPPROTO_UDP, udp_len)
+    # zero checksum means there is no checksum in UDP
+    udp_checksum = _checksum(pseudo_header + udp_header + data) or 0xffff
+    udp_header = udp_header[:6] + struct.pack('!H', udp_checksum)
+
+    frame = ['\xff' * 6, binascii.unhexlify(src_mac.replace(':', ''))]
+    if vlan > 0:
+        frame.append(struct.pack('!HH', 0x8100, vlan))
+    frame.extend((struct.pack('!H', 0x0800), ip_header, udp_header, data))
+    return ''.join(frame)
+
+
+# link type of ethernet frames in pcap files
+DLT_EN10MB = 1
+
+
+class PcapReader(object):
+    """Reads frames from pcap file while it's being written
+
+    Offset of the first unread record is kept between reads, so every
+    call of :meth:`read` yields only frames written since the previous
+    one and a file of any size is read without loading it in memory.
+    """
+
+    magic_numbers = {
+        '\xa1\xb2\xc3\xd4': '>',
+        '\xa1\xb2\x3c\x4d': '>',
+        '\xd4\xc3\xb2\xa1': '<',
+        '\x4d\x3c\xb2\xa1': '<',
+    }
+
+    def __init__(self, path):
+        self.path = path
+        self.offset = 0
+        self.linktype = None
+        self.record_header = None
+
+    def _read_header(self, f):
+        header = f.read(24)
+        if len(header) < 24:
+            return False
+        if header[:4] not in self.magic_numbers:
+            raise ValueError('Unknown format of pcap file')
+        byte_order = self.magic_numbers[header[:4]]
+        self.linktype = struct.unpack(byte_order + 'I', header[20:])[0]
+        if self.linktype != DLT_EN10MB:
+            raise ValueError(
+                'Unsupported link type {0}'.format(self.linktype))
+        self.record_header = struct.Struct(byte_order + 'IIII')
+        self.offset = len(header)
+        return True
+
+    def read(self):
+        """Yields frames written since the previous call"""
+        if not os.path.exists(self.path):
+            return
+
+        with open(self.path, 'rb') as f:
+            f.seek(self.offset)
+            if self.record_header is None and not self._read_header(f):
+                return
+
+            while True:
+                header = f.read(self.record_header.size)
+                if len(header) < self.record_header.size:
+                    break
+                _, _, incl_len, _ = self.record_header.unpack(header)
+                frame = f.read(incl_len)
+                # the record is not written completely yet
+                if len(frame) < incl_len:
+                    break
+                yield frame
+                self.offset += len(header) + incl_len
+
+
+def parse_probe_frame(frame, dport):
+    """Gets vlan and payload of UDP packet from ethernet frame
+
+    Only offsets of ethernet, 802.1Q, IP and UDP headers are parsed.
+
+    :returns: tuple (vlan, payload) or None if frame doesn't contain
+        UDP packet to the dport
+    """
+    try:
+        ethertype, = struct.unpack_from('!H', frame, 12)
+        offset = 14
+        vlan = 0
+        if ethertype == 0x8100:
+            tci, ethertype = struct.unpack_from('!HH', frame, offset)
+            vlan = tci & 0xfff
+            offset += 4
+        if ethertype != 0x0800 or \
+                ord(frame[offset + 9]) != socket.IPPROTO_UDP:
+            return None
+        offset += (ord(frame[offset]) & 0xf) * 4
+        udp_dport, udp_len = struct.unpack_from('!HH', frame, offset + 2)
+    except (struct.error, IndexError):
+        return None
+
+    if udp_dport != dport:
+        return None
+    # payload may be followed by ethernet padding
+    return vlan, frame[offset + 8:offset + udp_len]
 
 
 class ActorFabric(object):
@@ -342,6 +470,8 @@ class Sender(Actor):
                                           'netprobe_sender')
         super(Sender, self).__init__(config)
         self.logger.info("=== Starting Sender ===")
+        self.iface_macs = {}
+        self.iface_sockets = {}
         self._log_ifaces("Interfaces just before sending probing packages")
 
     def run(self):
@@ -352,9 +482,23 @@ class Sender(Actor):
                               traceback.format_exc())
 
     def _get_iface_mac(self, iface):
-        path = '/sys/class/net/{iface}/address'.format(iface=iface)
-        with open(path, 'r') as address:
-            return address.read().strip('\n')
+        if iface not in self.iface_macs:
+            path = '/sys/class/net/{iface}/address'.format(iface=iface)
+            with open(path, 'r') as address:
+                self.iface_macs[iface] = address.read().strip('\n')
+        return self.iface_macs[iface]
+
+    def _get_iface_socket(self, iface):
+        if iface not in self.iface_sockets:
+            sock = socket.socket(socket.AF_PACKET, socket.SOCK_RAW)
+            sock.bind((iface, 0))
+            self.iface_sockets[iface] = sock
+        return self.iface_sockets[iface]
+
+    def _close_iface_sockets(self):
+        for sock in self.iface_sockets.values():
+            sock.close()
+        self.iface_sockets = {}
 
     def _run(self):
         for iface, vlan in self._iface_vlan_iterator():
@@ -366,29 +510,43 @@ class Sender(Actor):
         self._log_ifaces("Interfaces just after ensuring them down in sender")
         self.logger.info("=== Sender Finished ===")
 
-    def _send_packets(self):
-        start_time = time.time()
+    def _build_frames(self):
+        """Builds frames for every interface and vlan before sending
 
-        while time.time() - start_time <= self.config['duration']:
-            for iface, vlan in self._iface_vlan_iterator():
-                self.logger.debug("Sending packets: iface=%s vlan=%s",
-                                  iface, str(vlan))
-                for _ in xrange(self.config['repeat']):
-                    self._sendp(iface, vlan)
-
-    def _sendp(self, iface, vlan):
-        try:
+        :returns: list of tuples (iface, socket, frame)
+        """
+        frames = []
+        for iface, vlan in self._iface_vlan_iterator():
             data = str(''.join((self.config['cookie'], iface, ' ',
                        self.config['uid'])))
+            try:
+                sock = self._get_iface_socket(iface)
+            except socket.error as e:
+                self.logger.error("Socket error: %s, %s", e, iface)
+                continue
+            frame = build_probe_frame(
+                self._get_iface_mac(iface), vlan,
+                self.config['src'], self.config['dst'],
+                self.config['sport'], self.config['dport'], data)
+            frames.append((iface, sock, frame))
+        self.logger.debug("Built %d frames to send", len(frames))
+        return frames
 
-            p = scapy.Ether(src=self._get_iface_mac(iface),
-                            dst="ff:ff:ff:ff:ff:ff")
-            if vlan > 0:
-                p = p / scapy.Dot1Q(vlan=vlan)
-            p = p / scapy.IP(src=self.config['src'], dst=self.config['dst'])
-            p = p / scapy.UDP(sport=self.config['sport'],
-                              dport=self.config['dport']) / data
-            scapy.sendp(p, iface=iface)
+    def _send_packets(self):
+        try:
+            frames = self._build_frames()
+            start_time = time.time()
+
+            while time.time() - start_time <= self.config['duration']:
+                for iface, sock, frame in frames:
+                    for _ in xrange(self.config['repeat']):
+                        self._sendp(iface, sock, frame)
+        finally:
+            self._close_iface_sockets()
+
+    def _sendp(self, iface, sock, frame):
+        try:
+            sock.send(frame)
         except socket.error as e:
             self.logger.error("Socket error: %s, %s", e, iface)
 
@@ -405,6 +563,7 @@ class Listener(Actor):
         self.pidfile = self.addpid('/var/run/net_probe')
 
         self.neighbours = {}
+        self.pcap_readers = []
         self._define_pcap_dir()
 
     def addpid(self, piddir):
@@ -464,6 +623,7 @@ class Listener(Actor):
         try:
             while True:
                 time.sleep(1)
+                self.read_packets()
         except KeyboardInterrupt:
             self.logger.debug("Interruption signal catched")
         except SystemExit:
@@ -494,36 +654,36 @@ class Listener(Actor):
         self.logger.info("=== Listener Finished ===")
 
     def read_packets(self):
-        for iface in self._iface_iterator():
-            filenames = ['{0}.pcap'.format(iface),
-                         'vlan_{0}.pcap'.format(iface)]
-            for filename in filenames:
-                self.read_pcap_file(iface, filename)
+        for iface, reader in list(self.pcap_readers):
+            try:
+                for frame in reader.read():
+                    self.fprn(frame, iface)
+            except Exception:
+                self.logger.exception('Cant read pcap file %s', reader.path)
+                self.pcap_readers.remove((iface, reader))
+
+    def fprn(self, frame, iface):
+        probe = parse_probe_frame(frame, self.config['dport'])
+        if probe is None:
+            return
+        vlan, received_msg = probe
+        if not received_msg.startswith(self.config['cookie']):
+            return
 
-    def read_pcap_file(self, iface, filename):
         try:
-            pcap_file = os.path.join(self.config['pcap_dir'], filename)
-            for pkt in rdpcap(pcap_file):
-                self.fprn(pkt, iface)
-        except Exception:
-            self.logger.exception('Cant read pcap file %s', pcap_file)
-
-    def fprn(self, p, iface):
-
-        if scapy.Dot1Q in p:
-            vlan = p[scapy.Dot1Q].vlan
-        else:
-            vlan = 0
-
-        self.logger.debug("Catched packet: vlan=%s len=%s payload=%s",
-                          str(vlan), p[scapy.UDP].len, p[scapy.UDP].payload)
-        received_msg, _ = p[scapy.UDP].extract_padding(p[scapy.UDP].load)
-        decoded_msg = received_msg.decode()
-        riface, uid = decoded_msg[len(self.config["cookie"]):].split(' ', 1)
+            decoded_msg = received_msg.decode()
+            riface, uid = decoded_msg[len(self.config['cookie']):].split(
+                ' ', 1)
+        except ValueError:
+            self.logger.debug("Unable to parse packet: vlan=%s payload=%r",
+                              str(vlan), received_msg)
+            return
 
         self.neighbours[iface].setdefault(vlan, {})
 
         if riface not in self.neighbours[iface][vlan].setdefault(uid, []):
+            self.logger.debug("Catched packet: vlan=%s payload=%s",
+                              str(vlan), received_msg)
             self.neighbours[iface][vlan][uid].append(riface)
 
     def get_probe_frames(self, iface, vlan=False):
@@ -535,9 +695,11 @@ class Listener(Actor):
             filter_string = '{0} {1}'.format('vlan and', filter_string)
             filename = '{0}_{1}'.format('vlan', filename)
         pcap_file = os.path.join(self.config['pcap_dir'], filename)
+        self.pcap_readers.append((iface, PcapReader(pcap_file)))
 
+        # packets are written unbuffered to be read while capturing
         return subprocess.Popen(
-            ['tcpdump', '-i', iface, '-w', pcap_file, filter_string],
+            ['tcpdump', '-i', iface, '-U', '-w', pcap_file, filter_string],
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE)
 
@@ -15,8 +15,11 @@
 import json
 import multiprocessing
 import os
+import shutil
 import signal
 import socket
+import struct
+import tempfile
 import time
 import unittest
 
@@ -188,3 +191,81 @@ class TestNetCheckSender(unittest.TestCase):
 
         expected_vlans = set(self.config['interfaces'][self.iface].split(','))
         self.assertEqual(expected_vlans, self.received_vlans)
+
+
+class TestProbeFrame(unittest.TestCase):
+
+    def get_scapy_frame(self, vlan, data):
+        p = scapy.Ether(src='64:0b:36:0e:0a:b7', dst="ff:ff:ff:ff:ff:ff")
+        if vlan > 0:
+            p = p / scapy.Dot1Q(vlan=vlan)
+        p = p / scapy.IP(src='10.0.0.1', dst='10.255.255.255')
+        p = p / scapy.UDP(sport=4056, dport=4057) / data
+        return str(p)
+
+    def test_frame_equals_scapy_frame(self):
+        for vlan in (0, 1, 100, 4094):
+            for data in ('Nailgun:eth1 1', 'Nailgun:eth10 aaa-bb-cccccc'):
+                frame = api.build_probe_frame(
+                    '64:0b:36:0e:0a:b7', vlan, '10.0.0.1', '10.255.255.255',
+                    4056, 4057, data)
+                self.assertEqual(frame, self.get_scapy_frame(vlan, data))
+
+
+class TestPcapReader(unittest.TestCase):
+
+    def setUp(self):
+        self.pcap_dir = tempfile.mkdtemp()
+        self.pcap_file = os.path.join(self.pcap_dir, 'eth1.pcap')
+        self.frames = [
+            api.build_probe_frame(
+                '64:0b:36:0e:0a:b7', vlan, '1.0.0.0', '1.0.0.0',
+                31337, 31337, 'Nailgun:eth1 {0}'.format(vlan))
+            for vlan in (0, 100, 101)
+        ]
+
+    def tearDown(self):
+        shutil.rmtree(self.pcap_dir)
+
+    def write_pcap(self, data):
+        with open(self.pcap_file, 'ab') as f:
+            f.write(data)
+
+    def pcap_header(self):
+        return struct.pack('<IHHiIII', 0xa1b2c3d4, 2, 4, 0, 0, 65535,
+                           api.DLT_EN10MB)
+
+    def pcap_record(self, frame):
+        return struct.pack('<IIII', 0, 0, len(frame), len(frame)) + frame
+
+    def test_frames_read_while_written(self):
+        reader = api.PcapReader(self.pcap_file)
+        self.assertEqual(list(reader.read()), [])
+
+        self.write_pcap(self.pcap_header())
+        self.assertEqual(list(reader.read()), [])
+
+        record = self.pcap_record(self.frames[1])
+        self.write_pcap(self.pcap_record(self.frames[0]) + record[:20])
+        self.assertEqual(list(reader.read()), self.frames[:1])
+
+        self.write_pcap(record[20:] + self.pcap_record(self.frames[2]))
+        self.assertEqual(list(reader.read()), self.frames[1:])
+        self.assertEqual(list(reader.read()), [])
+
+    def test_unknown_link_type(self):
+        self.write_pcap(self.pcap_header()[:20] + struct.pack('<I', 113))
+        reader = api.PcapReader(self.pcap_file)
+        self.assertRaises(ValueError, list, reader.read())
+
+    def test_parse_probe_frame(self):
+        self.assertEqual(api.parse_probe_frame(self.frames[0], 31337),
+                         (0, 'Nailgun:eth1 0'))
+        self.assertEqual(api.parse_probe_frame(self.frames[1], 31337),
+                         (100, 'Nailgun:eth1 100'))
+        # ethernet padding is dropped
+        self.assertEqual(
+            api.parse_probe_frame(self.frames[2] + '\0' * 10, 31337),
+            (101, 'Nailgun:eth1 101'))
+        self.assertIsNone(api.parse_probe_frame(self.frames[0], 31338))
+        self.assertIsNone(api.parse_probe_frame(self.frames[0][:30], 31337))
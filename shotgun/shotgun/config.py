@@ -55,6 +55,14 @@ class Config(object):
     def lastdump(self):
         return self.data.get("lastdump", settings.LASTDUMP)
 
+    @property
+    def parallel(self):
+        return self.data.get("parallel", settings.PARALLEL)
+
+    @property
+    def host_timeout(self):
+        return self.data.get("host_timeout", settings.HOST_TIMEOUT)
+
     @property
     def objects(self):
         for role, properties in self.data["dump"].iteritems():
@@ -13,7 +13,12 @@
 #    under the License.
 
 import logging
+import multiprocessing
 import os
+import sys
+import time
+
+import fabric.network
 
 from shotgun.driver import Driver
 from shotgun import utils
@@ -22,7 +27,34 @@ from shotgun import utils
 logger = logging.getLogger(__name__)
 
 
+def snapshot_host(objects, conf):
+    """Dumps objects of the same host one after another
+
+    It is run in a separate process for every host, so fabric reuses
+    one ssh connection for all of them. Failed objects do not prevent
+    the rest from being dumped, but make the process exit with error.
+    """
+    failed = False
+    try:
+        for obj_data in objects:
+            logger.debug("Dumping: %s", obj_data)
+            try:
+                driver = Driver.getDriver(obj_data, conf)
+                driver.snapshot()
+            except Exception:
+                logger.exception("Failed to dump: %s", obj_data)
+                failed = True
+    finally:
+        fabric.network.disconnect_all()
+    if failed:
+        sys.exit(1)
+
+
 class Manager(object):
+
+    #: how often state of dumping processes is checked, in seconds
+    poll_interval = 0.5
+
     def __init__(self, conf):
         logger.debug("Initializing snapshot manager")
         self.conf = conf
@@ -30,10 +62,9 @@ class Manager(object):
     def snapshot(self):
         logger.debug("Making snapshot")
         utils.execute("rm -rf {0}".format(os.path.dirname(self.conf.target)))
-        for obj_data in self.conf.objects:
-            logger.debug("Dumping: %s", obj_data)
-            driver = Driver.getDriver(obj_data, self.conf)
-            driver.snapshot()
+        failed = self.snapshot_hosts(self.group_by_host(self.conf.objects))
+        for host, reason in sorted(failed.items()):
+            logger.error("Failed to dump host %s: %s", host, reason)
         logger.debug("Archiving dump directory: %s", self.conf.target)
 
         utils.compress(self.conf.target, self.conf.compression_level)
@@ -41,3 +72,63 @@ class Manager(object):
         with open(self.conf.lastdump, "w") as fo:
             fo.write("{0}.tar.xz".format(self.conf.target))
         return "{0}.tar.xz".format(self.conf.target)
+
+    def group_by_host(self, objects):
+        """Groups objects by address of their host
+
+        :returns: list of (host, objects) pairs in the order in which
+            hosts appear in config
+        """
+        groups = []
+        host_objects = {}
+        for obj_data in objects:
+            host = obj_data.get("host", {}).get("address", "localhost")
+            if host not in host_objects:
+                host_objects[host] = []
+                groups.append((host, host_objects[host]))
+            # NOTE: config yields the same dict for every host
+            host_objects[host].append(dict(obj_data))
+        return groups
+
+    def snapshot_hosts(self, groups):
+        """Dumps hosts in parallel processes
+
+        No more than conf.parallel hosts are dumped at the same time,
+        and dumping of a host is terminated if it takes more than
+        conf.host_timeout seconds.
+
+        :param groups: list of (host, objects) pairs
+        :returns: dict of failed hosts with reasons of failures
+        """
+        pending = list(groups)
+        running = {}
+        failed = {}
+        while pending or running:
+            while pending and len(running) < self.conf.parallel:
+                host, objects = pending.pop(0)
+                logger.debug("Dumping host: %s", host)
+                process = multiprocessing.Process(
+                    target=snapshot_host, args=(objects, self.conf),
+                    name=host)
+                process.start()
+                running[host] = (process, time.time())
+
+            for host, (process, started) in running.items():
+                if not process.is_alive():
+                    process.join()
+                    if process.exitcode != 0:
+                        failed[host] = "exit code {0}".format(
+                            process.exitcode)
+                elif self.conf.host_timeout and \
+                        time.time() - started > self.conf.host_timeout:
+                    process.terminate()
+                    process.join()
+                    failed[host] = "timed out after {0} seconds".format(
+                        self.conf.host_timeout)
+                else:
+                    continue
+                del running[host]
+
+            if running:
+                time.sleep(self.poll_interval)
+        return failed
@@ -16,4 +16,8 @@ TARGET = "/tmp/snapshot"
 LASTDUMP = "/tmp/snapshot_last"
 TIMESTAMP = True
 COMPRESSION_LEVEL = 3
+# how many hosts are dumped at the same time
+PARALLEL = 10
+# seconds after which dumping of a host is aborted
+HOST_TIMEOUT = 3600
 LOG_FILE = "/var/log/shotgun.log"
@@ -12,20 +12,24 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import sys
 import tempfile
+import time
 
 import mock
 
+from shotgun.config import Config
 from shotgun.manager import Manager
+from shotgun.manager import snapshot_host
 from shotgun.test import base
 
 
 class TestManager(base.BaseTestCase):
 
-    @mock.patch('shotgun.manager.Driver.getDriver')
+    @mock.patch('shotgun.manager.Manager.snapshot_hosts', return_value={})
     @mock.patch('shotgun.manager.utils.execute')
     @mock.patch('shotgun.manager.utils.compress')
-    def test_snapshot(self, mcompress, mexecute, mget):
+    def test_snapshot(self, mcompress, mexecute, msnapshot_hosts):
         data = {
             "type": "file",
             "path": "/remote_dir/remote_file",
@@ -39,5 +43,79 @@ class TestManager(base.BaseTestCase):
         conf.lastdump = tempfile.mkstemp()[1]
         manager = Manager(conf)
         manager.snapshot()
-        mget.assert_called_once_with(data, conf)
+        msnapshot_hosts.assert_called_once_with([("remote_host", [data])])
         mexecute.assert_called_once_with('rm -rf /target')
+
+    def test_group_by_host(self):
+        conf = Config({
+            "dump": {
+                "controller": {
+                    "hosts": [{"address": "node-1"}, {"address": "node-2"}],
+                    "objects": [
+                        {"type": "file", "path": "/etc/nova"},
+                        {"type": "command", "command": "uptime",
+                         "to_file": "uptime.txt"},
+                    ],
+                },
+                "master": {
+                    "objects": [{"type": "dir", "path": "/var/log"}],
+                },
+            },
+        })
+        groups = Manager(conf).group_by_host(conf.objects)
+
+        self.assertEqual(
+            [(host, [o["host"]["address"] for o in objects])
+             for host, objects in groups],
+            [("node-1", ["node-1", "node-1"]),
+             ("node-2", ["node-2", "node-2"])])
+
+        master = {"type": "dir", "path": "/var/log", "host": {}}
+        self.assertEqual(
+            Manager(conf).group_by_host([master]),
+            [("localhost", [master])])
+
+    @mock.patch('shotgun.manager.fabric.network.disconnect_all')
+    @mock.patch('shotgun.manager.Driver.getDriver')
+    def test_snapshot_host(self, mget, mdisconnect):
+        conf = mock.Mock()
+        objects = [{"type": "file"}, {"type": "command"}]
+        snapshot_host(objects, conf)
+        self.assertEqual(
+            mget.call_args_list,
+            [mock.call(objects[0], conf), mock.call(objects[1], conf)])
+        self.assertEqual(mget.return_value.snapshot.call_count, 2)
+        self.assertEqual(mdisconnect.call_count, 1)
+
+    @mock.patch('shotgun.manager.fabric.network.disconnect_all')
+    @mock.patch('shotgun.manager.Driver.getDriver')
+    def test_snapshot_host_continues_after_failure(self, mget, mdisconnect):
+        mget.return_value.snapshot.side_effect = [Exception('Boom'), None]
+        with self.assertRaises(SystemExit):
+            snapshot_host([{"type": "file"}, {"type": "command"}], None)
+        self.assertEqual(mget.return_value.snapshot.call_count, 2)
+        self.assertEqual(mdisconnect.call_count, 1)
+
+    @mock.patch('shotgun.manager.snapshot_host')
+    def test_snapshot_hosts(self, msnapshot_host):
+        def snapshot(objects, conf):
+            if objects == ["fail"]:
+                sys.exit(1)
+            elif objects == ["hang"]:
+                time.sleep(30)
+
+        msnapshot_host.side_effect = snapshot
+        conf = mock.Mock(parallel=2, host_timeout=1)
+        manager = Manager(conf)
+        manager.poll_interval = 0.05
+
+        failed = manager.snapshot_hosts([
+            ("node-1", ["ok"]),
+            ("node-2", ["fail"]),
+            ("node-3", ["hang"]),
+            ("node-4", ["ok"]),
+        ])
+
+        self.assertEqual(sorted(failed), ["node-2", "node-3"])
+        self.assertEqual(failed["node-2"], "exit code 1")
+        self.assertEqual(failed["node-3"], "timed out after 1 seconds")